@@ -0,0 +1,24 @@
+"""
+Emplacements des fichiers utilisateur de l'application
+"""
+import os
+import re
+
+APP_DIR_NAME = "ToolboxPyQt6"
+
+
+def get_user_data_dir():
+    """Retourne (et crée si besoin) le dossier de données utilisateur"""
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+
+    path = os.path.join(base, APP_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def safe_filename(value):
+    """Transforme un hôte ou un identifiant en nom de fichier valide"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", str(value))
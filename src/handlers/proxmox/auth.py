@@ -0,0 +1,285 @@
+"""
+Authentification Proxmox : tokens API et tickets réutilisables
+"""
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+import keyring
+import requests
+from requests.cookies import cookiejar_from_dict
+from proxmoxer import ProxmoxAPI
+from proxmoxer.core import ProxmoxResource
+from proxmoxer.backends.https import Backend as HttpsBackend, ProxmoxHTTPApiTokenAuth, ProxmoxHTTPAuthBase
+
+from ...core.logger import log_debug, log_error, log_info
+
+
+class TicketStore:
+    """Tickets PVEAuthCookie conservés dans le trousseau système avec leur date d'émission
+
+    Chaque ticket est lié au mot de passe qui l'a obtenu (empreinte salée) :
+    un mot de passe différent ne réutilise pas le ticket et l'efface.
+    """
+
+    SERVICE = "proxmox_toolbox_ticket"
+    TICKET_LIFETIME = 7200  # Durée de validité d'un ticket Proxmox (2 h)
+    SAFETY_MARGIN = 300  # Ne pas réutiliser un ticket qui expire dans moins de 5 min
+
+    def _key(self, host, user):
+        return f"{user}@{host}"
+
+    @staticmethod
+    def _credential(password, salt):
+        return hashlib.pbkdf2_hmac("sha256", (password or "").encode(), bytes.fromhex(salt), 100000).hex()
+
+    def load(self, host, user, password):
+        """Retourne le ticket encore valide pour host/user obtenu avec password, sinon None"""
+        try:
+            raw = keyring.get_password(self.SERVICE, self._key(host, user))
+        except Exception as e:
+            log_debug(f"Trousseau indisponible: {e}", "Proxmox")
+            return None
+        if not raw:
+            return None
+
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return None
+
+        salt = entry.get("salt")
+        if not salt or not hmac.compare_digest(entry.get("credential", ""), self._credential(password, salt)):
+            log_debug("Mot de passe différent de celui du ticket en cache : ticket ignoré", "Proxmox")
+            self.delete(host, user)
+            return None
+        if time.time() - entry.get("created", 0) > self.TICKET_LIFETIME - self.SAFETY_MARGIN:
+            return None
+        return entry
+
+    def save(self, host, user, password, ticket, csrf_token, created=None):
+        """Mémorise un ticket dans le trousseau, lié au mot de passe qui l'a obtenu"""
+        salt = os.urandom(16).hex()
+        entry = {"ticket": ticket, "csrf": csrf_token, "created": created or time.time(),
+                 "salt": salt, "credential": self._credential(password, salt)}
+        try:
+            keyring.set_password(self.SERVICE, self._key(host, user), json.dumps(entry))
+        except Exception as e:
+            log_debug(f"Impossible de sauvegarder le ticket: {e}", "Proxmox")
+
+    def delete(self, host, user):
+        """Oublie le ticket de host/user"""
+        try:
+            keyring.delete_password(self.SERVICE, self._key(host, user))
+        except Exception:
+            pass
+
+
+class TicketAuth(ProxmoxHTTPAuthBase):
+    """Authentification requests par ticket PVEAuthCookie
+
+    Le même objet est partagé par toutes les sessions : un renouvellement
+    du ticket profite immédiatement à toutes les connexions.
+    """
+
+    def __init__(self, ticket, csrf_token, created):
+        self.ticket = ticket
+        self.csrf_token = csrf_token
+        self.created = created
+
+    def update(self, ticket, csrf_token, created):
+        self.ticket = ticket
+        self.csrf_token = csrf_token
+        self.created = created
+
+    def get_cookies(self):
+        return cookiejar_from_dict({"PVEAuthCookie": self.ticket})
+
+    def get_tokens(self):
+        return self.ticket, self.csrf_token
+
+    def __call__(self, request):
+        request.headers["Cookie"] = f"PVEAuthCookie={self.ticket}"
+        if request.method != "GET":
+            request.headers["CSRFPreventionToken"] = self.csrf_token
+        return request
+
+
+class TicketBackend(HttpsBackend):
+    """Backend https de proxmoxer authentifié par un TicketAuth existant (aucun login)"""
+
+    def __init__(self, host, ticket_auth, port=None, verify_ssl=True, timeout=5, service="PVE"):
+        super().__init__(host, port=port, verify_ssl=verify_ssl, timeout=timeout, service=service)
+        self.auth = ticket_auth
+
+
+class TicketProxmoxAPI(ProxmoxAPI):
+    """ProxmoxAPI construit sur un TicketBackend
+
+    proxmoxer ne charge ses backends que par nom et ne sait pas reprendre un
+    ticket existant : la ressource racine est construite comme dans
+    ProxmoxAPI, à partir du backend fourni.
+    """
+
+    def __init__(self, host, ticket_auth, **options):
+        backend = TicketBackend(host, ticket_auth, **options)
+        ProxmoxResource.__init__(self, base_url=backend.get_base_url(), session=backend.get_session(),
+                                 serializer=backend.get_serializer())
+        self.ticket_auth = ticket_auth
+
+    def get_tokens(self):
+        return self.ticket_auth.get_tokens()
+
+
+class AuthManager:
+    """Construit les connexions ProxmoxAPI sans refaire de login à chaque fois
+
+    - token API (config['token_name'] / config['token_value']) : aucun login ;
+    - sinon, un ticket encore valide du trousseau est réutilisé ; à défaut,
+      un seul POST /access/ticket est effectué et le ticket est mémorisé.
+    Le ticket est renouvelé en arrière-plan avant son expiration.
+    """
+
+    RENEW_AGE = 3600  # Renouveler le ticket après 1 h
+    CHECK_INTERVAL = 300
+
+    def __init__(self):
+        self.store = TicketStore()
+        self.config = None
+        self.ticket_auth = None
+        self.used_cached_ticket = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def uses_token(self, config=None):
+        config = config or self.config or {}
+        return bool(config.get('token_name') and config.get('token_value'))
+
+    def login(self, config, use_cache=True):
+        """Retourne une instance ProxmoxAPI authentifiée pour config['ip']"""
+        self.config = config
+        self.used_cached_ticket = False
+
+        if self.uses_token(config):
+            log_debug(f"Authentification par token API {config['user']}!{config['token_name']}", "Proxmox")
+            self.ticket_auth = None
+            return self.create_api(config['ip'])
+
+        cached = self.store.load(config['ip'], config['user'], config.get('password')) if use_cache else None
+        if cached:
+            log_debug("Réutilisation du ticket Proxmox en cache", "Proxmox")
+            self.ticket_auth = TicketAuth(cached["ticket"], cached["csrf"], cached["created"])
+            self.used_cached_ticket = True
+        else:
+            ticket, csrf_token = self._request_ticket(config['user'], config['password'])
+            self.ticket_auth = TicketAuth(ticket, csrf_token, time.time())
+            self.store.save(config['ip'], config['user'], config.get('password'), ticket, csrf_token,
+                            self.ticket_auth.created)
+
+        return self.create_api(config['ip'])
+
+    def create_api(self, host):
+        """Crée une instance ProxmoxAPI vers host avec l'authentification courante"""
+        config = self.config
+        options = {
+            "port": config.get('port', 8006),
+            "verify_ssl": config.get('verify_ssl', False)
+        }
+
+        if self.uses_token():
+            return ProxmoxAPI(host, user=config['user'], token_name=config['token_name'],
+                              token_value=config['token_value'], **options)
+
+        return TicketProxmoxAPI(host, self.ticket_auth, **options)
+
+    # === ACCÈS HTTP DIRECT ===
+    def base_url(self, host):
+        """URL de base de l'API JSON sur host"""
+        return f"https://{host}:{self.config.get('port', 8006)}/api2/json"
+
+    def session(self):
+        """Session requests authentifiée, pour les appels que proxmoxer ne sait pas faire (envoi en flux)"""
+        config = self.config
+        session = requests.Session()
+        session.verify = config.get('verify_ssl', False)
+        if self.uses_token():
+            session.auth = ProxmoxHTTPApiTokenAuth(config['user'], config['token_name'],
+                                                   config['token_value'], "PVE")
+        else:
+            session.auth = self.ticket_auth
+        return session
+
+    def headers(self, method="GET"):
+        """En-têtes d'authentification pour un client HTTP autre que requests (client asynchrone)
+
+        Relus à chaque requête : un ticket renouvelé est pris en compte aussitôt.
+        """
+        config = self.config or {}
+        if self.uses_token():
+            return {"Authorization": f"PVEAPIToken={config['user']}!{config['token_name']}={config['token_value']}"}
+        if self.ticket_auth is None:
+            raise RuntimeError("Aucune authentification Proxmox active")
+        ticket, csrf_token = self.ticket_auth.get_tokens()
+        headers = {"Cookie": f"PVEAuthCookie={ticket}"}
+        if method != "GET":
+            headers["CSRFPreventionToken"] = csrf_token
+        return headers
+
+    def _request_ticket(self, user, password):
+        """Obtient un ticket via POST /access/ticket (password peut être un ticket à renouveler)"""
+        config = self.config
+        url = f"https://{config['ip']}:{config.get('port', 8006)}/api2/json/access/ticket"
+        response = requests.post(url, data={"username": user, "password": password},
+                                 verify=config.get('verify_ssl', False), timeout=10)
+        response.raise_for_status()
+        data = response.json()["data"]
+        return data["ticket"], data["CSRFPreventionToken"]
+
+    def forget_ticket(self):
+        """Supprime le ticket mémorisé (par exemple s'il a été refusé)"""
+        if self.config:
+            self.store.delete(self.config['ip'], self.config['user'])
+
+    # === RENOUVELLEMENT EN ARRIÈRE-PLAN ===
+    def start_renewal(self):
+        """Démarre le renouvellement périodique du ticket"""
+        self.stop_renewal()
+        if self.ticket_auth is None:
+            return
+        self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.CHECK_INTERVAL, self._renew_if_needed)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _renew_if_needed(self):
+        with self._lock:
+            if self.ticket_auth is None:
+                return
+            if time.time() - self.ticket_auth.created >= self.RENEW_AGE:
+                try:
+                    ticket, csrf_token = self._request_ticket(self.config['user'], self.ticket_auth.ticket)
+                    self.ticket_auth.update(ticket, csrf_token, time.time())
+                    self.store.save(self.config['ip'], self.config['user'], self.config.get('password'),
+                                    ticket, csrf_token, self.ticket_auth.created)
+                    log_info("Ticket Proxmox renouvelé", "Proxmox")
+                except Exception as e:
+                    log_error(f"Échec renouvellement du ticket Proxmox: {e}", "Proxmox")
+        self._schedule()
+
+    def stop_renewal(self):
+        """Arrête le renouvellement périodique"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def reset(self):
+        """Oublie l'authentification courante (le ticket reste dans le trousseau)"""
+        with self._lock:
+            self.stop_renewal()
+            self.ticket_auth = None
+            self.config = None
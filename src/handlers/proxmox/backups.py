@@ -0,0 +1,187 @@
+"""
+Sauvegardes vzdump en masse avec fenêtre horaire
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ...core.logger import log_debug, log_error, log_info, log_success, log_warning
+from .concurrency import LimitedScheduler
+from .migration import parse_size
+from .snapshots import vm_storages
+
+# INFO:  45% (4.5 GiB of 10.0 GiB) in 20s, read: 230.4 MiB/s, write: 200.0 MiB/s
+PROGRESS_PATTERN = re.compile(
+    r"(\d+)% \(([\d.]+)\s*([KMGT]?i?B) of ([\d.]+)\s*([KMGT]?i?B)\) in [^,]+, read: ([\d.]+)\s*([KMGT]?i?B)/s",
+    re.IGNORECASE)
+# INFO: transferred 10.0 GiB in 40 seconds (256.0 MiB/s)
+TRANSFERRED_PATTERN = re.compile(r"transferred ([\d.]+)\s*([KMGT]?i?B) in (\d+) seconds", re.IGNORECASE)
+# INFO: Total bytes written: 1234567 (1.2GiB, 50MiB/s) (conteneurs)
+WRITTEN_PATTERN = re.compile(r"Total bytes written: (\d+)")
+ARCHIVE_PATTERN = re.compile(r"(?:creating (?:vzdump )?archive|creating Proxmox Backup Server archive) '([^']+)'")
+
+
+def parse_backup_line(line):
+    """Extrait la progression d'une ligne du journal vzdump
+
+    Retourne un dict partiel (percent, transferred, total, rate ou archive)
+    ou None si la ligne n'apporte rien.
+    """
+    match = PROGRESS_PATTERN.search(line)
+    if match:
+        return {
+            "percent": int(match.group(1)),
+            "transferred": parse_size(match.group(2), match.group(3)),
+            "total": parse_size(match.group(4), match.group(5)),
+            "rate": parse_size(match.group(6), match.group(7))
+        }
+    match = TRANSFERRED_PATTERN.search(line)
+    if match:
+        transferred = parse_size(match.group(1), match.group(2))
+        return {"percent": 100, "transferred": transferred, "total": transferred}
+    match = WRITTEN_PATTERN.search(line)
+    if match:
+        return {"percent": 100, "transferred": float(match.group(1)), "total": float(match.group(1))}
+    match = ARCHIVE_PATTERN.search(line)
+    if match:
+        return {"archive": match.group(1)}
+    return None
+
+
+class BackupOrchestrator:
+    """Sauvegarde un ensemble de VMs (un vzdump par VM) avec des limites par nœud et par stockage
+
+    Les sauvegardes sont limitées par nœud de la VM (per_node) et par
+    stockage (per_storage), qu'il s'agisse du stockage de destination ou
+    de ceux portant les disques lus. Le journal de chaque tâche est suivi
+    par le TaskLogTailer du handler pour mesurer le débit. Passé deadline
+    (timestamp), aucune nouvelle sauvegarde n'est lancée : les VMs
+    restantes sont reportées et listées dans le résumé, celles en cours se
+    terminent.
+    """
+
+    TAIL_GRACE = 30  # Attente maximale des dernières lignes du journal (secondes)
+
+    def __init__(self, handler, max_parallel=16, per_node=2, per_storage=2):
+        self.handler = handler
+        self.max_parallel = max_parallel
+        self.per_node = per_node
+        self.per_storage = per_storage
+
+    def _storages(self, vm):
+        try:
+            return vm_storages(self.handler._get_vm_config(vm["node"], vm["vmid"],
+                                                           self.handler.inventory.find_vm(vm["vmid"])))
+        except Exception as e:
+            log_debug(f"Configuration de la VM {vm['vmid']} indisponible: {e}", "Proxmox")
+            return frozenset()
+
+    def run(self, vms, storage, mode="snapshot", compress="zstd", notes=None, deadline=None,
+            callback=None, timeout=14400):
+        """Sauvegarde chaque VM de vms (dicts vmid, node et si possible name) vers storage
+
+        deadline : timestamp (time.time()) après lequel les VMs non lancées
+        sont reportées. callback(événement) reçoit les états started,
+        progress, done, failed et deferred. Retourne le résumé : total,
+        succeeded, failed, deferred, transferred (octets), results, duration.
+        """
+        started = time.monotonic()
+        summary = {"total": len(vms), "succeeded": 0, "failed": 0, "deferred": 0, "transferred": 0,
+                   "results": []}
+        log_info(f"Sauvegarde de {len(vms)} VM(s) vers {storage} (mode {mode})", "Proxmox")
+
+        def notify(event):
+            if callback:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_error(f"Erreur callback sauvegarde: {e}", "Proxmox")
+
+        def worker(job):
+            return self._backup(job, storage, mode, compress, notes, notify, timeout)
+
+        # Stockages des disques lus en parallèle avant le lancement (config en cache)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            jobs = [{"vm": vm, "storages": storages | {storage}}
+                    for vm, storages in zip(vms, executor.map(self._storages, vms))]
+        scheduler = LimitedScheduler(self.max_parallel, {"node": self.per_node, "storage": self.per_storage})
+        keys = lambda job: {"node": job["vm"]["node"], "storage": job["storages"]}
+        should_start = (lambda job: time.time() < deadline) if deadline else None
+
+        for job, result, error in scheduler.run(jobs, worker, keys=keys, should_start=should_start):
+            vm = job["vm"]
+            if result is None and error is None:
+                event = self._event(vm, storage, "deferred", message="fenêtre de sauvegarde dépassée")
+                summary["deferred"] += 1
+            elif error is not None:
+                event = self._event(vm, storage, "failed", message=str(error))
+                summary["failed"] += 1
+            else:
+                event = self._event(vm, storage, "done" if result["success"] else "failed", **result["progress"],
+                                    duration=result["duration"], message=result["message"])
+                if result["success"]:
+                    summary["succeeded"] += 1
+                    summary["transferred"] += event["transferred"]
+                else:
+                    summary["failed"] += 1
+            summary["results"].append(event)
+            notify(event)
+
+        summary["duration"] = time.monotonic() - started
+        if summary["deferred"]:
+            log_warning(f"Sauvegardes : {summary['deferred']} VM(s) reportée(s) (fenêtre dépassée)", "Proxmox")
+        if summary["failed"]:
+            log_error(f"Sauvegardes : {summary['failed']} échec(s) sur {summary['total']}", "Proxmox")
+        log_success(f"Sauvegardes terminées en {summary['duration']:.0f}s - "
+                    f"{summary['succeeded']}/{summary['total']} VM(s), "
+                    f"{summary['transferred'] / 1024 ** 3:.1f} GiB", "Proxmox")
+        return summary
+
+    def _backup(self, job, storage, mode, compress, notes, notify, timeout):
+        """Lance le vzdump d'une VM, confie son journal au TaskLogTailer et attend la fin de la tâche"""
+        vm = job["vm"]
+        begin = time.monotonic()
+        success, upid = self.handler.backup_vm(vm["node"], vm["vmid"], storage, mode=mode,
+                                               compress=compress, notes=notes)
+        progress = {"percent": 0, "transferred": 0.0, "total": 0.0, "rate": 0.0, "archive": ""}
+        if not success:
+            return {"success": False, "message": upid, "duration": time.monotonic() - begin, "progress": progress}
+        notify(self._event(vm, storage, "started"))
+        finished = threading.Event()
+
+        def on_line(upid, line):
+            parsed = parse_backup_line(line)
+            if parsed and not finished.is_set():
+                progress.update(parsed)
+                notify(self._event(vm, storage, "progress", **progress, duration=time.monotonic() - begin))
+
+        tailed = self.handler.task_tailer.follow(upid, vm.get("name", f"VM-{vm['vmid']}"), callback=on_line)
+        result = self.handler.task_waiter.wait(upid, timeout=timeout)
+        # Les dernières lignes (volume transféré) peuvent être lues juste après la fin de la tâche
+        if result["status"] == "stopped":
+            tailed.wait(self.TAIL_GRACE)
+        finished.set()
+
+        duration = time.monotonic() - begin
+        # Débit moyen de la VM sur toute la sauvegarde
+        progress["rate"] = progress["transferred"] / duration if duration > 0 else 0.0
+        return {"success": result["success"], "message": result["exitstatus"], "duration": duration,
+                "progress": dict(progress)}
+
+    def _event(self, vm, storage, state, percent=0, transferred=0.0, total=0.0, rate=0.0, archive="",
+               duration=None, message=""):
+        return {
+            "vmid": vm.get("vmid"),
+            "name": vm.get("name", f"VM-{vm.get('vmid')}"),
+            "node": vm.get("node"),
+            "storage": storage,
+            "state": state,  # started, progress, done, failed, deferred
+            "percent": percent,
+            "transferred": transferred,
+            "total": total,
+            "rate": rate,
+            "archive": archive,
+            "duration": duration,
+            "message": message
+        }
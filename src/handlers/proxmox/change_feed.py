@@ -0,0 +1,295 @@
+"""
+Flux incrémental des changements du cluster (/cluster/tasks et /cluster/log)
+"""
+import re
+import time
+
+from ...core.logger import log_debug, log_error, log_info
+
+
+class ChangeFeed:
+    """Détecte les changements du cluster et met à jour l'inventaire en conséquence
+
+    Chaque poll() lit /cluster/tasks et /cluster/log, ne retient que les
+    entrées postérieures au dernier curseur (horodatage + identifiants vus à
+    cet horodatage), les rattache à une VM ou à un nœud, puis met à jour
+    uniquement les entrées concernées de l'inventaire. Le coût d'un poll
+    dépend du nombre de changements, pas de la taille du cluster.
+
+    Les tâches de configuration (qmconfig, redimensionnement, snapshot...)
+    marquent la configuration en cache de la VM à revalider.
+
+    Les tâches qui créent, clonent, restaurent ou migrent des VMs, ainsi
+    qu'un trou dans le flux (plus d'entrées nouvelles que LOG_WINDOW),
+    déclenchent un rechargement complet de l'inventaire.
+
+    Les changements d'état sans tâche (arrêt depuis l'invité, plantage,
+    reprise HA) et les métriques n'apparaissent dans aucune de ces sources :
+    toutes les STATE_INTERVAL secondes, /cluster/resources est relu (une
+    requête) et comparé à l'instantané précédent.
+    """
+
+    LOG_WINDOW = 200
+    RESYNC_INTERVAL = 600  # Rechargement complet de sécurité (secondes)
+    STATE_INTERVAL = 20  # Relecture de /cluster/resources (inférieur à ClusterInventory.SNAPSHOT_TTL)
+
+    # Préfixe du type de tâche -> type de ressource
+    VM_TASK_PREFIXES = {"qm": "qemu", "vz": "lxc"}
+    # Tâches qui suppriment la VM de l'instantané
+    REMOVAL_TASKS = {"qmdestroy", "vzdestroy"}
+    # Tâches qui créent une VM ou la déplacent : vmid ou nœud cible inconnus
+    STRUCTURAL_TASKS = {
+        "qmcreate", "qmclone", "qmrestore", "qmigrate", "qmtemplate",
+        "vzcreate", "vzclone", "vzrestore", "vzmigrate", "vztemplate",
+        "startall", "stopall", "migrateall", "hamigrate", "hastart", "hastop"
+    }
+    # Tâches qui modifient la configuration : le digest en cache est à revalider
+    CONFIG_TASKS = {
+        "qmconfig", "qmmove", "qmresize", "resize", "qmsnapshot", "qmdelsnapshot", "qmrollback",
+        "vzconfig", "move_volume", "vzresize", "vzsnapshot", "vzdelsnapshot", "vzrollback"
+    }
+    VM_MESSAGE = re.compile(r"\b(?:VM|CT) (\d+)\b")
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._task_cursor = None
+        self._log_cursor = None
+        self._last_resync = 0
+
+    # === CYCLE DE VIE ===
+    def start(self):
+        """Positionne les curseurs sur l'état actuel : seuls les changements suivants seront signalés"""
+        self._task_cursor = self._advance(self._fetch_tasks(), self._task_key, self._task_time, None)[1]
+        self._log_cursor = self._advance(self._fetch_log(), self._log_key, self._log_time, None)[1]
+        self._last_resync = time.monotonic()
+        self.handler.inventory.follow_changes = True
+        self.handler.config_cache.tracked = True
+        log_info("Suivi des changements du cluster activé", "Inventory")
+
+    def stop(self):
+        """Arrête le suivi : l'inventaire redevient rechargé à la demande"""
+        self.handler.inventory.follow_changes = False
+        self.handler.config_cache.tracked = False
+        self._task_cursor = None
+        self._log_cursor = None
+
+    @property
+    def active(self):
+        return self._task_cursor is not None
+
+    # === LECTURE DES SOURCES ===
+    def _fetch_tasks(self):
+        return self.handler.proxmox.cluster.tasks.get() or []
+
+    def _fetch_log(self):
+        return self.handler.proxmox.cluster.log.get(max=self.LOG_WINDOW) or []
+
+    @staticmethod
+    def _task_key(task):
+        # Une tâche produit deux événements : lancement puis fin
+        return task.get("upid"), "endtime" in task
+
+    @staticmethod
+    def _task_time(task):
+        return int(task.get("endtime") or task.get("starttime") or 0)
+
+    @staticmethod
+    def _log_key(entry):
+        return entry.get("node"), entry.get("uid")
+
+    @staticmethod
+    def _log_time(entry):
+        return int(entry.get("time") or 0)
+
+    @staticmethod
+    def _advance(entries, key_fn, time_fn, cursor):
+        """Sépare les entrées postérieures au curseur et calcule le nouveau curseur
+
+        Un curseur est (horodatage, identifiants déjà vus à cet horodatage) ;
+        l'ensemble évite de perdre ou de dupliquer les entrées de la même seconde.
+        """
+        last_time, seen = cursor if cursor else (0, frozenset())
+        fresh = []
+        for entry in entries:
+            entry_time = time_fn(entry)
+            if entry_time > last_time or (entry_time == last_time and key_fn(entry) not in seen):
+                fresh.append(entry)
+
+        if not entries:
+            return fresh, cursor or (0, frozenset())
+
+        newest = max(time_fn(entry) for entry in entries)
+        at_newest = {key_fn(entry) for entry in entries if time_fn(entry) == newest}
+        if newest == last_time:
+            at_newest |= seen
+        return fresh, (newest, frozenset(at_newest))
+
+    # === POLLING ===
+    def poll(self):
+        """Applique les changements survenus depuis le dernier appel
+
+        Retourne la liste des événements, chacun avec : kind ('vm', 'node'
+        ou 'resync'), vmid, node, vm_type, removed, source ('task', 'log' ou
+        'state'), time, message et, pour les tâches et le journal, config (tâche
+        de configuration). L'entrée d'inventaire à jour est dans 'resource'.
+        """
+        if not self.active:
+            self.start()
+            return []
+
+        tasks = self._fetch_tasks()
+        log_entries = self._fetch_log()
+        new_tasks, self._task_cursor = self._advance(tasks, self._task_key, self._task_time, self._task_cursor)
+        new_log, self._log_cursor = self._advance(log_entries, self._log_key, self._log_time, self._log_cursor)
+
+        events = [self._task_event(task) for task in new_tasks]
+        events += [self._log_event(entry) for entry in new_log if "UPID:" not in entry.get("msg", "")]
+        events = [event for event in events if event is not None]
+
+        gap = len(new_log) >= self.LOG_WINDOW
+        resync_due = time.monotonic() - self._last_resync >= self.RESYNC_INTERVAL
+        if gap or resync_due or any(event["kind"] == "resync" for event in events):
+            return self._resync(events)
+
+        changes = []
+        if time.time() - self.handler.inventory.timestamp >= self.STATE_INTERVAL:
+            changes = self._state_changes()
+        events = self._apply(events)
+        # Les VMs et nœuds déjà mis à jour par une tâche ne sont signalés qu'une fois
+        handled = {(event["kind"], event["vmid"] if event["kind"] == "vm" else event["node"]) for event in events}
+        return events + [change for change in changes
+                         if (change["kind"], change["vmid"] if change["kind"] == "vm" else change["node"])
+                         not in handled]
+
+    def _task_event(self, task):
+        task_type = task.get("type", "")
+        target = task.get("id", "")
+        event = {
+            "kind": "node",
+            "vmid": None,
+            "node": task.get("node"),
+            "vm_type": None,
+            "removed": False,
+            "source": "task",
+            "time": self._task_time(task),
+            "message": f"{task_type} {target} {task.get('status', 'en cours')}".strip(),
+            "config": task_type in self.CONFIG_TASKS
+        }
+
+        if task_type in self.STRUCTURAL_TASKS:
+            event["kind"] = "resync"
+            return event
+
+        if target.isdigit():
+            event["kind"] = "vm"
+            event["vmid"] = target
+            event["vm_type"] = self.VM_TASK_PREFIXES.get(task_type[:2], "qemu")
+            # La VM n'existe plus qu'une fois la suppression terminée avec succès
+            event["removed"] = task_type in self.REMOVAL_TASKS and task.get("status") == "OK"
+        return event
+
+    def _log_event(self, entry):
+        match = self.VM_MESSAGE.search(entry.get("msg", ""))
+        event = {
+            "kind": "node",
+            "vmid": None,
+            "node": entry.get("node"),
+            "vm_type": None,
+            "removed": False,
+            "source": "log",
+            "time": self._log_time(entry),
+            "message": entry.get("msg", ""),
+            "config": False
+        }
+        if match:
+            event["kind"] = "vm"
+            event["vmid"] = match.group(1)
+            event["vm_type"] = "lxc" if match.group(0).startswith("CT") else "qemu"
+        return event
+
+    def _apply(self, events):
+        """Met à jour l'inventaire pour chaque VM et nœud touché (une fois chacun)"""
+        inventory = self.handler.inventory
+        updated = {}
+
+        for event in events:
+            if event["kind"] == "vm" and event["config"]:
+                self.handler.config_cache.mark_stale(event["vmid"])
+            if event["kind"] == "vm":
+                key = ("vm", event["vmid"])
+                if key not in updated:
+                    self.handler.cache.invalidate_prefix("vm", str(event["vmid"]))
+                    known = inventory.find_vm(event["vmid"])
+                    if event["removed"]:
+                        inventory.remove_vm(event["vmid"])
+                        updated[key] = None
+                    elif event["source"] == "log":
+                        # Le nœud d'une entrée du journal est celui qui a reçu la requête,
+                        # pas forcément celui de la VM : l'inventaire fait foi
+                        updated[key] = (inventory.update_vm(event["vmid"], known["node"], known["type"])
+                                        if known else None)
+                    else:
+                        updated[key] = inventory.update_vm(event["vmid"], event["node"], event["vm_type"])
+            elif event["node"]:
+                key = ("node", event["node"])
+                if key not in updated:
+                    updated[key] = inventory.update_node(event["node"])
+            event["resource"] = updated.get(("vm", event["vmid"]) if event["kind"] == "vm" else ("node", event["node"]))
+
+        if events:
+            log_debug(f"{len(events)} changement(s) appliqué(s) à l'inventaire "
+                      f"({len(updated)} entrée(s) mise(s) à jour)", "Inventory")
+        return events
+
+    def _state_changes(self):
+        """Relit /cluster/resources et signale les VMs et nœuds dont l'état a changé sans tâche"""
+        inventory = self.handler.inventory
+        before_vms = {str(res["vmid"]): (res.get("status"), res.get("node"))
+                      for res in inventory.vms() + inventory.containers()}
+        before_nodes = {res["node"]: res.get("status") for res in inventory.nodes()}
+        try:
+            inventory.refresh(force=True)
+        except Exception as e:
+            log_debug(f"Relecture de /cluster/resources impossible: {e}", "Inventory")
+            return []
+
+        now = int(time.time())
+
+        def change(kind, vmid, node, vm_type, removed, message, resource):
+            return {"kind": kind, "vmid": vmid, "node": node, "vm_type": vm_type, "removed": removed,
+                    "source": "state", "time": now, "message": message, "resource": resource}
+
+        changes = []
+        after_vms = set()
+        for res in inventory.vms() + inventory.containers():
+            vmid = str(res["vmid"])
+            after_vms.add(vmid)
+            previous = before_vms.get(vmid)
+            if previous != (res.get("status"), res.get("node")):
+                message = (f"{previous[0]} -> {res.get('status')}" if previous
+                           else f"apparue ({res.get('status')})")
+                changes.append(change("vm", vmid, res.get("node"), res.get("type"), False, message, res))
+        for vmid in before_vms.keys() - after_vms:
+            changes.append(change("vm", vmid, before_vms[vmid][1], None, True, "disparue", None))
+        for res in inventory.nodes():
+            if before_nodes.get(res["node"]) != res.get("status"):
+                changes.append(change("node", None, res["node"], None, False,
+                                      f"{before_nodes.get(res['node'])} -> {res.get('status')}", res))
+
+        if changes:
+            log_debug(f"{len(changes)} changement(s) d'état sans tâche détecté(s)", "Inventory")
+        return changes
+
+    def _resync(self, events):
+        """Recharge tout l'inventaire (création, migration ou trou dans le flux)"""
+        try:
+            self.handler.cache.invalidate_prefix("vm")
+            self.handler.inventory.refresh(force=True)
+            self._last_resync = time.monotonic()
+        except Exception as e:
+            log_error(f"Rechargement de l'inventaire impossible: {e}", "Inventory")
+        return [{
+            "kind": "resync", "vmid": None, "node": None, "vm_type": None, "removed": False,
+            "source": "task", "time": int(time.time()),
+            "message": f"{len(events)} changement(s), inventaire rechargé", "resource": None
+        }]
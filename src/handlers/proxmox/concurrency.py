@@ -0,0 +1,110 @@
+"""
+Outils de concurrence pour les appels Proxmox
+"""
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+
+class KeyedLimiter:
+    """Limite le nombre d'opérations simultanées par clé (nœud, stockage...)"""
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, key):
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.limit)
+                self._semaphores[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, key):
+        """Réserve une place pour la clé le temps du bloc with"""
+        semaphore = self._semaphore(key)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+class LimitedScheduler:
+    """Exécute des jobs en parallèle avec une limite globale et des limites par clé
+
+    Chaque job est associé à un dictionnaire de clés, par exemple
+    {"node": "pve1", "storage": "ceph"} ; limits indique pour chaque
+    dimension le nombre maximum de jobs simultanés partageant la même valeur.
+    Un job n'est lancé que lorsqu'une place est libre dans toutes ses
+    dimensions : aucun thread n'est bloqué en attente d'une place. Une
+    valeur peut être un tuple ou un ensemble (une VM dont les disques sont
+    sur plusieurs stockages) : le job occupe alors une place pour chacune.
+    """
+
+    def __init__(self, max_workers, limits=None):
+        self.max_workers = max(1, int(max_workers))
+        self.limits = {dimension: max(1, int(limit)) for dimension, limit in (limits or {}).items()}
+
+    @staticmethod
+    def _items(keys):
+        for dimension, value in keys.items():
+            if isinstance(value, (tuple, list, set, frozenset)):
+                for item in value:
+                    yield dimension, item
+            else:
+                yield dimension, value
+
+    def _fits(self, keys, in_flight):
+        for dimension, value in self._items(keys):
+            limit = self.limits.get(dimension)
+            if limit is not None and in_flight.get((dimension, value), 0) >= limit:
+                return False
+        return True
+
+    def run(self, jobs, worker, keys=None, should_start=None):
+        """Génère (job, résultat, erreur) au fur et à mesure que les jobs se terminent
+
+        keys(job) retourne les clés du job ; should_start(job), s'il est
+        fourni, peut refuser le lancement d'un job (il est alors produit avec
+        le résultat None et l'erreur None, sans avoir été exécuté).
+        """
+        pending = deque(jobs)
+        in_flight = {}
+        running = {}
+        keys = keys or (lambda job: {})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Lancer tous les jobs éligibles, dans l'ordre de la file
+                skipped = deque()
+                while pending and len(running) < self.max_workers:
+                    job = pending.popleft()
+                    if should_start is not None and not should_start(job):
+                        yield job, None, None
+                        continue
+                    job_keys = keys(job)
+                    if not self._fits(job_keys, in_flight):
+                        skipped.append(job)
+                        continue
+                    for item in self._items(job_keys):
+                        in_flight[item] = in_flight.get(item, 0) + 1
+                    running[executor.submit(worker, job)] = (job, job_keys)
+                pending.extendleft(reversed(skipped))
+
+                if not running:
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, job_keys = running.pop(future)
+                    for item in self._items(job_keys):
+                        in_flight[item] -= 1
+                    try:
+                        yield job, future.result(), None
+                    except Exception as e:
+                        yield job, None, e
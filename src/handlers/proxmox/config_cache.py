@@ -0,0 +1,163 @@
+"""
+Cache persistant des configurations de VM
+"""
+import json
+import os
+import threading
+import time
+
+from ...core.logger import log_debug, log_error
+from ...core.paths import get_user_data_dir, safe_filename
+
+
+def agent_enabled(vm_config):
+    """True si l'option agent de la configuration est active ('1', '1,fstrim...' ou 'enabled=1,...')
+
+    L'API renvoie la propriété sous forme de chaîne : une comparaison à 1
+    est toujours fausse.
+    """
+    parts = str((vm_config or {}).get("agent", "0")).split(",")
+    return parts[0] == "1" or "enabled=1" in parts
+
+
+class VmConfigCache:
+    """Configurations de VM mémorisées par vmid et digest, persistées sur disque
+
+    Proxmox n'expose pas le digest d'une configuration sans la télécharger.
+    Une entrée reste donc valide jusqu'à ce qu'un signal indique un
+    changement possible :
+    - l'empreinte tirée de l'entrée /cluster/resources de la VM (obtenue en
+      masse pour tout le cluster) diffère : nom, nœud, CPU/RAM/disque max...
+    - le flux de changements signale une tâche de configuration sur la VM
+      (qmconfig, redimensionnement, snapshot...) : l'entrée est marquée à
+      revalider (mark_stale) sans être oubliée
+    - sans flux de changements actif (tracked), l'entrée a plus de
+      revalidate_after secondes.
+    La configuration retéléchargée est comparée au digest mémorisé : put()
+    indique si elle a réellement changé. La toolbox invalide explicitement
+    les VMs qu'elle modifie.
+    """
+
+    FINGERPRINT_FIELDS = ("node", "name", "maxcpu", "maxmem", "maxdisk", "template", "tags", "lock")
+
+    def __init__(self, revalidate_after=900):
+        self.revalidate_after = revalidate_after
+        self.path = None
+        self._entries = {}  # vmid -> {"digest", "fingerprint", "checked", "config", "stale"}
+        # Activé par le flux de changements : les modifications sont alors signalées
+        # et l'âge d'une entrée ne suffit plus à la faire retélécharger
+        self.tracked = False
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def bind(self, cluster_key):
+        """Associe le cache au cluster courant et charge le fichier correspondant"""
+        filename = f"vm_configs_{safe_filename(cluster_key)}.json"
+        self.path = os.path.join(get_user_data_dir(), filename)
+        self.load()
+
+    def load(self):
+        """Charge le cache depuis le disque"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            if not self.path or not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+                log_debug(f"{len(self._entries)} configuration(s) VM chargée(s) depuis le cache", "Proxmox")
+            except Exception as e:
+                log_error(f"Cache des configurations VM illisible: {e}", "Proxmox")
+
+    def flush(self):
+        """Écrit le cache sur disque s'il a été modifié"""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            data = json.dumps(self._entries, ensure_ascii=False)
+            self._dirty = False
+
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log_error(f"Impossible d'écrire le cache des configurations VM: {e}", "Proxmox")
+
+    def fingerprint(self, resource):
+        """Empreinte d'une entrée /cluster/resources"""
+        if not resource:
+            return None
+        return [resource.get(field) for field in self.FINGERPRINT_FIELDS]
+
+    def get(self, vmid, resource=None):
+        """Retourne la configuration en cache si elle est toujours valide, sinon None"""
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+        if entry is None:
+            return None
+
+        if entry.get("stale"):
+            return None
+        if resource is not None and entry.get("fingerprint") != self.fingerprint(resource):
+            return None
+        if not self.tracked and time.time() - entry.get("checked", 0) > self.revalidate_after:
+            return None
+        return entry["config"]
+
+    def peek(self, vmid):
+        """Configuration en cache, même à revalider, ou None"""
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+        return entry["config"] if entry else None
+
+    def digest(self, vmid):
+        """Digest de la configuration en cache (None si absente)"""
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+        return entry.get("digest") if entry else None
+
+    def put(self, vmid, config, resource=None):
+        """Mémorise une configuration fraîchement téléchargée
+
+        Retourne True si son digest diffère de celui en cache (ou si la VM
+        n'était pas en cache), False si la configuration est inchangée.
+        """
+        entry = {
+            "digest": config.get("digest"),
+            "fingerprint": self.fingerprint(resource),
+            "checked": time.time(),
+            "config": config
+        }
+        with self._lock:
+            previous = self._entries.get(str(vmid))
+            self._entries[str(vmid)] = entry
+            self._dirty = True
+
+        if previous and entry["digest"] and previous.get("digest") == entry["digest"]:
+            log_debug(f"Configuration VM {vmid} inchangée (digest {entry['digest']})", "Proxmox")
+            return False
+        return True
+
+    def mark_stale(self, vmid):
+        """Marque la configuration d'une VM à revalider (digest conservé pour comparaison)"""
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+            if entry is not None and not entry.get("stale"):
+                entry["stale"] = True
+                self._dirty = True
+
+    def invalidate(self, vmid):
+        """Supprime la configuration d'une VM"""
+        with self._lock:
+            if self._entries.pop(str(vmid), None) is not None:
+                self._dirty = True
+
+    def clear(self):
+        """Oublie le cluster courant (le fichier reste sur disque)"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            self.path = None
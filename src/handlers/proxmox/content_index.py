@@ -0,0 +1,235 @@
+"""
+Index persistant du contenu des stockages (ISOs, templates, sauvegardes)
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ...core.logger import log_debug, log_error, log_success
+from ...core.paths import get_user_data_dir, safe_filename
+
+
+class StorageContentIndex:
+    """Contenu des stockages du cluster indexé dans une base SQLite par cluster
+
+    Chaque stockage est listé une seule fois (un stockage partagé depuis un
+    seul nœud), tous les stockages en parallèle. Un nouveau passage compare
+    les volids listés à ceux de la base : seuls les volumes apparus,
+    disparus ou modifiés sont écrits. Un stockage injoignable garde ses
+    entrées précédentes. Les recherches (vmid, motif de nom, période)
+    s'appuient sur des index SQLite et ne touchent pas au cluster.
+    """
+
+    CONTENT_TYPES = ("iso", "vztmpl", "backup")
+    COLUMNS = ("location", "volid", "storage", "node", "content", "format", "size", "ctime",
+               "vmid", "name", "notes", "protected")
+
+    def __init__(self, handler, max_workers=16):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.path = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    # === OUVERTURE ===
+    def bind(self, cluster_key):
+        """Ouvre (ou crée) l'index du cluster courant"""
+        self.close()
+        self.path = os.path.join(get_user_data_dir(), f"content_{safe_filename(cluster_key)}.sqlite3")
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS volumes (
+                    location TEXT NOT NULL,
+                    volid TEXT NOT NULL,
+                    storage TEXT NOT NULL,
+                    node TEXT,
+                    content TEXT,
+                    format TEXT,
+                    size INTEGER,
+                    ctime INTEGER,
+                    vmid INTEGER,
+                    name TEXT,
+                    notes TEXT,
+                    protected INTEGER,
+                    PRIMARY KEY (location, volid)
+                ) WITHOUT ROWID""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS volumes_vmid ON volumes (vmid, ctime)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS volumes_ctime ON volumes (ctime)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS volumes_content ON volumes (content, ctime)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS locations (location TEXT PRIMARY KEY, scanned INTEGER)")
+            self._conn.commit()
+        log_debug(f"Index du contenu des stockages ouvert: {self.path}", "Proxmox")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def is_open(self):
+        return self._conn is not None
+
+    # === INDEXATION ===
+    def _targets(self):
+        """Stockages à lister et locations configurées
+
+        Retourne (targets, configured) : targets liste les (location, stockage,
+        nœud, types de contenu) disponibles, un stockage partagé une seule fois
+        ; configured contient toutes les locations présentes dans
+        /cluster/resources, y compris celles d'un stockage indisponible
+        (nœud hors ligne), dont l'index garde les entrées.
+        """
+        self.handler.inventory.refresh()
+        targets = {}
+        configured = set()
+        for storage in self.handler.inventory.storages():
+            contents = [content for content in (storage.get("content") or "").split(",")
+                        if content in self.CONTENT_TYPES]
+            if not contents:
+                continue
+            name = storage["storage"]
+            location = name if storage.get("shared") else f"{storage['node']}/{name}"
+            configured.add(location)
+            if storage.get("status") == "available":
+                targets.setdefault(location, (location, name, storage["node"], contents))
+        return list(targets.values()), configured
+
+    @staticmethod
+    def _row(location, storage, node, volume):
+        volid = volume.get("volid", "")
+        return (
+            location, volid, storage, node,
+            volume.get("content"),
+            volume.get("format"),
+            volume.get("size"),
+            volume.get("ctime"),
+            volume.get("vmid"),
+            volid.split(":", 1)[-1].split("/")[-1],
+            volume.get("notes"),
+            1 if volume.get("protected") else 0
+        )
+
+    def refresh(self):
+        """Liste tous les stockages et applique les différences à l'index
+
+        Retourne {"added", "removed", "changed", "volumes", "failed" (locations),
+        "duration"}.
+        """
+        if self._conn is None:
+            raise RuntimeError("Index du contenu des stockages non ouvert")
+        started = time.monotonic()
+
+        def fetch(target):
+            location, storage, node, contents = target
+            api = self.handler.proxmox.nodes(node).storage(storage).content
+            volumes = []
+            for content in contents:
+                volumes.extend(api.get(content=content) or [])
+            return [self._row(location, storage, node, volume) for volume in volumes]
+
+        stats = {"added": 0, "removed": 0, "changed": 0, "volumes": 0, "failed": []}
+        targets, configured = self._targets()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(target, executor.submit(fetch, target)) for target in targets]
+            for target, future in futures:
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    log_debug(f"Contenu du stockage {target[0]} indisponible: {e}", "Proxmox")
+                    stats["failed"].append(target[0])
+                    continue
+                for key, count in self._apply(target[0], rows).items():
+                    stats[key] += count
+
+        # Stockages disparus de la configuration du cluster (un stockage indisponible reste configuré)
+        with self._lock:
+            for (location,) in self._conn.execute("SELECT location FROM locations").fetchall():
+                if location not in configured:
+                    stats["removed"] += self._conn.execute(
+                        "DELETE FROM volumes WHERE location = ?", (location,)).rowcount
+                    self._conn.execute("DELETE FROM locations WHERE location = ?", (location,))
+            self._conn.commit()
+
+        stats["duration"] = time.monotonic() - started
+        if stats["failed"]:
+            log_error(f"Contenu non listé pour {len(stats['failed'])} stockage(s): {', '.join(stats['failed'])}",
+                      "Proxmox")
+        log_success(f"Index des stockages à jour en {stats['duration']:.1f}s - {stats['volumes']} volume(s), "
+                    f"+{stats['added']} / -{stats['removed']} / ~{stats['changed']}", "Proxmox")
+        return stats
+
+    def _apply(self, location, rows):
+        """Compare les volids listés à ceux de l'index et n'écrit que les différences"""
+        listed = {row[1]: row for row in rows}
+        with self._lock:
+            known = {
+                volid: (size, ctime, notes, protected)
+                for volid, size, ctime, notes, protected in self._conn.execute(
+                    "SELECT volid, size, ctime, notes, protected FROM volumes WHERE location = ?", (location,))
+            }
+            removed = [(location, volid) for volid in known.keys() - listed.keys()]
+            added = [row for volid, row in listed.items() if volid not in known]
+            changed = [row for volid, row in listed.items()
+                       if volid in known and known[volid] != (row[6], row[7], row[10], row[11])]
+
+            placeholders = ", ".join("?" * len(self.COLUMNS))
+            self._conn.executemany("DELETE FROM volumes WHERE location = ? AND volid = ?", removed)
+            self._conn.executemany(f"INSERT OR REPLACE INTO volumes ({', '.join(self.COLUMNS)}) "
+                                   f"VALUES ({placeholders})", added + changed)
+            self._conn.execute("INSERT OR REPLACE INTO locations (location, scanned) VALUES (?, ?)",
+                               (location, int(time.time())))
+            self._conn.commit()
+        return {"added": len(added), "removed": len(removed), "changed": len(changed), "volumes": len(listed)}
+
+    # === RECHERCHE ===
+    def search(self, vmid=None, pattern=None, content=None, since=None, until=None, storage=None, limit=500):
+        """Volumes correspondant à tous les critères fournis, les plus récents d'abord
+
+        pattern accepte les jokers * et ? ; sans joker, il est cherché comme
+        sous-chaîne du nom (insensible à la casse). since et until sont des
+        timestamps (date de création du volume).
+        """
+        if self._conn is None:
+            return []
+        clauses, params = [], []
+        if vmid is not None:
+            clauses.append("vmid = ?")
+            params.append(int(vmid))
+        if pattern:
+            like = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            like = like.replace("*", "%").replace("?", "_")
+            if "*" not in pattern and "?" not in pattern:
+                like = f"%{like}%"
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(like)
+        if content:
+            clauses.append("content = ?")
+            params.append(content)
+        if since is not None:
+            clauses.append("ctime >= ?")
+            params.append(int(since))
+        if until is not None:
+            clauses.append("ctime <= ?")
+            params.append(int(until))
+        if storage:
+            clauses.append("storage = ?")
+            params.append(storage)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM volumes {where} ORDER BY ctime DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + [int(limit)]).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def last_scan(self):
+        """Date du dernier listage d'un stockage (0 si l'index est vide)"""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT MAX(scanned) FROM locations").fetchone()[0] or 0
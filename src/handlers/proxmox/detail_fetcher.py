@@ -0,0 +1,48 @@
+"""
+Récupération parallèle du statut détaillé des VMs
+"""
+from ...core.logger import log_debug, log_error
+from .concurrency import LimitedScheduler
+
+
+class VmDetailFetcher:
+    """Interroge get_vm_detailed_status en parallèle avec un plafond par nœud
+
+    Le plafond par nœud évite de saturer un seul pveproxy quand toutes les VMs
+    d'un gros nœud sont analysées en même temps. Le LimitedScheduler ne lance
+    une VM que si son nœud a une place libre : les workers restent occupés
+    par les autres nœuds au lieu d'attendre derrière le plus chargé.
+    """
+
+    def __init__(self, handler, max_workers=16, per_node=4):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.per_node = per_node
+
+    def _fetch_one(self, vm):
+        return self.handler.get_vm_detailed_status(vm['node'], vm['vmid'], resource=vm)
+
+    def iter_details(self, vms):
+        """Génère le statut détaillé de chaque VM dès qu'il est disponible"""
+        if not vms:
+            return
+
+        workers = min(self.max_workers, len(vms))
+        log_debug(f"Analyse parallèle de {len(vms)} VMs ({workers} workers)", "Proxmox")
+
+        scheduler = LimitedScheduler(workers, {"node": self.per_node})
+        for vm, vm_detail, error in scheduler.run(vms, self._fetch_one, keys=lambda vm: {"node": vm['node']}):
+            if error is not None:
+                log_error(f"Erreur statut VM {vm.get('vmid')}: {error}", "Proxmox")
+                continue
+            if vm_detail:
+                yield vm_detail
+
+    def fetch_all(self, vms, callback=None):
+        """Récupère tous les statuts, callback(vm_detail) appelé au fil de l'eau"""
+        results = []
+        for vm_detail in self.iter_details(vms):
+            results.append(vm_detail)
+            if callback:
+                callback(vm_detail)
+        return results
@@ -0,0 +1,227 @@
+"""
+Points d'accès multiples à l'API Proxmox avec bascule automatique
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+
+from ...core.logger import log_debug, log_info, log_success
+
+
+def never_sent(error):
+    """True si la requête n'a pas pu partir : connexion refusée, hôte injoignable, délai de connexion
+
+    requests range aussi sous ConnectionError les coupures survenues après
+    l'envoi (ProtocolError, RemoteDisconnected) : elles ne sont pas retenues.
+    """
+    if isinstance(error, ConnectTimeout):
+        return True
+    if not isinstance(error, RequestsConnectionError) or not error.args:
+        return False
+    reason = error.args[0]
+    reason = getattr(reason, "reason", reason)  # MaxRetryError enveloppe l'erreur d'origine
+    return isinstance(reason, NewConnectionError)
+
+
+class Endpoint:
+    """Point d'accès à l'API (un nœud du cluster) et son disjoncteur"""
+
+    def __init__(self, host, api):
+        self.host = host
+        self.api = api
+        self.latency = None  # Moyenne glissante en secondes
+        self.failures = 0
+        self.state = "closed"  # closed (sain), open (écarté), half-open (en test)
+        self.opened_at = 0
+
+    def __repr__(self):
+        return f"Endpoint({self.host}, {self.state}, {self.latency})"
+
+
+class EndpointPool:
+    """Ensemble des points d'accès du cluster, classés par latence
+
+    Après FAILURE_THRESHOLD erreurs réseau consécutives, le disjoncteur d'un
+    point d'accès s'ouvre : il est écarté pendant OPEN_DURATION secondes puis
+    retenté une fois (half-open) avant d'être réintégré.
+    """
+
+    FAILURE_THRESHOLD = 3
+    OPEN_DURATION = 30
+    LATENCY_SMOOTHING = 0.3
+
+    def __init__(self, auth):
+        self.auth = auth
+        self.endpoints = []
+        self._lock = threading.Lock()
+
+    def reset(self, host, api):
+        """Repart du seul point d'accès configuré"""
+        with self._lock:
+            self.endpoints = [Endpoint(host, api)]
+
+    def clear(self):
+        with self._lock:
+            self.endpoints = []
+
+    # === DÉCOUVERTE ET MESURE ===
+    def discover(self):
+        """Ajoute les adresses de tous les nœuds en ligne (GET /cluster/status)"""
+        primary = self.endpoints[0]
+        members = primary.api.cluster.status.get()
+        known = {endpoint.host for endpoint in self.endpoints}
+
+        added = []
+        for member in members:
+            if member.get("type") != "node" or not member.get("online") or not member.get("ip"):
+                continue
+            if member["ip"] in known:
+                continue
+            added.append(Endpoint(member["ip"], self.auth.create_api(member["ip"])))
+            known.add(member["ip"])
+
+        with self._lock:
+            self.endpoints.extend(added)
+        log_debug(f"{len(self.endpoints)} point(s) d'accès API connu(s)", "Proxmox")
+
+    def measure(self):
+        """Mesure en parallèle la latence API (GET /version) de chaque point d'accès"""
+        endpoints = list(self.endpoints)
+
+        def probe(endpoint):
+            started = time.monotonic()
+            try:
+                endpoint.api.version.get()
+                self.record_success(endpoint, time.monotonic() - started)
+            except Exception as e:
+                log_debug(f"Point d'accès {endpoint.host} injoignable: {e}", "Proxmox")
+                self.record_failure(endpoint)
+
+        with ThreadPoolExecutor(max_workers=min(16, len(endpoints) or 1)) as executor:
+            list(executor.map(probe, endpoints))
+
+        best = self.ordered()
+        if best:
+            log_success(f"Point d'accès API le plus rapide: {best[0].host} "
+                        f"({(best[0].latency or 0) * 1000:.0f} ms)", "Proxmox")
+
+    def discover_and_measure(self):
+        """Découverte puis mesure, à lancer en arrière-plan après la connexion"""
+        try:
+            self.discover()
+            self.measure()
+        except Exception as e:
+            log_debug(f"Découverte des points d'accès impossible: {e}", "Proxmox")
+
+    # === SÉLECTION ET DISJONCTEUR ===
+    def ordered(self):
+        """Points d'accès utilisables, du plus rapide au plus lent"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = []
+            retry = []
+            for endpoint in self.endpoints:
+                if endpoint.state == "open" and now - endpoint.opened_at >= self.OPEN_DURATION:
+                    endpoint.state = "half-open"
+                if endpoint.state == "closed":
+                    healthy.append(endpoint)
+                elif endpoint.state == "half-open":
+                    retry.append(endpoint)
+
+            healthy.sort(key=lambda ep: ep.latency if ep.latency is not None else float("inf"))
+            candidates = healthy + retry
+            if not candidates:
+                # Tout est écarté : tenter quand même, le plus anciennement écarté d'abord
+                candidates = sorted(self.endpoints, key=lambda ep: ep.opened_at)
+            return candidates
+
+    def record_success(self, endpoint, elapsed):
+        with self._lock:
+            if endpoint.state != "closed":
+                log_info(f"Point d'accès {endpoint.host} de nouveau disponible", "Proxmox")
+            endpoint.failures = 0
+            endpoint.state = "closed"
+            if endpoint.latency is None:
+                endpoint.latency = elapsed
+            else:
+                endpoint.latency += self.LATENCY_SMOOTHING * (elapsed - endpoint.latency)
+
+    def record_failure(self, endpoint):
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.state == "half-open" or endpoint.failures >= self.FAILURE_THRESHOLD:
+                if endpoint.state != "open":
+                    log_info(f"Point d'accès {endpoint.host} écarté pendant {self.OPEN_DURATION}s", "Proxmox")
+                endpoint.state = "open"
+                endpoint.opened_at = time.monotonic()
+
+
+class FailoverProxmoxAPI:
+    """Remplaçant de ProxmoxAPI qui envoie chaque appel au point d'accès le plus rapide
+
+    S'utilise exactement comme ProxmoxAPI (api.nodes(node).qemu(vmid).status.get()).
+    En cas d'erreur réseau, l'appel est rejoué sur le point d'accès suivant ;
+    les erreurs HTTP de l'API (VM inexistante, agent absent...) sont remontées
+    telles quelles. Une écriture n'est rejouée que si la connexion a échoué
+    avant l'envoi de la requête.
+    """
+
+    def __init__(self, pool, path=()):
+        self._pool = pool
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return FailoverProxmoxAPI(self._pool, self._path + (name,))
+
+    def __call__(self, *segments):
+        segments = tuple(str(segment) for segment in segments if segment not in (None, ""))
+        return FailoverProxmoxAPI(self._pool, self._path + segments)
+
+    def current_api(self):
+        """Instance ProxmoxAPI du point d'accès préféré"""
+        return self._pool.ordered()[0].api
+
+    def current_host(self):
+        """Adresse du point d'accès préféré"""
+        return self._pool.ordered()[0].host
+
+    def _request(self, method, args, params):
+        path = "/".join(self._path)
+        last_error = None
+
+        for endpoint in self._pool.ordered():
+            resource = endpoint.api(path) if path else endpoint.api
+            started = time.monotonic()
+            try:
+                result = getattr(resource, method)(*args, **params)
+            except (RequestsConnectionError, Timeout) as e:
+                # Une écriture peut avoir été exécutée si la requête est partie :
+                # elle n'est rejouée ailleurs que si la connexion n'a jamais abouti
+                if method != "get" and not never_sent(e):
+                    self._pool.record_failure(endpoint)
+                    raise
+                self._pool.record_failure(endpoint)
+                log_debug(f"Échec réseau vers {endpoint.host} ({path}), bascule: {e}", "Proxmox")
+                last_error = e
+                continue
+            self._pool.record_success(endpoint, time.monotonic() - started)
+            return result
+
+        raise last_error
+
+    def get(self, *args, **params):
+        return self._request("get", args, params)
+
+    def post(self, *args, **data):
+        return self._request("post", args, data)
+
+    def put(self, *args, **data):
+        return self._request("put", args, data)
+
+    def delete(self, *args, **params):
+        return self._request("delete", args, params)
@@ -0,0 +1,163 @@
+"""
+Cache des informations remontées par l'agent QEMU (OS, adresses IP, hostname)
+"""
+import threading
+import time
+
+from ...core.logger import log_debug
+
+LINUX_MARKERS = ("linux", "ubuntu", "debian", "centos", "rhel", "rocky", "alma", "fedora", "suse", "arch")
+
+
+class GuestFactsCache:
+    """Faits invités d'une VM, conservés tant qu'elle n'a pas redémarré
+
+    L'OS, le hostname et les adresses d'une VM ne changent en pratique qu'au
+    redémarrage : chaque entrée est associée à l'identité de démarrage de la
+    VM (pid du processus QEMU et date de démarrage déduite de l'uptime) et
+    n'est relue auprès de l'agent que si cette identité change ou que
+    l'entrée a dépassé max_age.
+    """
+
+    BOOT_TOLERANCE = 15  # Écart toléré sur la date de démarrage calculée (secondes)
+
+    def __init__(self, handler, max_age=600):
+        self.handler = handler
+        self.max_age = max_age
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # === IDENTITÉ DE DÉMARRAGE ===
+    def _boot_identity(self, node_name, vmid, resource=None):
+        """pid et date de démarrage de la VM, tirés de l'inventaire si possible"""
+        inventory = self.handler.inventory
+        resource = resource or inventory.find_vm(vmid)
+        if resource is not None and resource.get("uptime"):
+            return {"pid": resource.get("pid"), "boot_time": inventory.observed_at(vmid) - resource["uptime"]}
+
+        status = self.handler._get_vm_current_status(node_name, vmid)
+        return {"pid": status.get("pid"), "boot_time": time.time() - status.get("uptime", 0)}
+
+    def _same_boot(self, known, current):
+        if known.get("pid") and current.get("pid"):
+            return known["pid"] == current["pid"]
+        return abs(known["boot_time"] - current["boot_time"]) <= self.BOOT_TOLERANCE
+
+    # === ACCÈS ===
+    def get(self, node_name, vmid, resource=None, refresh=False):
+        """Faits invités d'une VM en cours d'exécution
+
+        Retourne un dictionnaire : os_name, os_id, os_pretty, hostname, ipv4,
+        ipv6 et interfaces (name, mac, ipv4, ipv6). Lève une exception si
+        l'agent ne répond pas.
+        """
+        vmid = str(vmid)
+        boot = self._boot_identity(node_name, vmid, resource)
+
+        with self._lock:
+            entry = self._entries.get(vmid)
+            if (not refresh and entry is not None and self._same_boot(entry["boot"], boot)
+                    and time.monotonic() - entry["fetched_at"] < self.max_age):
+                self.hits += 1
+                return entry["facts"]
+            self.misses += 1
+
+        facts = self._fetch(node_name, vmid)
+        with self._lock:
+            self._entries[vmid] = {"boot": boot, "fetched_at": time.monotonic(), "facts": facts}
+        # Les adresses remontées par l'agent deviennent recherchables
+        self.handler.search_index.refresh_vm(vmid)
+        return facts
+
+    def peek(self, vmid):
+        """Faits déjà en cache (même périmés) sans interroger l'agent, ou None"""
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+            return entry["facts"] if entry else None
+
+    def invalidate(self, vmid):
+        with self._lock:
+            self._entries.pop(str(vmid), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    # === LECTURE AUPRÈS DE L'AGENT ===
+    def _fetch(self, node_name, vmid):
+        agent = self.handler.proxmox.nodes(node_name).qemu(vmid).agent
+
+        # Les interfaces sont indispensables : sans elles, l'agent est considéré absent
+        interfaces = self.parse_interfaces(agent.get("network-get-interfaces"))
+
+        os_info = {}
+        try:
+            response = agent.get("os-info")
+            os_info = response.get("result", response) if isinstance(response, dict) else {}
+        except Exception as e:
+            log_debug(f"VM {vmid}: os-info indisponible ({e})", "QemuAgent")
+
+        hostname = ""
+        try:
+            response = agent.get("get-host-name")
+            result = response.get("result", response) if isinstance(response, dict) else {}
+            hostname = result.get("host-name", "")
+        except Exception as e:
+            log_debug(f"VM {vmid}: get-host-name indisponible ({e})", "QemuAgent")
+
+        return {
+            "os_name": os_info.get("name", ""),
+            "os_id": os_info.get("id", ""),
+            "os_pretty": os_info.get("pretty-name", ""),
+            "hostname": hostname,
+            "ipv4": [ip for iface in interfaces for ip in iface["ipv4"]],
+            # Les adresses lien-local restent visibles par interface seulement
+            "ipv6": [ip for iface in interfaces for ip in iface["ipv6"] if not ip.lower().startswith("fe80")],
+            "interfaces": interfaces
+        }
+
+    @staticmethod
+    def parse_interfaces(response):
+        """Convertit la réponse de network-get-interfaces (boucle locale exclue)"""
+        raw = response.get("result", []) if isinstance(response, dict) else response or []
+        interfaces = []
+        for iface in raw:
+            if iface.get("name") == "lo":
+                continue
+            ipv4, ipv6 = [], []
+            for addr in iface.get("ip-addresses", []):
+                ip = addr.get("ip-address")
+                if not ip:
+                    continue
+                if addr.get("ip-address-type") == "ipv6" or ":" in ip:
+                    if ip != "::1":
+                        ipv6.append(ip)
+                elif not ip.startswith("127."):
+                    ipv4.append(ip)
+            interfaces.append({
+                "name": iface.get("name", ""),
+                "mac": iface.get("hardware-address", ""),
+                "ipv4": ipv4,
+                "ipv6": ipv6
+            })
+        return interfaces
+
+    # === AIDES ===
+    @staticmethod
+    def os_type(facts):
+        """'linux', 'windows' ou 'unknown' d'après os-info"""
+        os_name = f"{facts.get('os_id', '')} {facts.get('os_name', '')}".lower()
+        if "windows" in os_name or "mswindows" in os_name:
+            return "windows"
+        if any(marker in os_name for marker in LINUX_MARKERS):
+            return "linux"
+        return "unknown"
+
+    @staticmethod
+    def first_ipv4(facts):
+        """Première adresse IPv4 de la VM, ou None"""
+        return facts["ipv4"][0] if facts.get("ipv4") else None
@@ -0,0 +1,184 @@
+"""
+Occupation des systèmes de fichiers invités via l'agent QEMU (get-fsinfo)
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ...core.logger import log_error, log_info, log_success
+from .concurrency import KeyedLimiter
+from .config_cache import agent_enabled
+
+# Systèmes de fichiers virtuels ou en lecture seule sans intérêt pour le remplissage
+IGNORED_TYPES = {"squashfs", "tmpfs", "devtmpfs", "overlay", "iso9660", "udf", "ramfs", "autofs"}
+
+
+def parse_fsinfo(response):
+    """Convertit la réponse de get-fsinfo en liste de points de montage
+
+    Chaque entrée : mountpoint, type, device, total, used, percent. Les
+    systèmes sans taille et les montages multiples d'un même volume
+    (bind mounts) ne sont comptés qu'une fois.
+    """
+    raw = response.get("result", []) if isinstance(response, dict) else response or []
+    filesystems, seen = [], set()
+    for fs in raw:
+        total, used = fs.get("total-bytes"), fs.get("used-bytes")
+        if not total or used is None or fs.get("type") in IGNORED_TYPES:
+            continue
+        mountpoint = fs.get("mountpoint", "")
+        if mountpoint.startswith("/snap/"):
+            continue
+        key = (fs.get("name"), total)
+        if key in seen:
+            continue
+        seen.add(key)
+        filesystems.append({
+            "mountpoint": mountpoint,
+            "type": fs.get("type", ""),
+            "device": fs.get("name", ""),
+            "total": total,
+            "used": used,
+            "percent": used / total * 100
+        })
+    return filesystems
+
+
+class GuestFsCollector:
+    """Relève l'occupation des disques invités de toute la flotte
+
+    Les agents sont interrogés en parallèle (limite globale et par nœud),
+    chaque appel étant borné par timeout à partir de son lancement
+    effectif. Les résultats, y compris les échecs (agent absent), sont
+    gardés ttl secondes : un nouveau relevé n'interroge que les VMs dont
+    l'entrée a expiré.
+    """
+
+    def __init__(self, handler, ttl=300, max_workers=64, per_node=16):
+        self.handler = handler
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.per_node = per_node
+        self._entries = {}
+        self._in_flight = set()  # Appels toujours en cours (agent bloqué lors d'un relevé précédent)
+        self._lock = threading.Lock()
+
+    def _cached(self, vmid):
+        with self._lock:
+            entry = self._entries.get(str(vmid))
+        if entry and time.monotonic() - entry["fetched_at"] < self.ttl:
+            return entry
+        return None
+
+    def _fetch(self, node_name, vmid):
+        with self._lock:
+            self._in_flight.add(str(vmid))
+        try:
+            filesystems = parse_fsinfo(self.handler.proxmox.nodes(node_name).qemu(vmid).agent.get("get-fsinfo"))
+            entry = {"fetched_at": time.monotonic(), "filesystems": filesystems}
+        except Exception as e:
+            entry = {"fetched_at": time.monotonic(), "filesystems": [], "error": str(e)}
+        with self._lock:
+            self._entries[str(vmid)] = entry
+            self._in_flight.discard(str(vmid))
+        if "error" in entry:
+            raise RuntimeError(entry["error"])
+        return entry["filesystems"]
+
+    def invalidate(self, vmid):
+        with self._lock:
+            self._entries.pop(str(vmid), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def collect(self, vms=None, timeout=5, refresh=False, callback=None):
+        """Occupation des disques des VMs actives avec agent
+
+        vms : entrées d'inventaire (par défaut toutes les VMs QEMU actives).
+        Retourne {"rows", "results", "timed_out", "failed", "skipped",
+        "duration"} ; rows est la table compacte (vmid, name, node,
+        mountpoint, type, total, used, percent) triée par remplissage
+        décroissant. callback(vmid, systèmes de fichiers) est appelé pour
+        chaque VM relevée.
+        """
+        started = time.monotonic()
+        if vms is None:
+            self.handler.inventory.refresh()
+            vms = self.handler.inventory.vms()
+        summary = {"rows": [], "results": {}, "timed_out": [], "failed": [], "skipped": [], "duration": 0}
+        limiter = KeyedLimiter(self.per_node)
+        call_started = {}
+        lock = threading.Lock()
+
+        def publish(vm, filesystems):
+            summary["results"][str(vm["vmid"])] = filesystems
+            for fs in filesystems:
+                summary["rows"].append({"vmid": vm["vmid"], "name": vm.get("name", f"VM-{vm['vmid']}"),
+                                        "node": vm["node"], **fs})
+            if callback:
+                try:
+                    callback(vm["vmid"], filesystems)
+                except Exception as e:
+                    log_error(f"Erreur callback occupation disques: {e}", "QemuAgent")
+
+        def worker(vm):
+            with limiter.slot(vm["node"]):
+                with lock:
+                    call_started[str(vm["vmid"])] = time.monotonic()
+                return self._fetch(vm["node"], vm["vmid"])
+
+        pending = []
+        for vm in vms:
+            if vm.get("status") != "running" or vm.get("template"):
+                continue
+            # Configuration connue sans agent : inutile d'interroger la VM
+            config = self.handler.config_cache.peek(vm["vmid"])
+            if config is not None and not agent_enabled(config):
+                summary["skipped"].append(vm["vmid"])
+                continue
+            cached = None if refresh else self._cached(vm["vmid"])
+            with self._lock:
+                stuck = str(vm["vmid"]) in self._in_flight
+            if stuck:
+                summary["timed_out"].append(vm["vmid"])
+            elif cached is None:
+                pending.append(vm)
+            elif "error" in cached:
+                summary["failed"].append(vm["vmid"])
+            else:
+                publish(vm, cached["filesystems"])
+
+        log_info(f"Relevé des disques invités: {len(pending)} VM(s) à interroger, "
+                 f"{len(summary['results'])} en cache", "QemuAgent")
+        # Pas de with : l'arrêt n'attend pas les appels abandonnés pour timeout
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(worker, vm): vm for vm in pending}
+            while futures:
+                done, _ = wait(list(futures), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    vm = futures.pop(future)
+                    try:
+                        publish(vm, future.result())
+                    except Exception:
+                        summary["failed"].append(vm["vmid"])
+
+                now = time.monotonic()
+                with lock:
+                    expired = [future for future, vm in futures.items()
+                               if now - call_started.get(str(vm["vmid"]), now) > timeout]
+                for future in expired:
+                    summary["timed_out"].append(futures.pop(future)["vmid"])
+        finally:
+            executor.shutdown(wait=False)
+
+        summary["rows"].sort(key=lambda row: row["percent"], reverse=True)
+        summary["duration"] = time.monotonic() - started
+        if summary["timed_out"] or summary["failed"]:
+            log_error(f"Disques invités non relevés: {len(summary['timed_out'])} timeout(s), "
+                      f"{len(summary['failed'])} agent(s) indisponible(s)", "QemuAgent")
+        log_success(f"Disques de {len(summary['results'])} VM(s) relevés en {summary['duration']:.1f}s "
+                    f"- {len(summary['rows'])} point(s) de montage", "QemuAgent")
+        return summary
@@ -0,0 +1,431 @@
+"""
+Historique local des métriques du cluster (SQLite)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from ...core.logger import log_debug, log_error
+from ...core.paths import get_user_data_dir, safe_filename
+
+
+class MetricsHistory:
+    """Séries temporelles persistées dans une base SQLite par cluster
+
+    Trois niveaux de précision :
+    - raw : un échantillon brut par ligne (rétention courte) ;
+    - 5m et 1h : agrégats (moyenne, min, max, nombre de points) calculés
+      automatiquement à partir du niveau inférieur.
+
+    Les niveaux agrégés sont stockés en colonnes : une ligne par série et
+    par tranche (un jour en 5m, une semaine en 1h) contenant un tableau
+    numpy de taille fixe. Lire un mois de données pour des milliers de VMs
+    revient à charger quelques dizaines de milliers de blobs au lieu de
+    millions de lignes. Toutes les tables sont indexées par
+    (series_id, ts) sans rowid.
+    """
+
+    TIER_STEPS = {"5m": 300, "1h": 3600}
+    CHUNK_SPANS = {"5m": 86400, "1h": 7 * 86400}
+    RETENTION = {"raw": 2 * 86400, "5m": 35 * 86400, "1h": 400 * 86400}
+    COMPACT_INTERVAL = 300
+    RAW_BATCH = 3600  # Durée de raw agrégée par transaction (secondes)
+    SERIES_BATCH = 200  # Séries traitées par transaction
+    # Intervalle minimal entre deux échantillons d'un même groupe (secondes)
+    SAMPLE_INTERVALS = {"cluster": 60, "node": 60, "storage": 60, "vm": 300}
+    AVG, MIN, MAX, COUNT = range(4)
+
+    def __init__(self):
+        self.path = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_sample = {}
+        self._last_compact = 0
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+
+    # === OUVERTURE ===
+    def bind(self, cluster_key):
+        """Ouvre (ou crée) la base du cluster courant"""
+        self.close()
+        filename = f"history_{safe_filename(cluster_key)}.sqlite3"
+        self.path = os.path.join(get_user_data_dir(), filename)
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema()
+            self._series = {
+                (kind, ident, metric): series_id
+                for series_id, kind, ident, metric in self._conn.execute(
+                    "SELECT id, kind, ident, metric FROM series")
+            }
+        log_debug(f"Historique des métriques ouvert: {self.path}", "Proxmox")
+
+    def _create_schema(self):
+        conn = self._conn
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS series (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                ident TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                UNIQUE (kind, metric, ident)
+            )""")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS samples_raw (
+                series_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                value REAL,
+                PRIMARY KEY (series_id, ts)
+            ) WITHOUT ROWID""")
+        for tier in self.TIER_STEPS:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS samples_{tier} (
+                    series_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (series_id, ts)
+                ) WITHOUT ROWID""")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._series = {}
+            self._last_sample = {}
+
+    @property
+    def is_open(self):
+        return self._conn is not None
+
+    # === ÉCRITURE ===
+    def _series_id(self, kind, ident, metric):
+        key = (kind, str(ident), metric)
+        series_id = self._series.get(key)
+        if series_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO series (kind, ident, metric) VALUES (?, ?, ?)", key)
+            series_id = self._conn.execute(
+                "SELECT id FROM series WHERE kind = ? AND ident = ? AND metric = ?", key).fetchone()[0]
+            self._series[key] = series_id
+        return series_id
+
+    def record(self, samples, ts=None):
+        """Enregistre des échantillons bruts [(kind, ident, metric, valeur), ...] à l'instant ts"""
+        ts = int(ts or time.time())
+        with self._lock:
+            if self._conn is None:
+                return 0
+            rows = [(self._series_id(kind, ident, metric), ts, value)
+                    for kind, ident, metric, value in samples if value is not None]
+            self._conn.executemany("INSERT OR REPLACE INTO samples_raw VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+        # Agrégation et rétention en arrière-plan : record() est appelé depuis l'interface
+        if self.compact_due:
+            self._compact_in_background()
+        return len(rows)
+
+    def record_inventory(self, inventory, ts=None):
+        """Échantillonne l'instantané du cluster (nœuds, stockages, VMs, compteurs)
+
+        Chaque groupe n'est enregistré qu'une fois par SAMPLE_INTERVALS.
+        """
+        now = time.monotonic()
+        due = {group for group, interval in self.SAMPLE_INTERVALS.items()
+               if now - self._last_sample.get(group, -interval) >= interval}
+        if not due or not inventory.resources:
+            return 0
+
+        samples = []
+        vms = inventory.vms()
+        nodes = inventory.nodes()
+        if "cluster" in due:
+            samples += [
+                ("cluster", "all", "vms_total", len(vms)),
+                ("cluster", "all", "vms_running", sum(1 for vm in vms if vm.get("status") == "running")),
+                ("cluster", "all", "nodes_online", sum(1 for node in nodes if node.get("status") == "online")),
+            ]
+        if "node" in due:
+            for node in nodes:
+                samples += [
+                    ("node", node["node"], "cpu", node.get("cpu")),
+                    ("node", node["node"], "mem", node.get("mem")),
+                    ("node", node["node"], "maxmem", node.get("maxmem")),
+                ]
+        if "storage" in due:
+            seen_shared = set()
+            for storage in inventory.storages():
+                # Un stockage partagé n'est enregistré qu'une fois pour tout le cluster
+                if storage.get("shared"):
+                    if storage["storage"] in seen_shared:
+                        continue
+                    seen_shared.add(storage["storage"])
+                    ident = storage["storage"]
+                else:
+                    ident = f"{storage['node']}/{storage['storage']}"
+                samples += [
+                    ("storage", ident, "used", storage.get("disk")),
+                    ("storage", ident, "total", storage.get("maxdisk")),
+                ]
+        if "vm" in due:
+            for vm in vms:
+                if vm.get("status") == "running":
+                    samples += [
+                        ("vm", vm["vmid"], "cpu", vm.get("cpu")),
+                        ("vm", vm["vmid"], "mem", vm.get("mem")),
+                    ]
+
+        for group in due:
+            self._last_sample[group] = now
+        return self.record(samples, ts)
+
+    # === TRANCHES COLONNES ===
+    def _empty_chunk(self, tier):
+        chunk = np.full((self.CHUNK_SPANS[tier] // self.TIER_STEPS[tier], 4), np.nan)
+        chunk[:, self.COUNT] = 0
+        return chunk
+
+    def _load_chunk(self, tier, series_id, chunk_ts):
+        row = self._conn.execute(
+            f"SELECT data FROM samples_{tier} WHERE series_id = ? AND ts = ?", (series_id, chunk_ts)).fetchone()
+        if row is None:
+            return self._empty_chunk(tier)
+        return np.frombuffer(row[0], dtype=np.float64).reshape(-1, 4).copy()
+
+    def _store_buckets(self, tier, buckets):
+        """Écrit des agrégats [(series_id, ts, avg, min, max, count), ...] dans leurs tranches"""
+        span, step = self.CHUNK_SPANS[tier], self.TIER_STEPS[tier]
+        grouped = {}
+        for series_id, ts, avg, low, high, count in buckets:
+            grouped.setdefault((series_id, ts - ts % span), []).append((ts, avg, low, high, count))
+
+        writes = []
+        for (series_id, chunk_ts), rows in grouped.items():
+            chunk = self._load_chunk(tier, series_id, chunk_ts)
+            values = np.array(rows, dtype=np.float64)
+            slots = ((values[:, 0] - chunk_ts) // step).astype(np.int64)
+            chunk[slots] = values[:, 1:]
+            writes.append((series_id, chunk_ts, chunk.tobytes()))
+        self._conn.executemany(f"INSERT OR REPLACE INTO samples_{tier} VALUES (?, ?, ?)", writes)
+
+    # === AGRÉGATION ET RÉTENTION ===
+    def _meta(self, key, default=0):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def compact_due(self):
+        """True si la dernière agrégation date de plus de COMPACT_INTERVAL secondes"""
+        return time.monotonic() - self._last_compact >= self.COMPACT_INTERVAL
+
+    def _compact_in_background(self):
+        """Lance compact() dans un thread de fond, sauf si une agrégation est déjà en cours"""
+        with self._compact_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._last_compact = time.monotonic()
+            self._compactor = threading.Thread(target=self.compact, name="history-compact", daemon=True)
+            self._compactor.start()
+
+    def compact(self, now=None):
+        """Agrège les périodes terminées dans les niveaux 5m et 1h puis applique la rétention
+
+        Le travail est découpé en lots de SERIES_BATCH séries (et d'une heure
+        de raw), chacun dans sa propre transaction : le verrou est relâché
+        entre deux lots et record() n'attend jamais plus d'un lot.
+        """
+        now = int(now or time.time())
+        try:
+            self._rollup_raw(now)
+            self._rollup_hourly(now)
+            self._apply_retention(now)
+        except Exception as e:
+            log_error(f"Agrégation de l'historique impossible: {e}", "Proxmox")
+        self._last_compact = time.monotonic()
+
+    def _batch(self, work):
+        """Exécute work() sous le verrou dans une transaction ; False si la base est fermée"""
+        with self._lock:
+            if self._conn is None:
+                return False
+            try:
+                work()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return True
+
+    def _series_batches(self):
+        with self._lock:
+            ids = sorted(self._series.values())
+        return [ids[offset:offset + self.SERIES_BATCH] for offset in range(0, len(ids), self.SERIES_BATCH)]
+
+    def _rollup_raw(self, now):
+        """raw -> 5m, agrégé par SQLite, par heure et par lot de séries"""
+        end = now - now % 300
+        with self._lock:
+            if self._conn is None:
+                return
+            start = self._meta("rollup_5m")
+            first = self._conn.execute("SELECT MIN(ts) FROM samples_raw WHERE ts >= ?", (start,)).fetchone()[0]
+        if first is None:
+            return
+        # Pas d'intervalles vides à parcourir avant le premier échantillon
+        start = max(start, first - first % 300)
+
+        def rollup(series_ids, low, high):
+            placeholders = ",".join("?" * len(series_ids))
+            buckets = self._conn.execute(f"""
+                SELECT series_id, ts - ts % 300, AVG(value), MIN(value), MAX(value), COUNT(value)
+                FROM samples_raw WHERE series_id IN ({placeholders}) AND ts >= ? AND ts < ?
+                GROUP BY series_id, ts - ts % 300""", (*series_ids, low, high)).fetchall()
+            self._store_buckets("5m", buckets)
+
+        batches = self._series_batches()
+        for low in range(start, end, self.RAW_BATCH):
+            high = min(low + self.RAW_BATCH, end)
+            for series_ids in batches:
+                if not self._batch(lambda series_ids=series_ids: rollup(series_ids, low, high)):
+                    return
+            # Curseur avancé une fois l'intervalle agrégé pour toutes les séries
+            if not self._batch(lambda: self._set_meta("rollup_5m", high)):
+                return
+
+    def _rollup_hourly(self, now):
+        """5m -> 1h, moyenne pondérée par le nombre de points, par lots de séries"""
+        end = now - now % 3600
+        with self._lock:
+            if self._conn is None:
+                return
+            start = self._meta("rollup_1h")
+        if end <= start:
+            return
+        span = self.CHUNK_SPANS["5m"]
+        per_hour = 3600 // self.TIER_STEPS["5m"]
+
+        def rollup(series_ids):
+            buckets = []
+            placeholders = ",".join("?" * len(series_ids))
+            rows = self._conn.execute(
+                f"SELECT series_id, ts, data FROM samples_5m "
+                f"WHERE series_id IN ({placeholders}) AND ts > ? AND ts < ?", (*series_ids, start - span, end))
+            for series_id, chunk_ts, data in rows:
+                chunk = np.frombuffer(data, dtype=np.float64).reshape(-1, per_hour, 4)
+                counts = chunk[:, :, self.COUNT]
+                hour_counts = counts.sum(axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    averages = np.nansum(chunk[:, :, self.AVG] * counts, axis=1) / hour_counts
+                    lows = np.nanmin(np.where(counts > 0, chunk[:, :, self.MIN], np.inf), axis=1)
+                    highs = np.nanmax(np.where(counts > 0, chunk[:, :, self.MAX], -np.inf), axis=1)
+                hours = chunk_ts + np.arange(len(hour_counts)) * 3600
+                keep = (hour_counts > 0) & (hours >= start) & (hours < end)
+                buckets += zip([series_id] * int(keep.sum()), hours[keep].tolist(), averages[keep].tolist(),
+                               lows[keep].tolist(), highs[keep].tolist(), hour_counts[keep].tolist())
+            self._store_buckets("1h", buckets)
+
+        # Le curseur n'avance qu'une fois toutes les séries agrégées (réécriture idempotente sinon)
+        for series_ids in self._series_batches():
+            if not self._batch(lambda series_ids=series_ids: rollup(series_ids)):
+                return
+        self._batch(lambda: self._set_meta("rollup_1h", end))
+
+    def _apply_retention(self, now):
+        limits = [("raw", now - self.RETENTION["raw"])]
+        limits += [(tier, now - self.RETENTION[tier] - span) for tier, span in self.CHUNK_SPANS.items()]
+
+        def purge(series_ids):
+            placeholders = ",".join("?" * len(series_ids))
+            for tier, limit in limits:
+                self._conn.execute(f"DELETE FROM samples_{tier} WHERE series_id IN ({placeholders}) AND ts < ?",
+                                   (*series_ids, limit))
+
+        for series_ids in self._series_batches():
+            if not self._batch(lambda series_ids=series_ids: purge(series_ids)):
+                return
+
+    # === LECTURE ===
+    def choose_tier(self, start, end, max_points=1000):
+        """Niveau le plus fin couvrant la plage avec au plus max_points points par série"""
+        now = time.time()
+        for tier, step in (("raw", 60), ("5m", 300), ("1h", 3600)):
+            if start >= now - self.RETENTION[tier] and (end - start) / step <= max_points:
+                return tier
+        return "1h"
+
+    def query(self, kind, metric, start, end=None, idents=None, tier=None, max_points=1000):
+        """Séries d'une métrique sur [start, end] : {ident: (times, values)} en tableaux numpy
+
+        Pour les niveaux agrégés, values est la moyenne de chaque période.
+        """
+        end = int(end or time.time())
+        start = int(start)
+        tier = tier or self.choose_tier(start, end, max_points)
+
+        with self._lock:
+            if self._conn is None:
+                return {}
+            wanted = {str(ident) for ident in idents} if idents is not None else None
+            series = {series_id: ident for (k, ident, m), series_id in self._series.items()
+                      if k == kind and m == metric and (wanted is None or ident in wanted)}
+            if not series:
+                return {}
+
+            if tier == "raw":
+                column, low = "value", start
+            else:
+                column, low = "data", start - self.CHUNK_SPANS[tier] + 1
+            ids = sorted(series)
+            rows = []
+            # Par paquets pour rester sous la limite de paramètres SQLite
+            for offset in range(0, len(ids), 500):
+                chunk = ids[offset:offset + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows += self._conn.execute(
+                    f"SELECT series_id, ts, {column} FROM samples_{tier} "
+                    f"WHERE series_id IN ({placeholders}) AND ts >= ? AND ts <= ? "
+                    f"ORDER BY series_id, ts", (*chunk, low, end)).fetchall()
+
+        if tier == "raw":
+            return self._split_raw(rows, series)
+        return self._split_chunks(rows, series, tier, start, end)
+
+    @staticmethod
+    def _split_raw(rows, series):
+        if not rows:
+            return {}
+        data = np.array(rows, dtype=np.float64)
+        series_ids = data[:, 0].astype(np.int64)
+        # Les lignes sont triées par série : découpage aux changements d'identifiant
+        boundaries = np.flatnonzero(np.diff(series_ids)) + 1
+        result = {}
+        for part in np.split(data, boundaries):
+            result[series[int(part[0, 0])]] = (part[:, 1].astype(np.int64), part[:, 2])
+        return result
+
+    def _split_chunks(self, rows, series, tier, start, end):
+        step = self.TIER_STEPS[tier]
+        slots = self.CHUNK_SPANS[tier] // step
+        offsets = np.arange(slots, dtype=np.int64) * step
+
+        per_series = {}
+        for series_id, chunk_ts, data in rows:
+            per_series.setdefault(series_id, []).append((chunk_ts, data))
+
+        result = {}
+        for series_id, chunks in per_series.items():
+            times = np.concatenate([chunk_ts + offsets for chunk_ts, _ in chunks])
+            values = np.frombuffer(b"".join(data for _, data in chunks), dtype=np.float64).reshape(-1, 4)
+            mask = (values[:, self.COUNT] > 0) & (times >= start) & (times <= end)
+            result[series[series_id]] = (times[mask], values[mask, self.AVG])
+        return result
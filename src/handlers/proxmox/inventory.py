@@ -0,0 +1,214 @@
+"""
+Inventaire du cluster Proxmox
+"""
+import time
+
+from ...core.logger import log_debug, log_error
+
+
+def merge_storages(storages):
+    """Entrées de stockage de /cluster/resources, un stockage partagé n'apparaissant qu'une fois
+
+    Un stockage partagé (Ceph, NFS...) porte la liste des nœuds qui y
+    accèdent dans 'nodes'. L'état du stockage (available, unknown...) est
+    dans 'status'.
+    """
+    storages_info = []
+    shared_pools = {}
+    for storage in storages:
+        name = storage.get("storage")
+        total = storage.get("maxdisk", 0)
+        used = storage.get("disk", 0)
+        is_shared = bool(storage.get("shared"))
+
+        pool = shared_pools.get(name) if is_shared else None
+        if pool is not None:
+            pool["nodes"].append(storage.get("node"))
+            # Garder les chiffres d'un nœud qui voit réellement le pool
+            if not pool["total"] and total:
+                pool.update({"node": storage.get("node"), "total": total, "used": used,
+                             "available": max(total - used, 0), "status": storage.get("status")})
+            continue
+
+        entry = {
+            "node": storage.get("node"),
+            "nodes": [storage.get("node")],
+            "storage": name,
+            "type": storage.get("plugintype"),
+            "total": total,
+            "used": used,
+            "available": max(total - used, 0),
+            "shared": is_shared,
+            "enabled": storage.get("shared", False),
+            "status": storage.get("status", "unknown"),
+            "content": storage.get("content", "")
+        }
+        storages_info.append(entry)
+        if is_shared:
+            shared_pools[name] = entry
+    return storages_info
+
+
+class ClusterInventory:
+    """Instantané du cluster (VMs, LXC, nœuds, stockages) obtenu en une seule requête /cluster/resources"""
+
+    # Champs de status/current recopiés dans l'entrée d'une VM
+    VM_STATUS_FIELDS = ("status", "name", "cpu", "mem", "maxmem", "disk", "maxdisk", "uptime",
+                        "pid", "tags", "template", "netin", "netout", "diskread", "diskwrite")
+    # Âge maximal de l'instantané suivi par le flux de changements : les métriques
+    # (CPU, RAM, stockages) ne sont pas portées par les tâches et doivent être relues
+    SNAPSHOT_TTL = 30
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.resources = []
+        self.timestamp = 0
+        self._observed = {}  # vmid -> date de la dernière mise à jour ciblée
+        # Quand un flux de changements est actif, l'instantané est tenu à jour
+        # entrée par entrée et n'a plus besoin d'être rechargé à chaque accès
+        self.follow_changes = False
+
+    def refresh(self, force=False):
+        """Recharge l'instantané complet du cluster
+
+        L'appel passe par le cache du handler : plusieurs rafraîchissements
+        rapprochés ne coûtent qu'une requête, sauf si force=True. Quand le
+        flux de changements est actif, l'instantané est réutilisé tant qu'il
+        a moins de SNAPSHOT_TTL secondes.
+        """
+        if (self.follow_changes and self.resources and not force
+                and time.time() - self.timestamp < self.SNAPSHOT_TTL):
+            return self.resources
+
+        key = ("cluster", "resources")
+        if force:
+            self.handler.cache.invalidate(key)
+        resources = self.handler._cached(
+            "cluster/resources", key,
+            lambda: self.handler.proxmox.cluster.resources.get()
+        )
+        fresh = resources is not self.resources
+        self.resources = resources or []
+        self.timestamp = time.time()
+        self._observed = {}
+
+        # Garder la liste des nœuds du handler synchronisée
+        self.handler.nodes = [node['node'] for node in self.nodes()]
+
+        # Un nouvel instantané (et non une réponse en cache) alimente l'historique
+        if fresh:
+            self.handler.record_history()
+            self.handler.search_index.sync(self.vms() + self.containers())
+
+        log_debug(f"Inventaire rechargé - {len(self.resources)} ressource(s)", "Inventory")
+        return self.resources
+
+    def clear(self):
+        """Vide l'instantané"""
+        self.resources = []
+        self.timestamp = 0
+        self._observed = {}
+
+    def observed_at(self, vmid):
+        """Date à laquelle les compteurs (uptime...) d'une VM ont été relevés"""
+        return self._observed.get(str(vmid), self.timestamp)
+
+    def _by_type(self, resource_type):
+        return [res for res in self.resources if res.get('type') == resource_type]
+
+    def vms(self):
+        """VMs QEMU de l'instantané (templates inclus)"""
+        return self._by_type('qemu')
+
+    def containers(self):
+        """Conteneurs LXC de l'instantané"""
+        return self._by_type('lxc')
+
+    def nodes(self):
+        """Nœuds de l'instantané"""
+        return self._by_type('node')
+
+    def storages(self):
+        """Stockages de l'instantané (une entrée par couple nœud/stockage)"""
+        return self._by_type('storage')
+
+    def find_vm(self, vmid):
+        """Retourne l'entrée d'une VM ou d'un conteneur par son vmid"""
+        for res in self.resources:
+            if res.get('type') in ('qemu', 'lxc') and str(res.get('vmid')) == str(vmid):
+                return res
+        return None
+
+    # === MISES À JOUR CIBLÉES ===
+    def update_vm(self, vmid, node, vm_type="qemu"):
+        """Met à jour l'entrée d'une VM à partir de son status/current
+
+        Une seule requête, quelle que soit la taille du cluster. L'entrée est
+        créée si la VM n'était pas encore connue. Retourne l'entrée ou None.
+        """
+        try:
+            status = self.handler.proxmox.nodes(node)(vm_type)(vmid).status.current.get()
+        except Exception as e:
+            log_error(f"Mise à jour de la VM {vmid} impossible: {e}", "Inventory")
+            return None
+
+        entry = self.find_vm(vmid)
+        if entry is None:
+            entry = {"id": f"{vm_type}/{vmid}", "type": vm_type, "vmid": int(vmid)}
+            self.resources.append(entry)
+
+        entry["node"] = node
+        for field in self.VM_STATUS_FIELDS:
+            if field in status:
+                entry[field] = status[field]
+        if "cpus" in status:
+            entry["maxcpu"] = status["cpus"]
+        # Pas de champ lock dans la réponse : la VM n'est plus verrouillée
+        if status.get("lock"):
+            entry["lock"] = status["lock"]
+        else:
+            entry.pop("lock", None)
+
+        self._observed[str(vmid)] = time.time()
+        self.handler.cache.put("vm/status", ("vm", str(vmid), "status"), status)
+        self.handler.search_index.update(entry)
+        log_debug(f"Inventaire: VM {vmid} mise à jour ({entry.get('status')})", "Inventory")
+        return entry
+
+    def remove_vm(self, vmid):
+        """Retire une VM supprimée de l'instantané"""
+        self.resources = [
+            res for res in self.resources
+            if not (res.get('type') in ('qemu', 'lxc') and str(res.get('vmid')) == str(vmid))
+        ]
+        self.handler.search_index.remove(vmid)
+        log_debug(f"Inventaire: VM {vmid} retirée", "Inventory")
+
+    def update_node(self, node):
+        """Met à jour l'entrée d'un nœud à partir de nodes/{node}/status
+
+        Un nœud injoignable est marqué offline. Retourne l'entrée ou None.
+        """
+        entry = next((res for res in self.nodes() if res.get('node') == node), None)
+        if entry is None:
+            entry = {"id": f"node/{node}", "type": "node", "node": node}
+            self.resources.append(entry)
+            self.handler.nodes = [res['node'] for res in self.nodes()]
+
+        try:
+            status = self.handler.proxmox.nodes(node).status.get()
+        except Exception as e:
+            log_debug(f"Statut du nœud {node} indisponible: {e}", "Inventory")
+            entry["status"] = "offline"
+            return entry
+
+        memory = status.get("memory", {})
+        entry.update({
+            "status": "online",
+            "cpu": status.get("cpu", entry.get("cpu", 0)),
+            "maxcpu": status.get("cpuinfo", {}).get("cpus", entry.get("maxcpu", 0)),
+            "mem": memory.get("used", entry.get("mem", 0)),
+            "maxmem": memory.get("total", entry.get("maxmem", 0)),
+            "uptime": status.get("uptime", entry.get("uptime", 0))
+        })
+        return entry
@@ -0,0 +1,105 @@
+"""
+Résolution en masse des adresses IP des VMs via l'agent QEMU
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ...core.logger import log_error, log_info, log_success
+from .concurrency import KeyedLimiter
+
+
+class VmIpResolver:
+    """Interroge les agents de nombreuses VMs en parallèle
+
+    Les faits passent par le cache des faits invités : une VM déjà résolue
+    depuis son dernier démarrage ne coûte aucune requête. Chaque appel est
+    borné par timeout (compté à partir de son lancement effectif) ; une VM
+    qui dépasse ce délai est signalée sans bloquer les autres, et son
+    résultat tardif alimente quand même le cache pour la fois suivante.
+    """
+
+    def __init__(self, handler, max_workers=64, per_node=16):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.per_node = per_node
+
+    def resolve(self, vm_list, timeout=5, callback=None):
+        """Résout les adresses de vm_list (dicts avec vmid, node, et si possible name, status)
+
+        Retourne {"results": {vmid: résultat}, "timed_out": [vmid],
+        "failed": [vmid], "duration": s}. Un résultat contient vmid, name,
+        node, state ('ok', 'timeout', 'error' ou 'stopped'), interfaces
+        (name, mac, ipv4, ipv6), ipv4, ipv6 et error. callback(résultat) est
+        appelé dès qu'une VM est résolue.
+        """
+        started = time.monotonic()
+        summary = {"results": {}, "timed_out": [], "failed": [], "duration": 0}
+        limiter = KeyedLimiter(self.per_node)
+        call_started = {}
+        lock = threading.Lock()
+
+        def publish(vm, state, facts=None, error=""):
+            result = {
+                "vmid": vm["vmid"],
+                "name": vm.get("name", f"VM-{vm['vmid']}"),
+                "node": vm["node"],
+                "state": state,
+                "interfaces": facts["interfaces"] if facts else [],
+                "ipv4": facts["ipv4"] if facts else [],
+                "ipv6": facts["ipv6"] if facts else [],
+                "error": error
+            }
+            summary["results"][str(vm["vmid"])] = result
+            if state == "timeout":
+                summary["timed_out"].append(vm["vmid"])
+            elif state == "error":
+                summary["failed"].append(vm["vmid"])
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    log_error(f"Erreur callback résolution IP: {e}", "Proxmox")
+
+        def worker(vm):
+            with limiter.slot(vm["node"]):
+                with lock:
+                    call_started[str(vm["vmid"])] = time.monotonic()
+                return self.handler.guest_facts.get(vm["node"], vm["vmid"], self.handler.inventory.find_vm(vm["vmid"]))
+
+        running_vms = []
+        for vm in vm_list:
+            if vm.get("status", "running") != "running":
+                publish(vm, "stopped")
+            else:
+                running_vms.append(vm)
+
+        log_info(f"Résolution des IPs de {len(running_vms)} VM(s) actives", "Proxmox")
+        # Pas de with : l'arrêt n'attend pas les appels déjà abandonnés pour timeout
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(worker, vm): vm for vm in running_vms}
+            while futures:
+                done, _ = wait(list(futures), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    vm = futures.pop(future)
+                    try:
+                        publish(vm, "ok", facts=future.result())
+                    except Exception as e:
+                        publish(vm, "error", error=str(e))
+
+                now = time.monotonic()
+                with lock:
+                    expired = [future for future, vm in futures.items()
+                               if now - call_started.get(str(vm["vmid"]), now) > timeout]
+                for future in expired:
+                    publish(futures.pop(future), "timeout", error=f"Pas de réponse de l'agent en {timeout}s")
+        finally:
+            executor.shutdown(wait=False)
+
+        summary["duration"] = time.monotonic() - started
+        if summary["timed_out"] or summary["failed"]:
+            log_error(f"IPs non résolues: {len(summary['timed_out'])} timeout(s), "
+                      f"{len(summary['failed'])} erreur(s)", "Proxmox")
+        log_success(f"IPs de {len(running_vms)} VM(s) résolues en {summary['duration']:.1f}s", "Proxmox")
+        return summary
@@ -0,0 +1,114 @@
+"""
+Actions de cycle de vie en masse sur les VMs
+"""
+import time
+
+from ...core.logger import log_error, log_info, log_success
+from .concurrency import LimitedScheduler
+
+
+class BulkLifecycleOrchestrator:
+    """Démarre, arrête, éteint ou redémarre un ensemble de VMs en parallèle
+
+    Les actions sont lancées avec une limite globale (max_parallel) et une
+    limite par nœud (per_node) ; chaque action est suivie par son UPID, si
+    bien que la durée totale est proche de celle de la VM la plus lente.
+    """
+
+    ACTIONS = {
+        "start": "running",
+        "stop": "stopped",
+        "shutdown": "stopped",
+        "reboot": "running",
+    }
+
+    def __init__(self, handler, max_parallel=32, per_node=8):
+        self.handler = handler
+        self.max_parallel = max_parallel
+        self.per_node = per_node
+
+    def run(self, vms, action, callback=None, timeout=300, force_stop=False):
+        """Applique action à toutes les VMs de vms (dicts avec vmid, node, name, status)
+
+        callback(événement) est appelé au lancement et à la fin de chaque
+        action. Retourne un résumé : total, succeeded, failed, skipped,
+        duration et la liste results.
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"Action inconnue: {action}")
+
+        log_info(f"Action '{action}' sur {len(vms)} VM(s)", "Lifecycle")
+        started = time.monotonic()
+        summary = {"total": len(vms), "succeeded": 0, "failed": 0, "skipped": 0, "results": []}
+
+        def notify(event):
+            if callback:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_error(f"Erreur callback progression: {e}", "Lifecycle")
+
+        def worker(vm):
+            notify(self._event(vm, action, "started"))
+            return self._apply(vm, action, timeout, force_stop)
+
+        scheduler = LimitedScheduler(self.max_parallel, {"node": self.per_node})
+        jobs = []
+        for vm in vms:
+            # Rien à faire si la VM est déjà dans l'état visé (sauf reboot)
+            if action != "reboot" and vm.get("status") == self.ACTIONS[action]:
+                event = self._event(vm, action, "skipped", message="Déjà dans l'état demandé")
+                summary["skipped"] += 1
+                summary["results"].append(event)
+                notify(event)
+                continue
+            jobs.append(vm)
+
+        for vm, result, error in scheduler.run(jobs, worker, keys=lambda vm: {"node": vm["node"]}):
+            if error is not None:
+                event = self._event(vm, action, "failed", message=str(error))
+            elif result["success"]:
+                event = self._event(vm, action, "done", duration=result["duration"])
+            else:
+                event = self._event(vm, action, "failed", duration=result["duration"],
+                                    message=result["exitstatus"])
+
+            summary["succeeded" if event["state"] == "done" else "failed"] += 1
+            summary["results"].append(event)
+            notify(event)
+
+        summary["duration"] = time.monotonic() - started
+        if summary["failed"]:
+            log_error(f"Action '{action}' : {summary['failed']} échec(s) sur {summary['total']} VM(s)", "Lifecycle")
+        log_success(
+            f"Action '{action}' terminée en {summary['duration']:.1f}s - "
+            f"{summary['succeeded']} OK, {summary['skipped']} ignorée(s)", "Lifecycle"
+        )
+        return summary
+
+    def _apply(self, vm, action, timeout, force_stop):
+        """Lance l'action sur une VM et attend la fin de la tâche"""
+        node_name, vmid = vm["node"], vm["vmid"]
+        self.handler._invalidate_vm(vmid)
+
+        status = self.handler.proxmox.nodes(node_name).qemu(vmid).status
+        if action == "shutdown" and force_stop:
+            upid = status.shutdown.post(forceStop=1)
+        else:
+            upid = getattr(status, action).post()
+        self.handler.task_tailer.follow(upid, vm.get("name", f"VM-{vmid}"), "Lifecycle")
+
+        result = self.handler.task_waiter.wait(upid, timeout=timeout)
+        self.handler._invalidate_vm(vmid)
+        return result
+
+    def _event(self, vm, action, state, duration=None, message=""):
+        return {
+            "vmid": vm.get("vmid"),
+            "name": vm.get("name", f"VM-{vm.get('vmid')}"),
+            "node": vm.get("node"),
+            "action": action,
+            "state": state,  # started, done, failed, skipped
+            "duration": duration,
+            "message": message
+        }
@@ -0,0 +1,219 @@
+"""
+Collecte des métriques RRD des nœuds et des VMs
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ...core.logger import log_debug, log_success
+
+
+class RingBuffer:
+    """Série temporelle de taille fixe stockée dans des tableaux numpy
+
+    Une ligne par horodatage, une colonne par champ ; les points les plus
+    anciens sont écrasés une fois la capacité atteinte.
+    """
+
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._index = {field: i for i, field in enumerate(self.fields)}
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, len(self.fields)), np.nan, dtype=np.float64)
+        self.size = 0
+        self.head = 0  # Prochaine position d'écriture
+        self.last_time = 0
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, times, values):
+        """Ajoute les points plus récents que le dernier point connu
+
+        Le dernier point du RRD est souvent incomplet (NaN) à sa première
+        lecture : s'il revient avec des valeurs, celles qui sont finies
+        remplacent le point stocké. times : tableau (n,) ; values : tableau
+        (n, len(fields)). Retourne le nombre de points ajoutés.
+        """
+        if self.size:
+            same = np.flatnonzero(times == self.last_time)
+            if same.size:
+                last = (self.head - 1) % self.capacity
+                update = values[same[-1]]
+                self.values[last] = np.where(np.isfinite(update), update, self.values[last])
+
+        fresh = times > self.last_time
+        times, values = times[fresh], values[fresh]
+        count = len(times)
+        if count == 0:
+            return 0
+        if count > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            count = self.capacity
+
+        positions = (self.head + np.arange(count)) % self.capacity
+        self.times[positions] = times
+        self.values[positions] = values
+        self.head = (self.head + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        self.last_time = int(times[-1])
+        return count
+
+    def ordered(self):
+        """(times, values) du plus ancien au plus récent"""
+        if self.size < self.capacity:
+            return self.times[:self.size], self.values[:self.size]
+        order = np.roll(np.arange(self.capacity), -self.head)
+        return self.times[order], self.values[order]
+
+    def window(self, seconds, now=None):
+        """Points des seconds dernières secondes"""
+        times, values = self.ordered()
+        since = (now or time.time()) - seconds
+        mask = times >= since
+        return times[mask], values[mask]
+
+    def column(self, field):
+        return self._index[field]
+
+
+class MetricsCollector:
+    """Télécharge les rrddata des nœuds et des VMs en parallèle et les conserve en mémoire
+
+    Chaque collecte ne récupère que la fenêtre la plus courte utile
+    (timeframe) et n'ajoute aux tampons que les points nouveaux : les
+    tendances sur plusieurs heures se calculent sur les données déjà en
+    mémoire, sans retélécharger l'historique.
+    """
+
+    NODE_FIELDS = ("cpu", "memused", "memtotal", "loadavg", "iowait", "netin", "netout")
+    VM_FIELDS = ("cpu", "mem", "maxmem", "netin", "netout", "diskread", "diskwrite")
+
+    def __init__(self, handler, capacity=1440, max_workers=16):
+        self.handler = handler
+        self.capacity = capacity  # 1440 points = 24 h à une minute par point
+        self.max_workers = max_workers
+        self.buffers = {}
+        self._lock = threading.Lock()
+
+    def _buffer(self, key, fields):
+        with self._lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                buffer = RingBuffer(self.capacity, fields)
+                self.buffers[key] = buffer
+            return buffer
+
+    @staticmethod
+    def _to_arrays(rows, fields):
+        """Convertit la réponse rrddata (liste de dicts) en tableaux numpy"""
+        rows = [row for row in rows if "time" in row]
+        rows.sort(key=lambda row: row["time"])
+        times = np.fromiter((row["time"] for row in rows), dtype=np.int64, count=len(rows))
+        values = np.array(
+            [[row.get(field, np.nan) for field in fields] for row in rows], dtype=np.float64
+        ).reshape(len(rows), len(fields))
+        return times, values
+
+    # === COLLECTE ===
+    def collect(self, timeframe="hour", include_vms=True, cf="AVERAGE"):
+        """Récupère les rrddata de tous les nœuds (et des VMs actives) en parallèle
+
+        Retourne le nombre de séries mises à jour.
+        """
+        self.handler.inventory.refresh()
+        targets = [("node", node["node"], node["node"]) for node in self.handler.inventory.nodes()
+                   if node.get("status") == "online"]
+        if include_vms:
+            targets += [("vm", str(vm["vmid"]), vm["node"]) for vm in self.handler.inventory.vms()
+                        if vm.get("status") == "running"]
+
+        started = time.monotonic()
+
+        def fetch(target):
+            kind, ident, node_name = target
+            node = self.handler.proxmox.nodes(node_name)
+            if kind == "node":
+                rows = node.rrddata.get(timeframe=timeframe, cf=cf)
+                fields = self.NODE_FIELDS
+            else:
+                rows = node.qemu(ident).rrddata.get(timeframe=timeframe, cf=cf)
+                fields = self.VM_FIELDS
+            times, values = self._to_arrays(rows or [], fields)
+            return self._buffer((kind, ident), fields).extend(times, values)
+
+        updated = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(target, executor.submit(fetch, target)) for target in targets]
+            for target, future in futures:
+                try:
+                    future.result()
+                    updated += 1
+                except Exception as e:
+                    log_debug(f"rrddata indisponible pour {target[0]} {target[1]}: {e}", "Proxmox")
+
+        log_success(f"Métriques de {updated} série(s) collectées en {time.monotonic() - started:.1f}s", "Proxmox")
+        return updated
+
+    # === AGRÉGATIONS ===
+    def aggregate(self, kind, ident, field, window=3600):
+        """mean, p95, max et last d'un champ sur la fenêtre, ou None sans données"""
+        buffer = self.buffers.get((kind, str(ident)))
+        if buffer is None:
+            return None
+        _, values = buffer.window(window)
+        return self._stats(values[:, buffer.column(field)])
+
+    @staticmethod
+    def _stats(series):
+        series = series[~np.isnan(series)]
+        if series.size == 0:
+            return None
+        return {
+            "mean": float(series.mean()),
+            "p95": float(np.percentile(series, 95)),
+            "max": float(series.max()),
+            "last": float(series[-1])
+        }
+
+    def node_trends(self, window=3600):
+        """Tendances CPU et RAM (en %) de chaque nœud sur la fenêtre"""
+        trends = []
+        for (kind, ident), buffer in sorted(self.buffers.items()):
+            if kind != "node":
+                continue
+            _, values = buffer.window(window)
+            if len(values) == 0:
+                continue
+            cpu = values[:, buffer.column("cpu")] * 100
+            total = values[:, buffer.column("memtotal")]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mem = np.where(total > 0, values[:, buffer.column("memused")] / total * 100, np.nan)
+            trends.append({
+                "node": ident,
+                "points": len(values),
+                "cpu": self._stats(cpu),
+                "mem": self._stats(mem),
+                "loadavg": self._stats(values[:, buffer.column("loadavg")])
+            })
+        return trends
+
+    def top_vms(self, field="cpu", window=3600, count=10, statistic="p95"):
+        """VMs les plus chargées sur un champ, triées par statistique décroissante"""
+        ranking = []
+        for (kind, ident), buffer in self.buffers.items():
+            if kind != "vm":
+                continue
+            stats = self.aggregate(kind, ident, field, window)
+            if stats:
+                ranking.append({"vmid": ident, **stats})
+        ranking.sort(key=lambda entry: entry[statistic], reverse=True)
+        return ranking[:count]
+
+    def clear(self):
+        with self._lock:
+            self.buffers.clear()
+        log_debug("Tampons de métriques vidés", "Proxmox")
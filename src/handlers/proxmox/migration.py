@@ -0,0 +1,226 @@
+"""
+Migrations à chaud en masse
+"""
+import re
+import threading
+import time
+
+from ...core.logger import log_debug, log_error, log_info, log_success
+from .concurrency import LimitedScheduler
+
+SIZE_UNITS = {
+    "B": 1,
+    "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+    "KIB": 1024, "MIB": 1024 ** 2, "GIB": 1024 ** 3, "TIB": 1024 ** 4,
+}
+TRANSFER_PATTERN = re.compile(r"transferred:?\s+([\d.]+)\s*([KMGT]?i?B)\s+of\s+([\d.]+)\s*([KMGT]?i?B)", re.IGNORECASE)
+RATE_PATTERN = re.compile(r"([\d.]+)\s*([KMGT]?i?B)/s", re.IGNORECASE)
+STREAM_PATTERN = re.compile(r"^(?:\S+\s+\S+\s+)?(drive-[\w-]+):")
+
+
+def parse_size(value, unit):
+    """Convertit '1.5', 'GiB' en octets"""
+    return float(value) * SIZE_UNITS.get(unit.upper(), 1)
+
+
+def parse_transfer(line):
+    """Extrait la progression d'une ligne du journal de migration
+
+    Retourne {"stream", "transferred", "total", "rate"} ou None. stream vaut
+    le disque concerné (drive-scsi0...) ou 'ram' pour l'état de la VM.
+    """
+    match = TRANSFER_PATTERN.search(line)
+    if not match:
+        return None
+    stream = STREAM_PATTERN.search(line)
+    rate = RATE_PATTERN.search(line[match.end():])
+    transferred = parse_size(match.group(1), match.group(2))
+    total = parse_size(match.group(3), match.group(4))
+    return {
+        "stream": stream.group(1) if stream else "ram",
+        "transferred": min(transferred, total) if total else transferred,
+        "total": total,
+        "rate": parse_size(rate.group(1), rate.group(2)) if rate else 0.0
+    }
+
+
+class MigrationOrchestrator:
+    """Migre un ensemble de VMs en parallèle avec des limites par nœud et par réseau
+
+    Chaque migration est limitée par nœud source (per_source), nœud cible
+    (per_target) et réseau de migration (per_network). Le journal de chaque
+    tâche est suivi par le TaskLogTailer du handler (une seule boucle pour
+    toutes les tâches) pour compter les octets transférés ; le débit cumulé
+    et l'ETA de l'ensemble sont publiés à chaque progression.
+    """
+
+    def __init__(self, handler, max_parallel=16, per_source=2, per_target=2, per_network=4):
+        self.handler = handler
+        self.max_parallel = max_parallel
+        self.per_source = per_source
+        self.per_target = per_target
+        self.per_network = per_network
+        self._lock = threading.Lock()
+        self._progress = {}
+
+    def default_network(self):
+        """Réseau de migration du datacenter (options 'migration'), sinon 'cluster'"""
+        try:
+            options = self.handler.proxmox.cluster.options.get() or {}
+            match = re.search(r"network=([^,]+)", options.get("migration", ""))
+            if match:
+                return match.group(1)
+        except Exception as e:
+            log_debug(f"Options de migration du cluster indisponibles: {e}", "Proxmox")
+        return "cluster"
+
+    def _job(self, migration, network, online):
+        vmid = migration["vmid"]
+        resource = self.handler.inventory.find_vm(vmid) or {}
+        # Une VM arrêtée est migrée hors ligne (online=False dans le mouvement)
+        online = migration.get("online", online)
+        return {
+            "vmid": vmid,
+            "name": migration.get("name") or resource.get("name", f"VM-{vmid}"),
+            "source": migration.get("source") or migration.get("node") or resource.get("node"),
+            "target": migration["target"],
+            "network": migration.get("network") or network,
+            "online": online,
+            # Estimation du volume à transférer tant que le journal ne l'indique pas
+            "estimate": float(resource.get("maxmem") or 0) if online else 0.0
+        }
+
+    def run(self, migrations, callback=None, timeout=3600, online=True, with_local_disks=False):
+        """Migre chaque VM de migrations (dicts vmid, target et node ou source)
+
+        Accepte directement les 'moves' du planificateur de capacité ; la
+        clé online d'un mouvement remplace alors le paramètre online.
+        callback(événement) reçoit les états started, progress, done et
+        failed ; chaque événement porte l'agrégat (transferred, total, rate,
+        eta). Retourne le résumé : total, succeeded, failed, results, duration.
+        """
+        started = time.monotonic()
+        network = self.default_network()
+        jobs = [self._job(migration, network, online) for migration in migrations]
+        summary = {"total": len(jobs), "succeeded": 0, "failed": 0, "results": []}
+        with self._lock:
+            self._progress = {
+                str(job["vmid"]): {"transferred": 0.0, "total": job["estimate"], "rate": 0.0, "finished": False}
+                for job in jobs
+            }
+        log_info(f"Migration de {len(jobs)} VM(s) - réseau {network}", "Proxmox")
+
+        def notify(event):
+            if callback:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_error(f"Erreur callback migration: {e}", "Proxmox")
+
+        def worker(job):
+            return self._migrate(job, notify, timeout, job["online"], with_local_disks)
+
+        scheduler = LimitedScheduler(
+            self.max_parallel,
+            {"source": self.per_source, "target": self.per_target, "network": self.per_network}
+        )
+        keys = lambda job: {"source": job["source"], "target": job["target"], "network": job["network"]}
+
+        for job, result, error in scheduler.run(jobs, worker, keys=keys):
+            if error is not None:
+                result = {"success": False, "message": str(error), "duration": 0}
+            self._update(job, finished=True, success=result["success"])
+            state = "done" if result["success"] else "failed"
+            event = self._event(job, state, duration=result["duration"], message=result["message"])
+            summary["succeeded" if result["success"] else "failed"] += 1
+            summary["results"].append(event)
+            notify(event)
+
+        summary["duration"] = time.monotonic() - started
+        if summary["failed"]:
+            log_error(f"Migrations : {summary['failed']} échec(s) sur {summary['total']}", "Proxmox")
+        log_success(f"Migrations terminées en {summary['duration']:.0f}s - "
+                    f"{summary['succeeded']}/{summary['total']} réussie(s)", "Proxmox")
+        return summary
+
+    def _migrate(self, job, notify, timeout, online, with_local_disks):
+        """Lance une migration, confie son journal au TaskLogTailer et attend la fin de la tâche"""
+        begin = time.monotonic()
+        network = job["network"] if job["network"] != "cluster" else None
+        success, upid = self.handler.migrate_vm(job["source"], job["vmid"], job["target"], online=online,
+                                                with_local_disks=with_local_disks, migration_network=network)
+        if not success:
+            return {"success": False, "message": upid, "duration": time.monotonic() - begin}
+        notify(self._event(job, "started"))
+
+        streams = {}
+
+        def on_line(upid, line):
+            progress = parse_transfer(line)
+            if not progress:
+                return
+            now = time.monotonic()
+            previous = streams.get(progress["stream"])
+            # Les lignes des disques (drive-mirror) n'indiquent pas de débit :
+            # il est déduit de l'écart avec la ligne précédente
+            if not progress["rate"] and previous and now > previous["seen"]:
+                progress["rate"] = max(progress["transferred"] - previous["transferred"], 0) / (now - previous["seen"])
+            progress["seen"] = now
+            streams[progress["stream"]] = progress
+            self._update(job, streams=streams)
+            notify(self._event(job, "progress"))
+
+        self.handler.task_tailer.follow(upid, job["name"], callback=on_line)
+        result = self.handler.task_waiter.wait(upid, timeout=timeout)
+        if result["status"] == "stopped":
+            self.handler._invalidate_vm(job["vmid"])
+        return {"success": result["success"], "message": result["exitstatus"], "duration": time.monotonic() - begin}
+
+    # === PROGRESSION ===
+    def _update(self, job, streams=None, finished=False, success=False):
+        with self._lock:
+            entry = self._progress[str(job["vmid"])]
+            if streams and not entry["finished"]:
+                total = sum(stream["total"] for stream in streams.values())
+                entry["transferred"] = sum(stream["transferred"] for stream in streams.values())
+                entry["total"] = max(total, entry["transferred"])
+                entry["rate"] = sum(stream["rate"] for stream in streams.values())
+            if finished:
+                entry["finished"] = True
+                entry["rate"] = 0.0
+                if success:
+                    entry["transferred"] = entry["total"]
+                else:
+                    # Migration échouée : seul ce qui a réellement été transféré reste compté
+                    entry["total"] = entry["transferred"]
+
+    def aggregate(self):
+        """Octets transférés, volume total estimé, débit cumulé (o/s) et ETA (s) de l'ensemble"""
+        with self._lock:
+            transferred = sum(entry["transferred"] for entry in self._progress.values())
+            total = sum(entry["total"] for entry in self._progress.values())
+            rate = sum(entry["rate"] for entry in self._progress.values() if not entry["finished"])
+        remaining = max(total - transferred, 0)
+        return {
+            "transferred": transferred,
+            "total": total,
+            "rate": rate,
+            "eta": remaining / rate if rate > 0 else None
+        }
+
+    def _event(self, job, state, duration=None, message=""):
+        with self._lock:
+            progress = dict(self._progress[str(job["vmid"])])
+        return {
+            "vmid": job["vmid"],
+            "name": job["name"],
+            "source": job["source"],
+            "target": job["target"],
+            "state": state,  # started, progress, done, failed
+            "transferred": progress["transferred"],
+            "total": progress["total"],
+            "rate": progress["rate"],
+            "duration": duration,
+            "message": message,
+            "aggregate": self.aggregate()
+        }
@@ -0,0 +1,242 @@
+"""
+Planification de capacité : rééquilibrage et évacuation de nœuds
+"""
+import time
+
+import numpy as np
+
+from ...core.logger import log_info, log_success
+
+
+class ClusterModel:
+    """Vue matricielle du cluster : une ligne par nœud, une ligne par VM
+
+    Les charges sont exprimées en cœurs (CPU) et en octets (RAM). Selon
+    basis, la charge d'une VM est son utilisation réelle ('usage') ou son
+    allocation ('allocation'). Une VM arrêtée ne pèse sur aucun nœud.
+    """
+
+    def __init__(self, nodes, vms, basis="usage"):
+        self.node_names = [node["node"] for node in nodes]
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        self.node_cpu = np.array([node.get("maxcpu") or 0 for node in nodes], dtype=np.float64)
+        self.node_mem = np.array([node.get("maxmem") or 0 for node in nodes], dtype=np.float64)
+        self.node_online = np.array([node.get("status") == "online" for node in nodes], dtype=bool)
+
+        self.vms = vms
+        self.vm_node = np.array([self.node_index.get(vm["node"], -1) for vm in vms], dtype=np.int64)
+        self.vm_alloc_mem = np.array([vm.get("maxmem") or 0 for vm in vms], dtype=np.float64)
+        if basis == "allocation":
+            self.vm_cpu = np.array([vm.get("maxcpu") or 0 for vm in vms], dtype=np.float64)
+            self.vm_mem = self.vm_alloc_mem.copy()
+        else:
+            self.vm_cpu = np.array([(vm.get("cpu") or 0) * (vm.get("maxcpu") or 0) for vm in vms], dtype=np.float64)
+            self.vm_mem = np.array([vm.get("mem") or 0 for vm in vms], dtype=np.float64)
+        self.vm_running = np.array([vm.get("status") == "running" for vm in vms], dtype=bool)
+        for weights in (self.vm_cpu, self.vm_mem, self.vm_alloc_mem):
+            weights[~self.vm_running] = 0.0
+        # Une VM verrouillée (sauvegarde, migration...) ne peut pas être déplacée
+        self.vm_movable = np.array([not vm.get("lock") for vm in vms], dtype=bool) & (self.vm_node >= 0)
+        self.basis = basis
+
+    def node_loads(self, placement=None):
+        """(cpu, mem, mem_alloc) cumulés par nœud pour un placement (vm -> index de nœud)"""
+        placement = self.vm_node if placement is None else placement
+        valid = placement >= 0
+        count = len(self.node_names)
+        cpu = np.bincount(placement[valid], weights=self.vm_cpu[valid], minlength=count)
+        mem = np.bincount(placement[valid], weights=self.vm_mem[valid], minlength=count)
+        mem_alloc = np.bincount(placement[valid], weights=self.vm_alloc_mem[valid], minlength=count)
+        return cpu, mem, mem_alloc
+
+    def ratios(self, cpu, mem):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cpu_ratio = np.where(self.node_cpu > 0, cpu / self.node_cpu, 0.0)
+            mem_ratio = np.where(self.node_mem > 0, mem / self.node_mem, 0.0)
+        return cpu_ratio, mem_ratio
+
+    def summary(self, placement=None):
+        """Charge de chaque nœud en % (CPU, RAM) et nombre de VMs"""
+        placement = self.vm_node if placement is None else placement
+        cpu, mem, _ = self.node_loads(placement)
+        cpu_ratio, mem_ratio = self.ratios(cpu, mem)
+        counts = np.bincount(placement[placement >= 0], minlength=len(self.node_names))
+        return [{
+            "node": name,
+            "cpu_percent": float(cpu_ratio[i] * 100),
+            "mem_percent": float(mem_ratio[i] * 100),
+            "vms": int(counts[i])
+        } for i, name in enumerate(self.node_names)]
+
+
+class CapacityPlanner:
+    """Propose des migrations pour équilibrer la charge ou vider un nœud
+
+    Le calcul est vectorisé avec numpy : à chaque étape, l'effet de tous
+    les déplacements possibles (VM x nœud cible) sur l'équilibre du cluster
+    est évalué en une seule opération matricielle.
+    """
+
+    def __init__(self, handler, mem_limit=0.90, cpu_limit=0.85):
+        self.handler = handler
+        self.mem_limit = mem_limit  # RAM allouée maximale sur un nœud cible
+        self.cpu_limit = cpu_limit  # Charge CPU réelle maximale sur un nœud cible
+
+    def model(self, basis="usage", stopped_on=None):
+        """Construit le modèle à partir de l'inventaire (VMs actives, hors templates)
+
+        stopped_on : nœud dont les VMs arrêtées sont aussi incluses (évacuation).
+        """
+        inventory = self.handler.inventory
+        inventory.refresh()
+        vms = [vm for vm in inventory.vms()
+               if not vm.get("template")
+               and (vm.get("status") == "running" or (stopped_on and vm.get("node") == stopped_on))]
+        return ClusterModel(inventory.nodes(), vms, basis)
+
+    def _cpu_limit(self, model):
+        # Les vCPU alloués sont couramment surréservés : la limite CPU ne
+        # s'applique qu'à l'utilisation réelle
+        return self.cpu_limit if model.basis == "usage" else np.inf
+
+    def _targets_allowed(self, model, exclude):
+        allowed = model.node_online & (model.node_cpu > 0) & (model.node_mem > 0)
+        for name in exclude:
+            if name in model.node_index:
+                allowed[model.node_index[name]] = False
+        return allowed
+
+    def _move(self, model, vm, source, target):
+        info = model.vms[vm]
+        return {
+            "vmid": info["vmid"],
+            "name": info.get("name", f"VM-{info['vmid']}"),
+            "source": model.node_names[source],
+            "target": model.node_names[target],
+            "cpu": float(model.vm_cpu[vm]),
+            "mem": float(model.vm_mem[vm]),
+            "online": bool(model.vm_running[vm])
+        }
+
+    # === RÉÉQUILIBRAGE ===
+    def rebalance(self, max_moves=20, basis="usage", exclude=(), min_gain=1e-4):
+        """Propose jusqu'à max_moves migrations réduisant le déséquilibre CPU/RAM
+
+        L'objectif minimisé est la somme des carrés des taux d'occupation
+        (CPU et RAM) des nœuds : il pénalise d'abord les nœuds les plus
+        chargés. Retourne le plan : moves, before, after, duration.
+        """
+        started = time.monotonic()
+        model = self.model(basis)
+        placement = model.vm_node.copy()
+        allowed = self._targets_allowed(model, exclude)
+        cpu, mem, mem_alloc = model.node_loads(placement)
+        moves = []
+        moved = np.zeros(len(model.vms), dtype=bool)
+
+        for _ in range(max_moves):
+            candidates = np.flatnonzero(model.vm_movable & ~moved)
+            if candidates.size == 0:
+                break
+            sources = placement[candidates]
+
+            # Variation de l'objectif pour chaque couple (VM candidate, nœud cible)
+            cpu_ratio, mem_ratio = model.ratios(cpu, mem)
+            vm_cpu = model.vm_cpu[candidates][:, None]
+            vm_mem = model.vm_mem[candidates][:, None]
+            src_cpu_cap = model.node_cpu[sources][:, None]
+            src_mem_cap = model.node_mem[sources][:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                src_cpu_after = cpu_ratio[sources][:, None] - vm_cpu / src_cpu_cap
+                src_mem_after = mem_ratio[sources][:, None] - vm_mem / src_mem_cap
+                tgt_cpu_after = cpu_ratio[None, :] + vm_cpu / model.node_cpu[None, :]
+                tgt_mem_after = mem_ratio[None, :] + vm_mem / model.node_mem[None, :]
+                tgt_alloc_after = (mem_alloc[None, :] + model.vm_alloc_mem[candidates][:, None]) / model.node_mem[None, :]
+
+            delta = (src_cpu_after ** 2 - cpu_ratio[sources][:, None] ** 2
+                     + src_mem_after ** 2 - mem_ratio[sources][:, None] ** 2
+                     + tgt_cpu_after ** 2 - cpu_ratio[None, :] ** 2
+                     + tgt_mem_after ** 2 - mem_ratio[None, :] ** 2)
+
+            feasible = (allowed[None, :]
+                        & (np.arange(len(model.node_names))[None, :] != sources[:, None])
+                        & (tgt_alloc_after <= self.mem_limit)
+                        & (tgt_cpu_after <= self._cpu_limit(model)))
+            delta = np.where(feasible, delta, np.inf)
+
+            best = np.argmin(delta)
+            row, target = np.unravel_index(best, delta.shape)
+            if not np.isfinite(delta[row, target]) or delta[row, target] > -min_gain:
+                break
+
+            vm = candidates[row]
+            source = placement[vm]
+            moves.append(self._move(model, vm, source, target))
+            placement[vm] = target
+            moved[vm] = True
+            for loads, weights in ((cpu, model.vm_cpu), (mem, model.vm_mem), (mem_alloc, model.vm_alloc_mem)):
+                loads[source] -= weights[vm]
+                loads[target] += weights[vm]
+
+        plan = {
+            "moves": moves,
+            "unplaced": [],
+            "before": model.summary(),
+            "after": model.summary(placement),
+            "duration": time.monotonic() - started
+        }
+        log_success(f"Plan de rééquilibrage: {len(moves)} migration(s) proposée(s) "
+                    f"en {plan['duration'] * 1000:.0f} ms", "Proxmox")
+        return plan
+
+    # === ÉVACUATION ===
+    def evacuate(self, node_name, basis="allocation", exclude=()):
+        """Répartit toutes les VMs de node_name sur les autres nœuds
+
+        Placement « plus grande d'abord » (first-fit decreasing sur la RAM) :
+        chaque VM va sur le nœud admissible dont l'occupation après
+        placement est la plus faible. Les VMs arrêtées sont placées ensuite
+        et migrées hors ligne (online False dans le mouvement). Les VMs sans
+        place sont listées dans unplaced.
+        """
+        started = time.monotonic()
+        model = self.model(basis, stopped_on=node_name)
+        if node_name not in model.node_index:
+            raise ValueError(f"Nœud inconnu: {node_name}")
+        source = model.node_index[node_name]
+
+        placement = model.vm_node.copy()
+        allowed = self._targets_allowed(model, tuple(exclude) + (node_name,))
+        cpu, mem, mem_alloc = model.node_loads(placement)
+        to_move = np.flatnonzero(placement == source)
+        to_move = to_move[np.lexsort((-model.vm_alloc_mem[to_move], ~model.vm_running[to_move]))]
+
+        moves, unplaced = [], []
+        for vm in to_move:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cpu_after = (cpu + model.vm_cpu[vm]) / model.node_cpu
+                mem_after = (mem + model.vm_mem[vm]) / model.node_mem
+                alloc_after = (mem_alloc + model.vm_alloc_mem[vm]) / model.node_mem
+            feasible = allowed & (alloc_after <= self.mem_limit) & (cpu_after <= self._cpu_limit(model))
+            if not model.vm_movable[vm] or not feasible.any():
+                unplaced.append(model.vms[vm]["vmid"])
+                continue
+
+            score = np.where(feasible, np.maximum(cpu_after, mem_after), np.inf)
+            target = int(np.argmin(score))
+            moves.append(self._move(model, vm, source, target))
+            placement[vm] = target
+            for loads, weights in ((cpu, model.vm_cpu), (mem, model.vm_mem), (mem_alloc, model.vm_alloc_mem)):
+                loads[source] -= weights[vm]
+                loads[target] += weights[vm]
+
+        plan = {
+            "moves": moves,
+            "unplaced": unplaced,
+            "before": model.summary(),
+            "after": model.summary(placement),
+            "duration": time.monotonic() - started
+        }
+        log_info(f"Plan d'évacuation de {node_name}: {len(moves)} migration(s), "
+                 f"{len(unplaced)} VM(s) sans place", "Proxmox")
+        return plan
@@ -0,0 +1,187 @@
+"""
+Provisionnement en masse de VMs par clonage d'un template
+"""
+import ipaddress
+import itertools
+import threading
+import time
+
+from ...core.logger import log_error, log_info, log_success
+from .concurrency import LimitedScheduler
+from .snapshots import vm_storages
+
+
+def ipconfig(ip, gateway=None, prefix=24):
+    """Valeur cloud-init ipconfig0 : 'ip=10.0.0.5/24,gw=10.0.0.1' (ou 'ip=dhcp')"""
+    if not ip or ip == "dhcp":
+        return "ip=dhcp"
+    interface = ipaddress.ip_interface(ip if "/" in ip else f"{ip}/{prefix}")
+    value = f"ip={interface.with_prefixlen}"
+    if gateway:
+        value += f",gw={gateway}"
+    return value
+
+
+class ProvisioningPipeline:
+    """Clone un template en de nombreuses VMs en parallèle
+
+    Les vmids sont réservés en une fois à partir de l'inventaire ; les
+    clones sont répartis sur les nœuds cibles et lancés avec des limites
+    par nœud et par stockage. Dès qu'un clone est terminé (suivi par son
+    UPID), sa configuration (nom, cloud-init) est appliquée en un seul
+    appel, sans attendre les autres clones.
+    """
+
+    def __init__(self, handler, max_parallel=16, per_node=4, per_storage=4):
+        self.handler = handler
+        self.max_parallel = max_parallel
+        self.per_node = per_node
+        self.per_storage = per_storage
+        self._lock = threading.Lock()
+        self._used = set()
+        self._next = 100
+
+    # === VMIDS ===
+    def allocate_vmids(self, count, start=None):
+        """Réserve count vmids libres à partir de start (par défaut /cluster/nextid)"""
+        inventory = self.handler.inventory
+        inventory.refresh(force=True)
+        with self._lock:
+            self._used = {int(res["vmid"]) for res in inventory.resources
+                          if res.get("type") in ("qemu", "lxc") and "vmid" in res}
+            self._next = int(start or self.handler.proxmox.cluster.nextid.get())
+        return [self._take_vmid() for _ in range(count)]
+
+    def _take_vmid(self):
+        with self._lock:
+            vmid = next(candidate for candidate in itertools.count(self._next) if candidate not in self._used)
+            self._used.add(vmid)
+            self._next = vmid + 1
+            return vmid
+
+    # === CONFIGURATION ===
+    @staticmethod
+    def vm_config(spec, gateway=None, prefix=24, extra=None):
+        """Paramètres appliqués au clone : cloud-init réseau et clés supplémentaires"""
+        config = dict(extra or {})
+        if spec.get("ip"):
+            config["ipconfig0"] = ipconfig(spec["ip"], spec.get("gateway", gateway), spec.get("prefix", prefix))
+        if spec.get("nameserver"):
+            config["nameserver"] = spec["nameserver"]
+        config.update(spec.get("config", {}))
+        return config
+
+    # === PIPELINE ===
+    def run(self, template_vmid, specs, linked=True, target_nodes=None, storage=None, gateway=None,
+            prefix=24, extra_config=None, start=False, callback=None, timeout=900):
+        """Crée une VM par spec (dict name, et optionnellement ip, gateway, prefix, nameserver, config)
+
+        linked=True crée des clones liés (instantanés, sur le stockage du
+        template) ; sinon des clones complets, vers storage si indiqué.
+        target_nodes répartit les clones en tourniquet (défaut : nœud du
+        template). callback(événement) reçoit les états started, cloned,
+        done et failed. Retourne le résumé : total, succeeded, failed,
+        results (vmid, name, node, durée) et duration.
+        """
+        started = time.monotonic()
+        template = self.handler.inventory.find_vm(template_vmid)
+        if template is None:
+            raise ValueError(f"Template {template_vmid} introuvable")
+        if not template.get("template"):
+            raise ValueError(f"La VM {template_vmid} n'est pas un template")
+
+        source_node = template["node"]
+        targets = list(target_nodes or [source_node])
+        if storage and not linked:
+            storages = frozenset([storage])
+        else:
+            storages = vm_storages(self.handler._get_vm_config(source_node, template_vmid, template))
+
+        vmids = self.allocate_vmids(len(specs))
+        jobs = [{
+            "vmid": vmid,
+            "name": spec["name"],
+            "node": targets[index % len(targets)],
+            "config": self.vm_config(spec, gateway, prefix, extra_config),
+        } for index, (vmid, spec) in enumerate(zip(vmids, specs))]
+
+        log_info(f"Provisionnement de {len(jobs)} VM(s) depuis le template {template_vmid} "
+                 f"({'clones liés' if linked else 'clones complets'}) - vmids {vmids[0]}..{vmids[-1]}"
+                 if jobs else "Aucune VM à provisionner", "Proxmox")
+        summary = {"total": len(jobs), "succeeded": 0, "failed": 0, "results": []}
+
+        def notify(event):
+            if callback:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_error(f"Erreur callback provisionnement: {e}", "Proxmox")
+
+        def worker(job):
+            notify(self._event(job, "started"))
+            begin = time.monotonic()
+            result = self._clone(template_vmid, source_node, job, linked, storage, timeout)
+            if not result["success"]:
+                return {**result, "duration": time.monotonic() - begin}
+            notify(self._event(job, "cloned", duration=time.monotonic() - begin))
+
+            vm = self.handler.proxmox.nodes(job["node"]).qemu(job["vmid"])
+            if job["config"]:
+                # Configuration synchrone (PUT) : toutes les clés en un seul appel
+                vm.config.put(**job["config"])
+            if start:
+                result = self.handler.task_waiter.wait(vm.status.start.post(), timeout=180)
+            return {**result, "duration": time.monotonic() - begin}
+
+        scheduler = LimitedScheduler(self.max_parallel, {"node": self.per_node, "storage": self.per_storage})
+        keys = lambda job: {"node": job["node"], "storage": storages}
+
+        for job, result, error in scheduler.run(jobs, worker, keys=keys):
+            if error is not None:
+                event = self._event(job, "failed", message=str(error))
+            elif result["success"]:
+                event = self._event(job, "done", duration=result["duration"])
+            else:
+                event = self._event(job, "failed", duration=result["duration"],
+                                    message=result["exitstatus"] or result["status"])
+            summary["succeeded" if event["state"] == "done" else "failed"] += 1
+            summary["results"].append(event)
+            notify(event)
+
+        self.handler.inventory.refresh(force=True)
+        summary["duration"] = time.monotonic() - started
+        if summary["failed"]:
+            log_error(f"Provisionnement : {summary['failed']} échec(s) sur {summary['total']} VM(s)", "Proxmox")
+        log_success(f"Provisionnement terminé en {summary['duration']:.0f}s - "
+                    f"{summary['succeeded']}/{summary['total']} VM(s) prête(s)", "Proxmox")
+        return summary
+
+    def _clone(self, template_vmid, source_node, job, linked, storage, timeout):
+        """Lance le clone et attend sa fin ; un vmid pris entre-temps est remplacé une fois"""
+        for attempt in range(2):
+            params = {"newid": job["vmid"], "name": job["name"], "full": 0 if linked else 1}
+            if job["node"] != source_node:
+                params["target"] = job["node"]
+            if storage and not linked:
+                params["storage"] = storage
+            try:
+                upid = self.handler.proxmox.nodes(source_node).qemu(template_vmid).clone.post(**params)
+            except Exception as e:
+                if attempt == 0 and "already exists" in str(e):
+                    job["vmid"] = self._take_vmid()
+                    continue
+                raise
+            if not linked:
+                # Un clone complet peut durer : sa progression est suivie en direct
+                self.handler.task_tailer.follow(upid, job["name"], "Proxmox")
+            return self.handler.task_waiter.wait(upid, timeout=timeout)
+
+    def _event(self, job, state, duration=None, message=""):
+        return {
+            "vmid": job["vmid"],
+            "name": job["name"],
+            "node": job["node"],
+            "state": state,  # started, cloned, done, failed
+            "duration": duration,
+            "message": message
+        }
@@ -1,9 +1,336 @@
 """
-Client API Proxmox
+Client API Proxmox asynchrone
 """
+import asyncio
+import threading
+
+import aiohttp
+
+from ...core.logger import log_debug, log_error, log_info, log_success
+from .config_cache import agent_enabled
+from .inventory import merge_storages
+from .task_waiter import parse_upid
+
+
+class ProxmoxAPIError(Exception):
+    """Erreur HTTP renvoyée par l'API Proxmox"""
+
+    def __init__(self, status, reason, path):
+        super().__init__(f"{status} {reason} ({path})")
+        self.status = status
+        self.reason = reason
+        self.path = path
+
 
 class ProxmoxClient:
+    """Client asynchrone de l'API Proxmox (aiohttp)
+
+    Une seule session HTTP est partagée : les connexions sont gardées
+    ouvertes (keep-alive) et mises en commun, si bien que des milliers de
+    requêtes peuvent être en vol sur une même boucle d'événements.
+
+    Le client reprend l'authentification de l'AuthManager du handler (token
+    API ou ticket du trousseau, renouvelé en arrière-plan) : aucun login
+    n'est fait ici. Il couvre les lectures en masse de ProxmoxHandler
+    (inventaire, statut détaillé et agent des VMs, stockages, nœuds) et les
+    actions simples de cycle de vie, avec les mêmes formats de retour ; les
+    opérations orchestrées (migrations, snapshots, sauvegardes, clones,
+    contenu et envoi vers les stockages) restent sur ProxmoxHandler.
+    """
+
+    LINUX_MARKERS = ('linux', 'ubuntu', 'debian', 'centos', 'rhel')
+
+    def __init__(self, auth, host=None, max_connections=64, max_per_host=32, timeout=30):
+        self.auth = auth
+        self.host = host or auth.config['ip']
+        self.base_url = auth.base_url(self.host)
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.session = None
+
+    # === SESSION ===
+    async def connect(self):
+        """Ouvre la session HTTP (l'authentification est celle de l'AuthManager)"""
+        if self.auth.config is None:
+            raise RuntimeError("AuthManager non connecté")
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            keepalive_timeout=60,
+            ssl=None if self.auth.config.get('verify_ssl', False) else False
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        log_success(f"Client asynchrone prêt pour {self.host}", "Proxmox")
+        return True
+
+    async def close(self):
+        """Ferme la session HTTP et ses connexions"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _raw_request(self, method, path, params=None, data=None):
+        # Cookie posé explicitement : le cookie jar d'aiohttp ignore les hôtes donnés par IP
+        headers = self.auth.headers(method)
+        async with self.session.request(method, self.base_url + path, params=params,
+                                        data=data, headers=headers) as response:
+            if response.status >= 400:
+                raise ProxmoxAPIError(response.status, response.reason, path)
+            payload = await response.json()
+            return payload.get("data")
+
+    async def get(self, path, **params):
+        return await self._raw_request("GET", path, params=params or None)
+
+    async def post(self, path, **data):
+        return await self._raw_request("POST", path, data=data or None)
+
+    async def put(self, path, **data):
+        return await self._raw_request("PUT", path, data=data or None)
+
+    # === OPÉRATIONS ===
+    async def get_version(self):
+        """Récupère la version de Proxmox"""
+        version_info = await self.get("/version")
+        return version_info.get("version", "N/A")
+
+    async def cluster_resources(self, resource_type=None):
+        """Instantané /cluster/resources (optionnellement filtré par type)"""
+        params = {"type": resource_type} if resource_type else {}
+        return await self.get("/cluster/resources", **params)
+
+    async def list_vms(self):
+        """Récupère la liste de toutes les VMs du cluster"""
+        resources = await self.cluster_resources("vm")
+        return [{
+            "vmid": vm.get("vmid"),
+            "name": vm.get("name"),
+            "status": vm.get("status"),
+            "node": vm.get("node")
+        } for vm in resources if vm.get("type") == "qemu"]
+
+    async def get_node_status(self):
+        """Récupère le statut (CPU, RAM, uptime) de tous les nœuds"""
+        resources = await self.cluster_resources("node")
+        return [{
+            "node": node["node"],
+            "cpu": node.get("cpu", 0),
+            "mem_total": node.get("maxmem", 0),
+            "mem_used": node.get("mem", 0),
+            "uptime": node.get("uptime", 0),
+            "status": node.get("status", "unknown")
+        } for node in resources]
+
+    async def get_storage_info(self):
+        """Récupère les informations de stockage du cluster (stockages partagés une seule fois)"""
+        return merge_storages(await self.cluster_resources("storage"))
+
+    async def get_vm_status(self, node_name, vmid):
+        """Récupère le statut actuel d'une VM"""
+        try:
+            status = await self.get(f"/nodes/{node_name}/qemu/{vmid}/status/current")
+            return status.get('status', 'unknown')
+        except Exception:
+            return 'unknown'
+
+    async def get_vm_ip(self, node_name, vmid):
+        """Récupère l'adresse IPv4 principale d'une VM via l'agent"""
+        try:
+            interfaces = await self.get(f"/nodes/{node_name}/qemu/{vmid}/agent/network-get-interfaces")
+            for iface in interfaces.get('result', []):
+                for addr in iface.get("ip-addresses", []):
+                    ip = addr.get("ip-address")
+                    if ip and not ip.startswith("127.") and ":" not in ip:
+                        return ip
+        except Exception:
+            pass
+        return "IP non disponible"
+
+    async def get_vm_detailed_status(self, node_name, vmid, resource=None):
+        """Récupère le statut détaillé d'une VM incluant QEMU Agent"""
+        try:
+            base = f"/nodes/{node_name}/qemu/{vmid}"
+            if resource is not None:
+                vm_config = await self.get(f"{base}/config")
+                vm_status = resource
+            else:
+                vm_config, vm_status = await asyncio.gather(
+                    self.get(f"{base}/config"), self.get(f"{base}/status/current")
+                )
+
+            agent_on = agent_enabled(vm_config)
+            vm_info = {
+                "vmid": vmid,
+                "name": vm_config.get('name', f"VM-{vmid}"),
+                "status": vm_status.get('status', 'unknown'),
+                "node": node_name,
+                "agent_enabled": agent_on,
+                "agent_running": False,
+                "ip": "Non disponible",
+                "os_type": "unknown",
+                "can_install_agent": False
+            }
+
+            if vm_info["status"] != "running":
+                return vm_info
+
+            agent_ok = False
+            if agent_on:
+                try:
+                    await self.post(f"{base}/agent/ping")
+                    agent_ok = True
+                except Exception:
+                    pass
+
+            if agent_ok:
+                vm_info["agent_running"] = True
+                ip, os_info = await asyncio.gather(
+                    self.get_vm_ip(node_name, vmid),
+                    self.get(f"{base}/agent/os-info"),
+                    return_exceptions=True
+                )
+                if isinstance(ip, str):
+                    vm_info["ip"] = ip
+                if isinstance(os_info, dict):
+                    os_name = os_info.get('result', os_info).get('name', '').lower()
+                    if 'windows' in os_name:
+                        vm_info["os_type"] = "windows"
+                    elif any(x in os_name for x in self.LINUX_MARKERS):
+                        vm_info["os_type"] = "linux"
+                    vm_info["can_install_agent"] = True
+            else:
+                os_type = vm_config.get('ostype', '')
+                if os_type.startswith('win'):
+                    vm_info["os_type"] = "windows"
+                    vm_info["can_install_agent"] = True
+                elif os_type.startswith('l') or 'linux' in os_type:
+                    vm_info["os_type"] = "linux"
+                    vm_info["can_install_agent"] = True
+
+            return vm_info
+
+        except Exception as e:
+            log_error(f"Erreur statut VM {vmid}: {e}", "Proxmox")
+            return None
+
+    async def get_all_vms_with_agent_status(self, max_in_flight=200):
+        """Récupère toutes les VMs avec leur statut QEMU Agent, toutes en parallèle"""
+        resources = await self.cluster_resources("vm")
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def fetch(vm):
+            async with semaphore:
+                return await self.get_vm_detailed_status(vm['node'], vm['vmid'], resource=vm)
+
+        results = await asyncio.gather(*(fetch(vm) for vm in resources if vm.get("type") == "qemu"))
+        vms_detailed = [vm for vm in results if vm]
+        log_success(f"Analyse terminée - {len(vms_detailed)} VMs analysées", "Tools")
+        return vms_detailed
+
+    async def get_linux_vms(self):
+        """Récupère les VMs Linux en cours d'exécution avec leurs IPs"""
+        resources = await self.cluster_resources("vm")
+
+        async def probe(vm):
+            base = f"/nodes/{vm['node']}/qemu/{vm['vmid']}"
+            try:
+                info = await self.get(f"{base}/agent/os-info")
+            except Exception:
+                return None
+            os_name = info.get('result', info).get('name', '').lower()
+            if not any(x in os_name for x in self.LINUX_MARKERS):
+                return None
+            return {
+                "vmid": vm['vmid'],
+                "name": vm.get('name', f"VM-{vm['vmid']}"),
+                "ip": await self.get_vm_ip(vm['node'], vm['vmid']),
+                "node": vm['node']
+            }
+
+        running = [vm for vm in resources if vm.get("type") == "qemu" and vm.get("status") == "running"]
+        results = await asyncio.gather(*(probe(vm) for vm in running))
+        return [vm for vm in results if vm]
+
+    async def enable_qemu_agent_in_config(self, node_name, vmid):
+        """Active l'agent QEMU dans la configuration de la VM"""
+        try:
+            await self.put(f"/nodes/{node_name}/qemu/{vmid}/config", agent=1)
+            return True
+        except Exception as e:
+            log_error(f"Échec activation agent VM {vmid}: {e}", "Installation")
+            return False
+
+    async def wait_task(self, upid, timeout=180, initial_interval=0.2, max_interval=5.0):
+        """Attend la fin d'une tâche avec un intervalle de polling croissant"""
+        node = parse_upid(upid)["node"]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        interval = initial_interval
+        while loop.time() - started < timeout:
+            await asyncio.sleep(interval)
+            try:
+                status = await self.get(f"/nodes/{node}/tasks/{upid}/status")
+            except Exception as e:
+                log_debug(f"Statut tâche {upid} indisponible: {e}", "Proxmox")
+                status = {}
+            if status.get("status") == "stopped":
+                exitstatus = status.get("exitstatus", "")
+                return {"upid": upid, "status": "stopped", "exitstatus": exitstatus,
+                        "success": exitstatus == "OK", "duration": loop.time() - started}
+            interval = min(interval * 1.5, max_interval)
+        return {"upid": upid, "status": "timeout", "exitstatus": "timeout",
+                "success": False, "duration": loop.time() - started}
+
+    async def vm_action(self, node_name, vmid, action, timeout=180):
+        """Lance start/stop/shutdown/reboot sur une VM et attend la fin de la tâche"""
+        upid = await self.post(f"/nodes/{node_name}/qemu/{vmid}/status/{action}")
+        return await self.wait_task(upid, timeout=timeout)
+
+    async def start_vm(self, node_name, vmid, timeout=180):
+        return await self.vm_action(node_name, vmid, "start", timeout)
+
+    async def shutdown_vm(self, node_name, vmid, timeout=120):
+        return await self.vm_action(node_name, vmid, "shutdown", timeout)
+
+
+class AsyncLoopThread:
+    """Boucle asyncio dédiée, exécutée dans un thread de fond
+
+    Permet d'appeler le client asynchrone depuis le code synchrone (threads
+    Qt compris) : run() soumet une coroutine et retourne un Future.
+    """
+
     def __init__(self):
-        """Initialisation de ProxmoxClient"""
-        # TODO: Implémentation
-        pass
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="ProxmoxAsyncLoop", daemon=True)
+        self.thread.start()
+        log_debug("Boucle asyncio Proxmox démarrée", "Proxmox")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro):
+        """Soumet une coroutine à la boucle (retourne un concurrent.futures.Future)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout=None):
+        """Exécute une coroutine et attend son résultat"""
+        return self.run(coro).result(timeout)
+
+    def stop(self):
+        """Arrête la boucle et attend la fin du thread"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        log_info("Boucle asyncio Proxmox arrêtée", "Proxmox")
@@ -0,0 +1,101 @@
+"""
+Cache des réponses de l'API Proxmox
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Cache TTL borné (éviction LRU) des réponses Proxmox
+
+    Les clés sont des tuples, par exemple ("cluster", "resources") ou
+    ("vm", "100", "status"). Chaque entrée est rattachée à une catégorie
+    d'endpoint qui détermine sa durée de vie.
+    """
+
+    # Durées de vie par catégorie d'endpoint (secondes)
+    DEFAULT_TTLS = {
+        "cluster/resources": 5,
+        "version": 300,
+        "vm/status": 3,
+    }
+    DEFAULT_TTL = 5
+
+    def __init__(self, max_entries=4096, ttls=None):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries = OrderedDict()  # clé -> (expiration, valeur)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_fetch(self, endpoint, key, fetch):
+        """Retourne la valeur en cache ou appelle fetch() et la mémorise
+
+        Les exceptions levées par fetch() ne sont pas mises en cache.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+
+        value = fetch()
+        self.put(endpoint, key, value)
+        return value
+
+    def put(self, endpoint, key, value):
+        """Mémorise une valeur pour la durée de vie de sa catégorie"""
+        ttl = self.ttls.get(endpoint, self.DEFAULT_TTL)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Supprime une entrée"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_prefix(self, *prefix):
+        """Supprime toutes les entrées dont la clé commence par prefix"""
+        size = len(prefix)
+        with self._lock:
+            for key in [k for k in self._entries if k[:size] == prefix]:
+                del self._entries[key]
+
+    def invalidate_vm(self, vmid):
+        """Supprime les entrées d'une VM ainsi que l'instantané du cluster"""
+        self.invalidate_prefix("vm", str(vmid))
+        self.invalidate(("cluster", "resources"))
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Statistiques d'utilisation du cache"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
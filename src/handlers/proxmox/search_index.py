@@ -0,0 +1,207 @@
+"""
+Index de recherche en mémoire sur l'inventaire des VMs
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from ...core.logger import log_debug
+
+TOKEN_SPLIT = re.compile(r"[^\w.:-]+")
+PART_SPLIT = re.compile(r"[.:_-]+")
+
+
+def trigrams(text):
+    """Trigrammes d'un texte normalisé (les termes courts sont complétés par des espaces)"""
+    padded = f" {text} " if len(text) < 3 else text
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class VmSearchIndex:
+    """Index inversé et index de trigrammes sur les VMs du cluster
+
+    Les champs indexés sont le nom, le vmid, le nœud, les tags, la
+    description (configuration en cache) et les adresses IP remontées par
+    l'agent (faits invités en cache) : l'indexation ne déclenche aucune
+    requête. Chaque document porte une signature ; sync() ne réindexe que
+    les VMs dont la signature a changé.
+
+    Recherche : chaque terme de la requête doit correspondre (ET). Un
+    terme est cherché par mot exact ou préfixe (index inversé trié), puis
+    par sous-chaîne (intersection des listes de trigrammes, vérifiée sur
+    le texte), et à défaut par similarité de trigrammes (recherche floue).
+    """
+
+    FUZZY_THRESHOLD = 0.5  # Part minimale des trigrammes du terme présents dans la VM
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._lock = threading.RLock()
+        self._docs = {}  # vmid -> {"signature", "text", "tokens", "grams", "name"}
+        self._tokens = {}  # mot -> ensemble de vmids
+        self._grams = {}  # trigramme -> ensemble de vmids
+        self._sorted_tokens = None  # Liste triée pour la recherche par préfixe, recalculée à la demande
+
+    def __len__(self):
+        return len(self._docs)
+
+    # === DOCUMENTS ===
+    def _fields(self, vm):
+        vmid = str(vm["vmid"])
+        config = self.handler.config_cache.peek(vmid) or {}
+        facts = self.handler.guest_facts.peek(vmid) or {}
+        tags = [tag for tag in re.split(r"[;,\s]+", vm.get("tags") or config.get("tags") or "") if tag]
+        return (
+            vm.get("name") or "",
+            vmid,
+            vm.get("node") or "",
+            tuple(tags),
+            config.get("description") or "",
+            tuple(facts.get("ipv4", [])) + tuple(facts.get("ipv6", []))
+        )
+
+    @staticmethod
+    def _tokenize(fields):
+        name, vmid, node, tags, description, ips = fields
+        text = " ".join([name, vmid, node, *tags, description, *ips]).lower()
+        tokens = set()
+        for word in TOKEN_SPLIT.split(text):
+            if word:
+                tokens.add(word)
+                # web-01.lab : aussi 'web', '01' et 'lab'
+                tokens.update(part for part in PART_SPLIT.split(word) if part)
+        return text, tokens
+
+    def _add(self, vmid, fields):
+        text, tokens = self._tokenize(fields)
+        grams = trigrams(text)
+        self._docs[vmid] = {"signature": fields, "text": text, "tokens": tokens, "grams": grams,
+                            "name": fields[0].lower()}
+        for token in tokens:
+            postings = self._tokens.get(token)
+            if postings is None:
+                self._tokens[token] = postings = set()
+                self._sorted_tokens = None
+            postings.add(vmid)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(vmid)
+
+    def _remove(self, vmid):
+        doc = self._docs.pop(vmid, None)
+        if doc is None:
+            return
+        for token in doc["tokens"]:
+            postings = self._tokens.get(token)
+            if postings is not None:
+                postings.discard(vmid)
+                if not postings:
+                    del self._tokens[token]
+                    self._sorted_tokens = None
+        for gram in doc["grams"]:
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(vmid)
+                if not postings:
+                    del self._grams[gram]
+
+    # === MISE À JOUR ===
+    def update(self, vm):
+        """Indexe ou réindexe une VM (entrée d'inventaire) si ses champs ont changé"""
+        vmid = str(vm["vmid"])
+        fields = self._fields(vm)
+        with self._lock:
+            doc = self._docs.get(vmid)
+            if doc is not None and doc["signature"] == fields:
+                return False
+            self._remove(vmid)
+            self._add(vmid, fields)
+            return True
+
+    def refresh_vm(self, vmid):
+        """Réindexe une VM de l'inventaire (après une mise à jour de ses faits ou de sa config)"""
+        vm = self.handler.inventory.find_vm(vmid)
+        if vm is not None:
+            self.update(vm)
+
+    def remove(self, vmid):
+        with self._lock:
+            self._remove(str(vmid))
+
+    def sync(self, vms=None):
+        """Aligne l'index sur l'inventaire : ajouts, modifications et suppressions
+
+        Retourne le nombre de VMs réindexées ou retirées.
+        """
+        inventory = self.handler.inventory
+        vms = vms if vms is not None else [res for res in inventory.resources if res.get("type") in ("qemu", "lxc")]
+        changed = 0
+        with self._lock:
+            present = set()
+            for vm in vms:
+                present.add(str(vm["vmid"]))
+                changed += self.update(vm)
+            for vmid in set(self._docs) - present:
+                self._remove(vmid)
+                changed += 1
+        if changed:
+            log_debug(f"Index de recherche: {changed} VM(s) réindexée(s), {len(self._docs)} au total", "Inventory")
+        return changed
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._tokens.clear()
+            self._grams.clear()
+            self._sorted_tokens = None
+
+    # === RECHERCHE ===
+    def search(self, query, limit=None, fuzzy=True):
+        """vmids correspondant à la requête, les plus pertinents d'abord"""
+        terms = [term for term in query.lower().split() if term]
+        if not terms:
+            return []
+        with self._lock:
+            scores = None
+            for term in terms:
+                matches = self._match_term(term, fuzzy)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {vmid: scores[vmid] + score for vmid, score in matches.items() if vmid in scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores, key=lambda vmid: (-scores[vmid], self._docs[vmid]["name"], vmid))
+        return ranked[:limit] if limit else ranked
+
+    def _match_term(self, term, fuzzy):
+        """{vmid: score} pour un terme : mot exact 4, nom 3, préfixe 2, sous-chaîne 1, flou < 1"""
+        scores = {vmid: 4.0 for vmid in self._tokens.get(term, ())}
+
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._tokens)
+        index = bisect_left(self._sorted_tokens, term)
+        while index < len(self._sorted_tokens) and self._sorted_tokens[index].startswith(term):
+            for vmid in self._tokens[self._sorted_tokens[index]]:
+                scores.setdefault(vmid, 2.0)
+            index += 1
+
+        if len(term) >= 3:
+            postings = sorted((self._grams.get(gram, set()) for gram in trigrams(term)), key=len)
+            if postings and postings[0]:
+                candidates = postings[0].intersection(*postings[1:])
+                for vmid in candidates:
+                    doc = self._docs[vmid]
+                    if term in doc["name"]:
+                        scores[vmid] = max(scores.get(vmid, 0), 3.0)
+                    elif term in doc["text"]:
+                        scores.setdefault(vmid, 1.0)
+
+        if not scores and fuzzy and len(term) >= 3:
+            grams = trigrams(term)
+            counts = Counter()
+            for gram in grams:
+                counts.update(self._grams.get(gram, ()))
+            minimum = max(1, int(len(grams) * self.FUZZY_THRESHOLD + 0.5))
+            scores = {vmid: count / len(grams) * 0.9 for vmid, count in counts.items() if count >= minimum}
+        return scores
@@ -0,0 +1,180 @@
+"""
+Snapshots en masse : création, liste, retour arrière et purge
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ...core.logger import log_debug, log_error, log_info, log_success
+from .concurrency import LimitedScheduler
+
+DISK_KEY = re.compile(r"^(?:ide|sata|scsi|virtio|efidisk|tpmstate)\d+$")
+
+
+def vm_storages(vm_config):
+    """Stockages portant les disques d'une VM (lecteurs CD et volumes non utilisés exclus)"""
+    storages = set()
+    for key, value in (vm_config or {}).items():
+        if not DISK_KEY.match(key) or not isinstance(value, str) or "media=cdrom" in value:
+            continue
+        volume = value.split(",")[0]
+        if ":" in volume:
+            storages.add(volume.split(":")[0])
+    return frozenset(storages)
+
+
+class SnapshotEngine:
+    """Applique une opération de snapshot à un ensemble de VMs en parallèle
+
+    Le snapshot sollicite surtout le stockage des disques : en plus d'une
+    limite globale et par nœud, le nombre d'opérations simultanées est
+    limité par stockage (per_storage). Chaque opération est suivie par son
+    UPID ; la durée de chaque VM et la durée totale sont rapportées.
+    """
+
+    ACTIONS = ("create", "rollback", "delete")
+
+    def __init__(self, handler, max_parallel=32, per_node=8, per_storage=4):
+        self.handler = handler
+        self.max_parallel = max_parallel
+        self.per_node = per_node
+        self.per_storage = per_storage
+
+    def _api(self, vm):
+        return self.handler.proxmox.nodes(vm["node"]).qemu(vm["vmid"]).snapshot
+
+    def _storages(self, vm):
+        try:
+            return vm_storages(self.handler._get_vm_config(vm["node"], vm["vmid"],
+                                                           self.handler.inventory.find_vm(vm["vmid"])))
+        except Exception as e:
+            log_debug(f"Configuration de la VM {vm['vmid']} indisponible: {e}", "Proxmox")
+            return frozenset()
+
+    # === LISTE ===
+    def list(self, vms, max_workers=16):
+        """Snapshots de chaque VM, du plus ancien au plus récent : {vmid: [snapshot]}"""
+        def fetch(vm):
+            snapshots = [snap for snap in self._api(vm).get() or [] if snap.get("name") != "current"]
+            snapshots.sort(key=lambda snap: snap.get("snaptime", 0))
+            return snapshots
+
+        result = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(vm, executor.submit(fetch, vm)) for vm in vms]
+            for vm, future in futures:
+                try:
+                    result[str(vm["vmid"])] = future.result()
+                except Exception as e:
+                    log_error(f"Snapshots de la VM {vm['vmid']} indisponibles: {e}", "Proxmox")
+        return result
+
+    # === OPÉRATIONS ===
+    def run(self, vms, action, name, callback=None, timeout=600, vmstate=False, description=""):
+        """Crée, restaure (rollback) ou supprime le snapshot name sur toutes les VMs
+
+        vms : dicts avec vmid, node et si possible name. callback(événement)
+        est appelé au lancement et à la fin de chaque VM. Retourne le
+        résumé : total, succeeded, failed, duration et results.
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"Action snapshot inconnue: {action}")
+
+        def operation(vm):
+            api = self._api(vm)
+            if action == "create":
+                params = {"snapname": name, "vmstate": 1 if vmstate else 0}
+                if description:
+                    params["description"] = description
+                return [api.post(**params)]
+            if action == "rollback":
+                return [api(name).rollback.post()]
+            return [api(name).delete()]
+
+        return self._execute(vms, action, name, operation, callback, timeout)
+
+    def prune(self, vms, keep=3, prefix="", callback=None, timeout=600):
+        """Supprime les snapshots les plus anciens commençant par prefix, en gardant les keep plus récents
+
+        Les suppressions d'une même VM sont enchaînées (Proxmox verrouille
+        la VM pendant chaque opération) ; les VMs sont traitées en parallèle.
+        """
+        snapshots = self.list(vms)
+
+        def operation(vm):
+            candidates = [snap for snap in snapshots.get(str(vm["vmid"]), [])
+                          if snap.get("name", "").startswith(prefix)]
+            expired = candidates[:-keep] if keep > 0 else candidates
+            upids = []
+            for snap in expired:
+                upid = self._api(vm)(snap["name"]).delete()
+                result = self.handler.task_waiter.wait(upid, timeout=timeout)
+                if not result["success"]:
+                    raise RuntimeError(f"Suppression de {snap['name']}: {result['exitstatus'] or result['status']}")
+                upids.append(upid)
+            return upids
+
+        return self._execute(vms, "prune", prefix or "*", operation, callback, timeout, wait=False)
+
+    def _execute(self, vms, action, name, operation, callback, timeout, wait=True):
+        log_info(f"Snapshot '{action}' ({name}) sur {len(vms)} VM(s)", "Proxmox")
+        started = time.monotonic()
+        summary = {"total": len(vms), "succeeded": 0, "failed": 0, "results": []}
+
+        def notify(event):
+            if callback:
+                try:
+                    callback(event)
+                except Exception as e:
+                    log_error(f"Erreur callback snapshot: {e}", "Proxmox")
+
+        def worker(job):
+            vm = job["vm"]
+            notify(self._event(vm, action, name, "started"))
+            begin = time.monotonic()
+            self.handler._invalidate_vm(vm["vmid"])
+            upids = operation(vm)
+            result = {"success": True, "exitstatus": "OK"}
+            if wait:
+                result = self.handler.task_waiter.wait(upids[0], timeout=timeout)
+            self.handler._invalidate_vm(vm["vmid"])
+            return {**result, "duration": time.monotonic() - begin, "count": len(upids)}
+
+        # Stockages de chaque VM lus en parallèle avant le lancement (config en cache)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            jobs = [{"vm": vm, "storages": storages} for vm, storages in zip(vms, executor.map(self._storages, vms))]
+        scheduler = LimitedScheduler(self.max_parallel, {"node": self.per_node, "storage": self.per_storage})
+        keys = lambda job: {"node": job["vm"]["node"], "storage": job["storages"]}
+
+        for job, result, error in scheduler.run(jobs, worker, keys=keys):
+            vm = job["vm"]
+            if error is not None:
+                event = self._event(vm, action, name, "failed", message=str(error))
+            elif result["success"]:
+                event = self._event(vm, action, name, "done", duration=result["duration"],
+                                    message=f"{result['count']} snapshot(s)" if action == "prune" else "")
+            else:
+                event = self._event(vm, action, name, "failed", duration=result["duration"],
+                                    message=result["exitstatus"] or result["status"])
+            summary["succeeded" if event["state"] == "done" else "failed"] += 1
+            summary["results"].append(event)
+            notify(event)
+
+        summary["duration"] = time.monotonic() - started
+        if summary["failed"]:
+            log_error(f"Snapshot '{action}' : {summary['failed']} échec(s) sur {summary['total']} VM(s)", "Proxmox")
+        log_success(f"Snapshot '{action}' terminé en {summary['duration']:.1f}s - "
+                    f"{summary['succeeded']}/{summary['total']} VM(s)", "Proxmox")
+        return summary
+
+    def _event(self, vm, action, name, state, duration=None, message=""):
+        return {
+            "vmid": vm.get("vmid"),
+            "name": vm.get("name", f"VM-{vm.get('vmid')}"),
+            "node": vm.get("node"),
+            "action": action,
+            "snapshot": name,
+            "state": state,  # started, done, failed
+            "duration": duration,
+            "message": message
+        }
@@ -0,0 +1,148 @@
+"""
+Suivi en direct des journaux de tâches Proxmox
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ...core.logger import log_debug, log_error, log_info, log_success
+from .task_waiter import parse_upid
+
+
+def log_task_line(label, line, component="Proxmox"):
+    """Journalise une ligne du journal d'une tâche, préfixée par son libellé"""
+    if line.startswith("TASK ERROR"):
+        log_error(f"{label}: {line}", component)
+    elif line == "TASK OK":
+        log_success(f"{label}: {line}", component)
+    else:
+        log_info(f"{label}: {line}", component)
+
+
+class TaskLogTailer:
+    """Diffuse les nouvelles lignes des journaux de nombreuses tâches
+
+    Une seule boucle de suivi (démarrée au premier follow, arrêtée quand
+    plus aucune tâche n'est suivie) lit à chaque tour le journal de toutes
+    les tâches à partir de leur dernière ligne connue : seules les lignes
+    nouvelles sont téléchargées. La fin d'une tâche est détectée par la
+    ligne finale 'TASK OK' / 'TASK ERROR' ; le statut n'est interrogé
+    qu'après plusieurs tours sans nouvelle ligne.
+    """
+
+    STATUS_EVERY = 5  # Tours sans nouvelle ligne avant de vérifier le statut
+    MAX_ERRORS = 30  # Erreurs consécutives avant d'abandonner le suivi d'une tâche
+    PAGE_SIZE = 500
+
+    def __init__(self, handler, interval=1.0, max_workers=8):
+        self.handler = handler
+        self.interval = interval
+        self.max_workers = max_workers
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def follow(self, upid, label=None, component="Proxmox", callback=None):
+        """Suit le journal de la tâche upid jusqu'à sa fin
+
+        Chaque ligne est journalisée sous component ; callback(upid, ligne)
+        est appelé en plus pour chaque ligne si fourni. Retourne un
+        threading.Event positionné une fois la dernière ligne lue.
+        """
+        with self._lock:
+            if upid in self._tasks:
+                return self._tasks[upid]["done"]
+            done = threading.Event()
+            self._tasks[upid] = {
+                "label": label or self._default_label(upid),
+                "component": component,
+                "callback": callback,
+                "offset": 0,
+                "idle": 0,
+                "errors": 0,
+                "done": done
+            }
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._loop, name="task-log-tailer", daemon=True)
+                self._thread.start()
+        return done
+
+    @staticmethod
+    def _default_label(upid):
+        try:
+            info = parse_upid(upid)
+            return f"{info['type']} {info['id']}".strip()
+        except ValueError:
+            return str(upid)
+
+    def following(self):
+        with self._lock:
+            return list(self._tasks)
+
+    def stop(self):
+        """Abandonne le suivi de toutes les tâches"""
+        self._stopping.set()
+        with self._lock:
+            for task in self._tasks.values():
+                task["done"].set()
+            self._tasks.clear()
+
+    # === BOUCLE DE SUIVI ===
+    def _loop(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stopping.is_set():
+                with self._lock:
+                    tasks = list(self._tasks.items())
+                if not tasks:
+                    break
+                for upid, finished in zip([upid for upid, _ in tasks],
+                                          executor.map(lambda item: self._poll(*item), tasks)):
+                    if finished:
+                        with self._lock:
+                            task = self._tasks.pop(upid, None)
+                        if task:
+                            task["done"].set()
+                self._stopping.wait(self.interval)
+        with self._lock:
+            # Une tâche ajoutée pendant la sortie de boucle relance le suivi
+            if self._tasks and not self._stopping.is_set():
+                self._thread = threading.Thread(target=self._loop, name="task-log-tailer", daemon=True)
+                self._thread.start()
+
+    def _poll(self, upid, task):
+        """Lit les nouvelles lignes d'une tâche ; retourne True quand elle est terminée"""
+        try:
+            finished = self._read(upid, task)
+            task["errors"] = 0
+            if finished:
+                return True
+            if task["idle"] >= self.STATUS_EVERY:
+                task["idle"] = 0
+                if self.handler.task_waiter.status(upid).get("status") == "stopped":
+                    # Dernière lecture : les lignes écrites juste avant la fin
+                    self._read(upid, task)
+                    return True
+            return False
+        except Exception as e:
+            log_debug(f"Journal de la tâche {upid} indisponible: {e}", "Proxmox")
+            task["errors"] += 1
+            return task["errors"] >= self.MAX_ERRORS
+
+    def _read(self, upid, task):
+        finished = False
+        while True:
+            lines, task["offset"] = self.handler.task_waiter.read_log(upid, task["offset"], limit=self.PAGE_SIZE)
+            for line in lines:
+                log_task_line(task["label"], line, task["component"])
+                if task["callback"]:
+                    try:
+                        task["callback"](upid, line)
+                    except Exception as e:
+                        log_error(f"Erreur callback journal de tâche: {e}", "Proxmox")
+                if line == "TASK OK" or line.startswith("TASK ERROR"):
+                    finished = True
+            task["idle"] = 0 if lines else task["idle"] + 1
+            # Journal plus long qu'une page : la suite est lue dans le même tour
+            if len(lines) < self.PAGE_SIZE or finished:
+                return finished
@@ -0,0 +1,128 @@
+"""
+Attente de la fin des tâches Proxmox via leur UPID
+"""
+import time
+
+from ...core.logger import log_debug
+
+
+def parse_upid(upid):
+    """Décompose un UPID Proxmox (UPID:node:pid:pstart:starttime:type:id:user:)"""
+    parts = str(upid).split(":")
+    if len(parts) < 8 or parts[0] != "UPID":
+        raise ValueError(f"UPID invalide: {upid}")
+    return {
+        "node": parts[1],
+        "pid": int(parts[2], 16),
+        "pstart": int(parts[3], 16),
+        "starttime": int(parts[4], 16),
+        "type": parts[5],
+        "id": parts[6],
+        "user": parts[7]
+    }
+
+
+class TaskWaiter:
+    """Suit des tâches Proxmox jusqu'à leur fin avec un intervalle de polling adaptatif
+
+    Le premier contrôle a lieu après ~200 ms puis l'intervalle croît
+    progressivement (backoff) jusqu'à max_interval, de sorte qu'une tâche
+    courte est détectée presque immédiatement sans marteler l'API pour
+    une tâche longue.
+    """
+
+    def __init__(self, handler, initial_interval=0.2, max_interval=5.0, backoff=1.5):
+        self.handler = handler
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def status(self, upid, node=None):
+        """Statut brut d'une tâche (nodes/{node}/tasks/{upid}/status)"""
+        node = node or parse_upid(upid)["node"]
+        return self.handler.proxmox.nodes(node).tasks(upid).status.get()
+
+    def read_log(self, upid, start=0, limit=500, node=None):
+        """Lignes du journal d'une tâche à partir de la ligne start
+
+        Retourne (lignes, prochain start) : en rappelant read_log avec ce
+        curseur, seules les nouvelles lignes sont téléchargées.
+        """
+        node = node or parse_upid(upid)["node"]
+        entries = self.handler.proxmox.nodes(node).tasks(upid).log.get(start=start, limit=limit) or []
+        lines = [entry.get("t", "") for entry in entries if entry.get("t") != "no content"]
+        return lines, start + len(lines)
+
+    def wait(self, upid, timeout=180):
+        """Attend la fin d'une tâche et retourne son résultat"""
+        return self.wait_many([upid], timeout=timeout)[upid]
+
+    def wait_many(self, upids, timeout=180, callback=None):
+        """Attend la fin de plusieurs tâches en parallèle
+
+        Retourne {upid: résultat}. callback(résultat) est appelé dès qu'une
+        tâche se termine. Un résultat contient : upid, node, type, id,
+        status ('stopped' ou 'timeout'), exitstatus, success et duration (s).
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        pending = {}
+        results = {}
+
+        for upid in upids:
+            info = parse_upid(upid)
+            pending[upid] = {
+                "info": info,
+                "interval": self.initial_interval,
+                "next_poll": started + self.initial_interval
+            }
+
+        while pending:
+            now = time.monotonic()
+            next_poll = min(task["next_poll"] for task in pending.values())
+            if next_poll > now:
+                time.sleep(min(next_poll, deadline) - now if deadline > now else 0)
+                now = time.monotonic()
+
+            for upid, task in list(pending.items()):
+                if task["next_poll"] > now:
+                    continue
+
+                try:
+                    status = self.status(upid, task["info"]["node"])
+                except Exception as e:
+                    # Erreur transitoire (nœud occupé, réseau) : on réessaie plus tard
+                    log_debug(f"Statut tâche {upid} indisponible: {e}", "Proxmox")
+                    status = {}
+
+                if status.get("status") == "stopped":
+                    results[upid] = self._result(upid, task["info"], "stopped",
+                                                 status.get("exitstatus", ""), started)
+                    del pending[upid]
+                    if callback:
+                        callback(results[upid])
+                    continue
+
+                task["interval"] = min(task["interval"] * self.backoff, self.max_interval)
+                task["next_poll"] = now + task["interval"]
+
+            if pending and time.monotonic() >= deadline:
+                for upid, task in pending.items():
+                    results[upid] = self._result(upid, task["info"], "timeout", "timeout", started)
+                    if callback:
+                        callback(results[upid])
+                break
+
+        return results
+
+    def _result(self, upid, info, status, exitstatus, started):
+        return {
+            "upid": upid,
+            "node": info["node"],
+            "type": info["type"],
+            "id": info["id"],
+            "status": status,
+            "exitstatus": exitstatus,
+            "success": status == "stopped" and exitstatus == "OK",
+            "duration": time.monotonic() - started
+        }
@@ -0,0 +1,247 @@
+"""
+Envoi d'ISOs et de templates vers les stockages Proxmox, en flux continu
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+
+from ...core.logger import log_debug, log_error, log_info, log_success
+
+
+def sha256_file(path, chunk_size=4 * 1024 * 1024):
+    """sha256 d'un fichier local, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MultipartStream:
+    """Corps multipart/form-data produit à la volée à partir d'une file de blocs
+
+    La taille totale est connue d'avance (__len__) : requests envoie un
+    Content-Length au lieu d'un encodage chunked, refusé par pveproxy. Les
+    champs (content, checksum...) précèdent le fichier, dans l'ordre de
+    l'interface web de Proxmox.
+    """
+
+    def __init__(self, fields, filename, size, chunks):
+        self.boundary = uuid.uuid4().hex
+        self.chunks = chunks
+        self.sent = 0
+        self._head = b"".join(self._field(name, value) for name, value in fields) + (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="filename"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._length = len(self._head) + size + len(self._tail)
+
+    def _field(self, name, value):
+        return (f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n').encode()
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        yield self._head
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                break
+            self.sent += len(chunk)
+            yield chunk
+        yield self._tail
+
+
+class StreamingUploader:
+    """Envoie un fichier vers un ou plusieurs stockages en une seule lecture
+
+    Le fichier est lu une fois, par blocs, sans être chargé en mémoire :
+    chaque bloc alimente la file (bornée) de chaque cible. Les cibles
+    (stockages d'un ou plusieurs clusters) envoient leur flux en parallèle ;
+    la lecture avance au rythme de la cible la plus lente.
+
+    Le sha256 attendu (fourni, par exemple tiré du SHA256SUMS de la
+    distribution, ou calculé par une lecture locale préalable) est transmis
+    avec le fichier : la tâche d'import de Proxmox recalcule le sha256 du
+    fichier reçu et échoue s'il diffère. La taille du volume créé est
+    ensuite contrôlée dans le contenu du stockage.
+    """
+
+    CHUNK_SIZE = 4 * 1024 * 1024
+    QUEUE_CHUNKS = 8  # Blocs en attente par cible (mémoire bornée à 32 Mio par cible)
+    PROGRESS_INTERVAL = 0.5
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    @staticmethod
+    def content_type(path):
+        """Type de contenu Proxmox déduit du nom de fichier (iso ou vztmpl)"""
+        name = os.path.basename(path).lower()
+        return "vztmpl" if name.endswith((".tar.gz", ".tar.xz", ".tar.zst", ".tgz")) else "iso"
+
+    def default_targets(self, content):
+        """Stockages actifs acceptant ce type de contenu, chaque stockage partagé une seule fois"""
+        self.handler.inventory.refresh()
+        targets = {}
+        for storage in self.handler.inventory.storages():
+            if storage.get("status") != "available" or content not in (storage.get("content") or "").split(","):
+                continue
+            key = storage["storage"] if storage.get("shared") else f"{storage['node']}/{storage['storage']}"
+            targets.setdefault(key, {"node": storage["node"], "storage": storage["storage"], "label": key})
+        return list(targets.values())
+
+    def upload(self, path, targets, content="iso", sha256=None, callback=None, timeout=1800):
+        """Envoie path vers chaque cible (dict node, storage et optionnellement handler, label)
+
+        handler permet de viser un autre cluster connecté. sha256 est le
+        condensat attendu ; sans lui, il est calculé localement avant l'envoi.
+        callback(événement) reçoit la progression : read, total, rate (o/s),
+        eta et sent par cible. Retourne {"sha256", "size", "duration",
+        "results": [{label, success, message, duration}]}.
+        """
+        size = os.path.getsize(path)
+        filename = os.path.basename(path)
+        if not sha256:
+            log_info(f"Calcul du sha256 de {filename} avant l'envoi", "Proxmox")
+            sha256 = sha256_file(path, self.CHUNK_SIZE)
+        sha256 = sha256.lower()
+        fields = [("content", content), ("checksum-algorithm", "sha256"), ("checksum", sha256)]
+        digest = hashlib.sha256()
+        started = time.monotonic()
+
+        jobs = []
+        for target in targets:
+            target_handler = target.get("handler") or self.handler
+            chunks = queue.Queue(maxsize=self.QUEUE_CHUNKS)
+            body = MultipartStream(fields, filename, size, chunks)
+            jobs.append({
+                "label": target.get("label") or f"{target['node']}/{target['storage']}",
+                "handler": target_handler,
+                "node": target["node"],
+                "storage": target["storage"],
+                "chunks": chunks,
+                "body": body,
+                "failed": threading.Event(),
+                "result": None
+            })
+
+        def send(job):
+            begin = time.monotonic()
+            try:
+                target_handler = job["handler"]
+                session = target_handler.auth.session()
+                base_url = target_handler.auth.base_url(target_handler.proxmox.current_host())
+                response = session.post(
+                    f"{base_url}/nodes/{job['node']}/storage/{job['storage']}/upload",
+                    data=job["body"], headers={"Content-Type": job["body"].content_type},
+                    verify=session.verify, timeout=timeout
+                )
+                response.raise_for_status()
+                upid = response.json().get("data")
+                job["result"] = self._verify(job, upid, content, filename, size, timeout)
+            except Exception as e:
+                job["failed"].set()
+                job["result"] = {"success": False, "message": str(e)}
+            job["result"].update({"label": job["label"], "duration": time.monotonic() - begin})
+
+        log_info(f"Envoi de {filename} ({size / 1024 ** 3:.2f} Gio) vers {len(jobs)} stockage(s)", "Proxmox")
+        threads = [threading.Thread(target=send, args=(job,), daemon=True) for job in jobs]
+        for thread in threads:
+            thread.start()
+
+        read = 0
+        last_report = 0
+        with open(path, "rb") as source:
+            while True:
+                chunk = source.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                read += len(chunk)
+                for job in jobs:
+                    self._put(job, chunk)
+                if not any(not job["failed"].is_set() for job in jobs):
+                    break
+                now = time.monotonic()
+                if callback and now - last_report >= self.PROGRESS_INTERVAL:
+                    last_report = now
+                    self._notify(callback, jobs, read, size, started)
+
+        if read == size and digest.hexdigest() != sha256:
+            # Fichier modifié pendant l'envoi ou condensat fourni erroné : Proxmox refusera l'import
+            log_error(f"sha256 de {filename} différent de celui annoncé ({digest.hexdigest()[:12]}... "
+                      f"au lieu de {sha256[:12]}...)", "Proxmox")
+        # Fin du flux
+        for job in jobs:
+            self._put(job, None)
+        for thread in threads:
+            thread.join()
+        if callback:
+            self._notify(callback, jobs, read, size, started)
+
+        summary = {
+            "sha256": sha256,
+            "size": size,
+            "duration": time.monotonic() - started,
+            "results": [job["result"] for job in jobs]
+        }
+        failed = [result for result in summary["results"] if not result["success"]]
+        for result in failed:
+            log_error(f"Envoi vers {result['label']} échoué: {result['message']}", "Proxmox")
+        log_success(f"{filename} envoyé vers {len(jobs) - len(failed)}/{len(jobs)} stockage(s) en "
+                    f"{summary['duration']:.0f}s (sha256 {summary['sha256'][:12]}...)", "Proxmox")
+        return summary
+
+    @staticmethod
+    def _put(job, chunk):
+        """Dépose un bloc dans la file d'une cible ; une cible en échec n'est plus alimentée"""
+        while not job["failed"].is_set():
+            try:
+                job["chunks"].put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _notify(self, callback, jobs, read, size, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rate = read / elapsed
+        try:
+            callback({
+                "read": read,
+                "total": size,
+                "rate": rate,
+                "eta": (size - read) / rate if rate > 0 else None,
+                "sent": {job["label"]: job["body"].sent for job in jobs}
+            })
+        except Exception as e:
+            log_error(f"Erreur callback envoi: {e}", "Proxmox")
+
+    def _verify(self, job, upid, content, filename, size, timeout):
+        """Attend la tâche d'import (contrôle du sha256 par Proxmox) puis la taille du volume"""
+        target_handler = job["handler"]
+        if upid:
+            result = target_handler.task_waiter.wait(upid, timeout=timeout)
+            if not result["success"]:
+                return {"success": False, "message": f"Tâche d'import: {result['exitstatus'] or result['status']}"}
+
+        volid = f"{job['storage']}:{content}/{filename}"
+        volumes = target_handler.proxmox.nodes(job["node"]).storage(job["storage"]).content.get(content=content) or []
+        volume = next((volume for volume in volumes if volume.get("volid") == volid), None)
+        if volume is None:
+            return {"success": False, "message": f"{volid} absent du stockage après l'envoi"}
+        if volume.get("size") not in (None, size):
+            return {"success": False, "message": f"Taille inattendue: {volume.get('size')} au lieu de {size}"}
+        log_debug(f"{volid} vérifié sur {job['label']}", "Proxmox")
+        return {"success": True, "message": volid}
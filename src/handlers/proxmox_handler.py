@@ -1,48 +1,167 @@
-from proxmoxer import ProxmoxAPI
+import threading
+
 from ..core.logger import log_debug, log_info, log_error, log_success, log_ssh, log_proxmox, log_vm
+from .proxmox.inventory import ClusterInventory, merge_storages
+from .proxmox.detail_fetcher import VmDetailFetcher
+from .proxmox.response_cache import ResponseCache
+from .proxmox.config_cache import VmConfigCache, agent_enabled
+from .proxmox.task_waiter import TaskWaiter
+from .proxmox.task_log import TaskLogTailer
+from .proxmox.lifecycle import BulkLifecycleOrchestrator
+from .proxmox.auth import AuthManager
+from .proxmox.endpoints import EndpointPool, FailoverProxmoxAPI
+from .proxmox.change_feed import ChangeFeed
+from .proxmox.guest_facts import GuestFactsCache
+from .proxmox.ip_resolver import VmIpResolver
+from .proxmox.metrics import MetricsCollector
+from .proxmox.history import MetricsHistory
+from .proxmox.planner import CapacityPlanner
+from .proxmox.migration import MigrationOrchestrator
+from .proxmox.snapshots import SnapshotEngine
+from .proxmox.backups import BackupOrchestrator
+from .proxmox.provisioning import ProvisioningPipeline
+from .proxmox.search_index import VmSearchIndex
+from .proxmox.guest_fs import GuestFsCollector
+from .proxmox.content_index import StorageContentIndex
+from .proxmox.upload import StreamingUploader
+from .proxmox.proxmox_client import ProxmoxClient
 
 class ProxmoxHandler:
     def __init__(self):
         self.proxmox = None
         self.nodes = []
+        self.auth = AuthManager()
+        self.endpoints = EndpointPool(self.auth)
+        self.cache = ResponseCache()
+        self.config_cache = VmConfigCache()
+        self.guest_facts = GuestFactsCache(self)
+        self.ip_resolver = VmIpResolver(self)
+        self.metrics = MetricsCollector(self)
+        self.history = MetricsHistory()
+        self.planner = CapacityPlanner(self)
+        self.inventory = ClusterInventory(self)
+        self.detail_fetcher = VmDetailFetcher(self)
+        self.task_waiter = TaskWaiter(self)
+        self.task_tailer = TaskLogTailer(self)
+        self.lifecycle = BulkLifecycleOrchestrator(self)
+        self.migrations = MigrationOrchestrator(self)
+        self.snapshots = SnapshotEngine(self)
+        self.backups = BackupOrchestrator(self)
+        self.provisioning = ProvisioningPipeline(self)
+        self.search_index = VmSearchIndex(self)
+        self.guest_fs = GuestFsCollector(self)
+        self.content_index = StorageContentIndex(self)
+        self.uploads = StreamingUploader(self)
+        self.change_feed = ChangeFeed(self)
         self._last_vm_count = 0  # Cache pour éviter les logs répétitifs
         self._last_linux_count = 0
         log_info("ProxmoxHandler initialisé", "Proxmox")
 
-    def connect(self, config):
+    def connect(self, config, use_cache=True):
+        """Se connecte au cluster ; use_cache=False impose un vrai login (test des identifiants)"""
         log_info(f"Connexion à Proxmox {config['ip']}", "Proxmox")
         try:
-            self.proxmox = ProxmoxAPI(
-                config['ip'],
-                user=config['user'],
-                password=config['password'],
-                verify_ssl=False
-            )
-            self.nodes = [node['node'] for node in self.proxmox.nodes.get()]
+            # Token API ou ticket en cache : pas de login supplémentaire
+            self._use_api(config['ip'], self.auth.login(config, use_cache=use_cache))
+            self.cache.clear()
+            self.config_cache.bind(config['ip'])
+            try:
+                self.history.bind(config['ip'])
+            except Exception as e:
+                log_error(f"Historique des métriques indisponible: {e}", "Proxmox")
+            try:
+                self.content_index.bind(config['ip'])
+            except Exception as e:
+                log_error(f"Index du contenu des stockages indisponible: {e}", "Proxmox")
+            
+            # Un seul appel /cluster/resources valide la connexion et amorce l'inventaire
+            try:
+                self.inventory.refresh(force=True)
+            except Exception as e:
+                if not self.auth.used_cached_ticket:
+                    raise
+                log_info(f"Ticket en cache refusé ({e}), nouvelle authentification", "Proxmox")
+                self.auth.forget_ticket()
+                self._use_api(config['ip'], self.auth.login(config, use_cache=False))
+                self.inventory.refresh(force=True)
+            
+            self.auth.start_renewal()
+            # Découverte des autres nœuds et mesure de latence sans retarder la connexion
+            threading.Thread(target=self.endpoints.discover_and_measure, daemon=True).start()
             log_success(f"Proxmox connecté - {len(self.nodes)} nœud(s): {', '.join(self.nodes)}", "Proxmox")
             return True
         except Exception as e:
             log_error(f"Connexion échouée à {config['ip']}: {e}", "Proxmox")
             return False
 
-    def get_vm_detailed_status(self, node_name, vmid):
-        """Récupère le statut détaillé d'une VM incluant QEMU Agent"""
+    def _use_api(self, host, api):
+        """Route les appels API vers le point d'accès le plus rapide, avec bascule"""
+        self.endpoints.reset(host, api)
+        self.proxmox = FailoverProxmoxAPI(self.endpoints)
+
+    def _cached(self, endpoint, key, fetch):
+        """Exécute fetch() à travers le cache de réponses"""
+        return self.cache.get_or_fetch(endpoint, key, fetch)
+
+    def _get_vm_config(self, node_name, vmid, resource=None):
+        """Configuration d'une VM, téléchargée seulement si le cache persistant est à revalider"""
+        vm_config = self.config_cache.get(vmid, resource)
+        if vm_config is None:
+            vm_config = self.proxmox.nodes(node_name).qemu(vmid).config.get()
+            # Digest identique : rien à réindexer
+            if self.config_cache.put(vmid, vm_config, resource):
+                self.search_index.refresh_vm(vmid)
+        return vm_config
+
+    def _invalidate_vm(self, vmid):
+        """Invalide toutes les données en cache d'une VM après une modification"""
+        self.cache.invalidate_vm(vmid)
+        self.config_cache.invalidate(vmid)
+
+    def _get_vm_current_status(self, node_name, vmid):
+        return self._cached(
+            "vm/status", ("vm", str(vmid), "status"),
+            lambda: self.proxmox.nodes(node_name).qemu(vmid).status.current.get()
+        )
+
+    def record_history(self):
+        """Enregistre l'instantané courant de l'inventaire dans l'historique local"""
+        if not self.history.is_open:
+            return
+        try:
+            self.history.record_inventory(self.inventory)
+        except Exception as e:
+            log_error(f"Enregistrement de l'historique impossible: {e}", "Proxmox")
+
+    def get_cache_stats(self):
+        """Retourne les statistiques du cache de réponses"""
+        return self.cache.stats()
+
+    def get_vm_detailed_status(self, node_name, vmid, resource=None):
+        """Récupère le statut détaillé d'une VM incluant QEMU Agent
+
+        Si l'entrée de l'inventaire (resource) est fournie, le statut en est
+        tiré directement au lieu d'interroger status/current.
+        """
         try:
             # Configuration de la VM
-            vm_config = self.proxmox.nodes(node_name).qemu(vmid).config.get()
+            vm_config = self._get_vm_config(node_name, vmid, resource)
             
             # Statut actuel de la VM
-            vm_status = self.proxmox.nodes(node_name).qemu(vmid).status.current.get()
+            if resource is not None:
+                vm_status = resource
+            else:
+                vm_status = self._get_vm_current_status(node_name, vmid)
             
             # Vérifier si l'agent est activé dans la config
-            agent_enabled = vm_config.get('agent', 0) == 1
+            agent_on = agent_enabled(vm_config)
             
             vm_info = {
                 "vmid": vmid,
                 "name": vm_config.get('name', f"VM-{vmid}"),
                 "status": vm_status.get('status', 'unknown'),
                 "node": node_name,
-                "agent_enabled": agent_enabled,
+                "agent_enabled": agent_on,
                 "agent_running": False,
                 "ip": "Non disponible",
                 "os_type": "unknown",
@@ -52,21 +171,19 @@ class ProxmoxHandler:
             if vm_info["status"] == "running":
                 # Tester si l'agent répond
                 try:
+                    # Inutile d'interroger un agent désactivé dans la config
+                    if not agent_on:
+                        raise RuntimeError("Agent QEMU désactivé dans la configuration")
+                    
                     # Test ping de l'agent
                     ping_result = self.proxmox.nodes(node_name).qemu(vmid).agent.ping.post()
                     vm_info["agent_running"] = True
                     
-                    # Récupérer l'IP si l'agent fonctionne
-                    vm_info["ip"] = self.get_vm_ip(node_name, vmid)
-                    
-                    # Détecter l'OS
+                    # IP et OS depuis le cache des faits invités (relus seulement après un redémarrage)
                     try:
-                        os_info = self.proxmox.nodes(node_name).qemu(vmid).agent.get('os-info')
-                        os_name = os_info.get('name', '').lower()
-                        if 'windows' in os_name:
-                            vm_info["os_type"] = "windows"
-                        elif any(x in os_name for x in ['linux', 'ubuntu', 'debian', 'centos', 'rhel']):
-                            vm_info["os_type"] = "linux"
+                        facts = self.guest_facts.get(node_name, vmid, resource)
+                        vm_info["ip"] = self.guest_facts.first_ipv4(facts) or "IP non disponible"
+                        vm_info["os_type"] = self.guest_facts.os_type(facts)
                         vm_info["can_install_agent"] = True
                     except:
                         pass
@@ -90,18 +207,20 @@ class ProxmoxHandler:
             log_error(f"Erreur statut VM {vmid}: {e}", "Proxmox")
             return None
 
-    def get_all_vms_with_agent_status(self):
-        """Récupère toutes les VMs avec leur statut QEMU Agent"""
+    def get_all_vms_with_agent_status(self, callback=None):
+        """Récupère toutes les VMs avec leur statut QEMU Agent
+
+        Les VMs sont analysées en parallèle ; callback(vm_detail) est appelé
+        dès qu'une VM est prête.
+        """
         log_info("Analyse des VMs et statut QEMU Agent", "Tools")
         vms_detailed = []
         
         try:
-            for node_name in self.nodes:
-                vms = self.proxmox.nodes(node_name).qemu.get()
-                for vm in vms:
-                    vm_detail = self.get_vm_detailed_status(node_name, vm['vmid'])
-                    if vm_detail:
-                        vms_detailed.append(vm_detail)
+            self.inventory.refresh()
+            vms_detailed = self.detail_fetcher.fetch_all(self.inventory.vms(), callback)
+            vms_detailed.sort(key=lambda vm: (vm['node'], int(vm['vmid'])))
+            self.config_cache.flush()
                         
             # Log consolidé
             log_success(f"Analyse terminée - {len(vms_detailed)} VMs analysées", "Tools")
@@ -116,6 +235,7 @@ class ProxmoxHandler:
         try:
             # Mettre à jour la configuration pour activer l'agent
             self.proxmox.nodes(node_name).qemu(vmid).config.put(agent=1)
+            self._invalidate_vm(vmid)
             log_success(f"Agent QEMU activé pour VM {vmid}", "Installation")
             return True
         except Exception as e:
@@ -123,95 +243,200 @@ class ProxmoxHandler:
             return False
 
     def shutdown_vm_robust(self, node_name, vmid, vm_name="VM"):
-        """Arrêt robuste d'une VM avec fallback sur stop forcé"""
+        """Arrêt robuste d'une VM avec fallback sur stop forcé
+
+        La fin de l'arrêt est suivie via l'UPID de la tâche Proxmox.
+        """
         try:
-            import time
+            # L'état de la VM va changer : ses entrées en cache ne sont plus valides
+            self._invalidate_vm(vmid)
             
             # Tentative d'arrêt normal (graceful shutdown)
             try:
-                self.proxmox.nodes(node_name).qemu(vmid).status.shutdown.post()
+                upid = self.proxmox.nodes(node_name).qemu(vmid).status.shutdown.post()
+                self.task_tailer.follow(upid, vm_name, "Installation")
                 log_info(f"Arrêt en cours de {vm_name}", "Installation")
+                result = self.task_waiter.wait(upid, timeout=120)
             except Exception as e:
+                result = {"success": False, "status": "error", "exitstatus": str(e)}
+            
+            if not result["success"] and result["status"] != "timeout":
                 # Si l'arrêt normal échoue, essayer l'arrêt forcé
                 try:
-                    self.proxmox.nodes(node_name).qemu(vmid).status.stop.post()
+                    upid = self.proxmox.nodes(node_name).qemu(vmid).status.stop.post()
+                    self.task_tailer.follow(upid, vm_name, "Installation")
                     log_info(f"Arrêt forcé de {vm_name}", "Installation")
+                    result = self.task_waiter.wait(upid, timeout=60)
                 except Exception as e2:
                     log_error(f"Impossible d'arrêter {vm_name}: {str(e2)}", "Installation")
                     return False, f"Impossible d'arrêter {vm_name}: {str(e2)}"
             
-            # Attendre l'arrêt effectif avec polling
-            max_wait_time = 120  # 2 minutes maximum
-            check_interval = 5   # Vérifier toutes les 5 secondes
-            elapsed_time = 0
+            self._invalidate_vm(vmid)
             
-            while elapsed_time < max_wait_time:
-                try:
-                    current_status = self.get_vm_status(node_name, vmid)
-                    
-                    if current_status == 'stopped':
-                        log_success(f"{vm_name} arrêtée avec succès", "Installation")
-                        return True, f"{vm_name} arrêtée avec succès"
-                    
-                    time.sleep(check_interval)
-                    elapsed_time += check_interval
-                    
-                except Exception as e:
-                    time.sleep(check_interval)
-                    elapsed_time += check_interval
+            if result["success"]:
+                log_success(f"{vm_name} arrêtée avec succès ({result['duration']:.1f}s)", "Installation")
+                return True, f"{vm_name} arrêtée avec succès"
             
-            # Si on arrive ici, timeout
-            log_error(f"Timeout arrêt de {vm_name}", "Installation")
-            return False, f"Timeout - {vm_name} ne s'arrête pas"
+            if result["status"] == "timeout":
+                log_error(f"Timeout arrêt de {vm_name}", "Installation")
+                return False, f"Timeout - {vm_name} ne s'arrête pas"
+            
+            log_error(f"Échec arrêt de {vm_name}: {result['exitstatus']}", "Installation")
+            return False, f"Échec arrêt de {vm_name}: {result['exitstatus']}"
             
         except Exception as e:
             log_error(f"Erreur arrêt {vm_name}: {str(e)}", "Installation")
             return False, f"Erreur lors de l'arrêt de {vm_name}: {str(e)}"
 
     def start_vm_robust(self, node_name, vmid, vm_name="VM"):
-        """Démarrage robuste d'une VM avec vérification"""
+        """Démarrage robuste d'une VM avec vérification
+
+        La fin du démarrage est suivie via l'UPID de la tâche Proxmox.
+        """
         try:
-            import time
+            # Les modifications en attente sont appliquées au démarrage
+            self._invalidate_vm(vmid)
             
             try:
-                self.proxmox.nodes(node_name).qemu(vmid).status.start.post()
+                upid = self.proxmox.nodes(node_name).qemu(vmid).status.start.post()
+                self.task_tailer.follow(upid, vm_name, "Installation")
                 log_info(f"Démarrage de {vm_name} en cours", "Installation")
             except Exception as e:
                 log_error(f"Échec démarrage {vm_name}: {e}", "Installation")
                 return False, f"Impossible de démarrer {vm_name}: {str(e)}"
             
-            # Attendre le démarrage effectif
-            max_wait_time = 180  # 3 minutes maximum  
-            check_interval = 5   # Vérifier toutes les 5 secondes
-            elapsed_time = 0
+            result = self.task_waiter.wait(upid, timeout=180)
+            self._invalidate_vm(vmid)
             
-            while elapsed_time < max_wait_time:
-                try:
-                    current_status = self.get_vm_status(node_name, vmid)
-                    
-                    if current_status == 'running':
-                        log_success(f"{vm_name} démarrée avec succès", "Installation")
-                        return True, f"{vm_name} démarrée avec succès"
-                    
-                    time.sleep(check_interval)
-                    elapsed_time += check_interval
-                    
-                except Exception as e:
-                    time.sleep(check_interval)
-                    elapsed_time += check_interval
+            if result["success"]:
+                log_success(f"{vm_name} démarrée avec succès ({result['duration']:.1f}s)", "Installation")
+                return True, f"{vm_name} démarrée avec succès"
+            
+            if result["status"] == "timeout":
+                log_error(f"Timeout démarrage {vm_name}", "Installation")
+                return False, f"Timeout - {vm_name} ne démarre pas"
             
-            # Si on arrive ici, timeout
-            log_error(f"Timeout démarrage {vm_name}", "Installation")
-            return False, f"Timeout - {vm_name} ne démarre pas"
+            log_error(f"Échec démarrage {vm_name}: {result['exitstatus']}", "Installation")
+            return False, f"Impossible de démarrer {vm_name}: {result['exitstatus']}"
             
         except Exception as e:
             log_error(f"Erreur démarrage {vm_name}: {str(e)}", "Installation")
             return False, f"Erreur lors du démarrage de {vm_name}: {str(e)}"
 
+    def bulk_vm_action(self, vms, action, callback=None, timeout=300, force_stop=False):
+        """Applique start/stop/shutdown/reboot à plusieurs VMs en parallèle
+
+        Voir BulkLifecycleOrchestrator.run pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Lifecycle")
+            return None
+        return self.lifecycle.run(vms, action, callback=callback, timeout=timeout, force_stop=force_stop)
+
+    def migrate_vm(self, node_name, vmid, target, online=True, with_local_disks=False, migration_network=None):
+        """Lance la migration d'une VM vers target
+
+        Retourne (True, upid) si la tâche a été créée, sinon (False, message).
+        """
+        params = {"target": target, "online": 1 if online else 0}
+        if with_local_disks:
+            params["with-local-disks"] = 1
+        if migration_network:
+            params["migration_network"] = migration_network
+        try:
+            self._invalidate_vm(vmid)
+            upid = self.proxmox.nodes(node_name).qemu(vmid).migrate.post(**params)
+            log_info(f"Migration de la VM {vmid} : {node_name} -> {target}", "Proxmox")
+            return True, upid
+        except Exception as e:
+            log_error(f"Échec migration VM {vmid} vers {target}: {e}", "Proxmox")
+            return False, f"Impossible de migrer la VM {vmid}: {str(e)}"
+
+    def migrate_vms(self, migrations, callback=None, timeout=3600, online=True, with_local_disks=False):
+        """Migre plusieurs VMs en parallèle (dicts vmid, node ou source, target)
+
+        Voir MigrationOrchestrator.run pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return self.migrations.run(migrations, callback=callback, timeout=timeout,
+                                   online=online, with_local_disks=with_local_disks)
+
+    def bulk_snapshot(self, vms, action, name, callback=None, timeout=600, vmstate=False, description=""):
+        """Crée, restaure ou supprime le snapshot name sur plusieurs VMs en parallèle
+
+        Voir SnapshotEngine.run pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return self.snapshots.run(vms, action, name, callback=callback, timeout=timeout,
+                                  vmstate=vmstate, description=description)
+
+    def list_snapshots(self, vms):
+        """Snapshots de chaque VM : {vmid: [snapshot]} du plus ancien au plus récent"""
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return {}
+        return self.snapshots.list(vms)
+
+    def prune_snapshots(self, vms, keep=3, prefix="", callback=None):
+        """Ne garde que les keep snapshots les plus récents commençant par prefix"""
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return self.snapshots.prune(vms, keep=keep, prefix=prefix, callback=callback)
+
+    def backup_vm(self, node_name, vmid, storage, mode="snapshot", compress="zstd", notes=None):
+        """Lance le vzdump d'une VM vers storage
+
+        Retourne (True, upid) si la tâche a été créée, sinon (False, message).
+        """
+        params = {"vmid": vmid, "storage": storage, "mode": mode, "compress": compress}
+        if notes:
+            params["notes-template"] = notes
+        try:
+            upid = self.proxmox.nodes(node_name).vzdump.post(**params)
+            log_info(f"Sauvegarde de la VM {vmid} vers {storage}", "Proxmox")
+            return True, upid
+        except Exception as e:
+            log_error(f"Échec sauvegarde VM {vmid} vers {storage}: {e}", "Proxmox")
+            return False, f"Impossible de sauvegarder la VM {vmid}: {str(e)}"
+
+    def backup_vms(self, vms, storage, mode="snapshot", compress="zstd", notes=None, deadline=None,
+                   callback=None):
+        """Sauvegarde plusieurs VMs en parallèle, sans nouveau lancement après deadline (timestamp)
+
+        Voir BackupOrchestrator.run pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return self.backups.run(vms, storage, mode=mode, compress=compress, notes=notes,
+                                deadline=deadline, callback=callback)
+
+    def provision_vms(self, template_vmid, specs, linked=True, target_nodes=None, storage=None,
+                      gateway=None, prefix=24, start=False, callback=None):
+        """Clone un template en une VM par spec (name, ip...) en parallèle
+
+        Voir ProvisioningPipeline.run pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        try:
+            return self.provisioning.run(template_vmid, specs, linked=linked, target_nodes=target_nodes,
+                                         storage=storage, gateway=gateway, prefix=prefix,
+                                         start=start, callback=callback)
+        except Exception as e:
+            log_error(f"Erreur provisionnement: {str(e)}", "Proxmox")
+            return None
+
     def get_vm_status(self, node_name, vmid):
         """Récupère le statut actuel d'une VM"""
         try:
-            status = self.proxmox.nodes(node_name).qemu(vmid).status.current.get()
+            status = self._get_vm_current_status(node_name, vmid)
             return status.get('status', 'unknown')
         except Exception as e:
             return 'unknown'
@@ -459,15 +684,14 @@ class ProxmoxHandler:
         """Récupère la liste de toutes les VMs sur tous les nœuds"""
         try:
             vms = []
-            for node in self.proxmox.nodes.get():
-                node_name = node['node']
-                for vm in self.proxmox.nodes(node_name).qemu.get():
-                    vms.append({
-                        "vmid": vm.get("vmid"),
-                        "name": vm.get("name"),
-                        "status": vm.get("status"),
-                        "node": node_name
-                    })
+            self.inventory.refresh()
+            for vm in self.inventory.vms():
+                vms.append({
+                    "vmid": vm.get("vmid"),
+                    "name": vm.get("name"),
+                    "status": vm.get("status"),
+                    "node": vm.get("node")
+                })
             
             # Log optimisé - seulement si le nombre a changé
             if len(vms) != self._last_vm_count:
@@ -487,23 +711,21 @@ class ProxmoxHandler:
             return linux_vms
             
         try:
-            for node_name in self.nodes:
-                vms = self.proxmox.nodes(node_name).qemu.get()
-                for vm in vms:
-                    if vm.get('status') == 'running':
-                        try:
-                            info = self.proxmox.nodes(node_name).qemu(vm['vmid']).agent.get('os-info')
-                            os_name = info.get('name', '').lower()
-                            if 'linux' in os_name or 'ubuntu' in os_name or 'debian' in os_name or 'centos' in os_name or 'rhel' in os_name:
-                                vm_ip = self.get_vm_ip(node_name, vm['vmid'])
-                                linux_vms.append({
-                                    "vmid": vm['vmid'],
-                                    "name": vm.get('name', f"VM-{vm['vmid']}"),
-                                    "ip": vm_ip,
-                                    "node": node_name
-                                })
-                        except Exception as e:
-                            continue
+            self.inventory.refresh()
+            for vm in self.inventory.vms():
+                if vm.get('status') == 'running':
+                    node_name = vm['node']
+                    try:
+                        facts = self.guest_facts.get(node_name, vm['vmid'], vm)
+                        if self.guest_facts.os_type(facts) == 'linux':
+                            linux_vms.append({
+                                "vmid": vm['vmid'],
+                                "name": vm.get('name', f"VM-{vm['vmid']}"),
+                                "ip": self.guest_facts.first_ipv4(facts) or "IP non disponible",
+                                "node": node_name
+                            })
+                    except Exception as e:
+                        continue
             
             # Log optimisé - seulement si le nombre a changé
             if len(linux_vms) != self._last_linux_count:
@@ -518,22 +740,30 @@ class ProxmoxHandler:
     def get_vm_ip(self, node_name, vmid):
         """Récupère l'adresse IP d'une VM spécifique"""
         try:
-            interfaces = self.proxmox.nodes(node_name).qemu(vmid).agent.get("network-get-interfaces")
-            for iface in interfaces.get('result', []):
-                for addr in iface.get("ip-addresses", []):
-                    ip = addr.get("ip-address")
-                    if ip and not ip.startswith("127.") and not ip.startswith("::") and ":" not in ip:
-                        return ip
+            facts = self.guest_facts.get(node_name, vmid)
+            ip = self.guest_facts.first_ipv4(facts)
+            if ip:
+                return ip
         except Exception as e:
             pass
         return "IP non disponible"
 
+    def resolve_vm_ips(self, vm_list, timeout=5, callback=None):
+        """Résout en parallèle toutes les adresses (IPv4, IPv6, MAC par interface) de vm_list
+
+        Voir VmIpResolver.resolve pour le format du résultat.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return {"results": {}, "timed_out": [], "failed": [], "duration": 0}
+        return self.ip_resolver.resolve(vm_list, timeout=timeout, callback=callback)
+
     def get_version(self):
         """Récupère la version de Proxmox"""
         try:
             if not self.proxmox:
                 return "Non connecté"
-            version_info = self.proxmox.version.get()
+            version_info = self._cached("version", ("version",), lambda: self.proxmox.version.get())
             version = version_info.get("version", "N/A")
             return version
         except Exception as e:
@@ -541,29 +771,19 @@ class ProxmoxHandler:
             return "N/A"
 
     def get_storage_info(self):
-        """Récupère les informations de stockage pour tous les nœuds"""
+        """Récupère les informations de stockage de tout le cluster
+
+        Tout provient de l'instantané /cluster/resources (aucune requête par
+        nœud). Un stockage partagé (Ceph, NFS...) n'apparaît qu'une fois, avec
+        la liste des nœuds qui y accèdent dans 'nodes'. L'état du stockage
+        (available, unknown...) est dans 'status'.
+        """
         try:
             if not self.proxmox:
                 return []
                 
-            storages_info = []
-            for node in self.proxmox.nodes.get():
-                node_name = node['node']
-                try:
-                    storages = self.proxmox.nodes(node_name).storage.get()
-                    for storage in storages:
-                        storage_detail = self.proxmox.nodes(node_name).storage(storage['storage']).status.get()
-                        storages_info.append({
-                            "node": node_name,
-                            "storage": storage.get("storage"),
-                            "type": storage.get("type"),
-                            "total": storage_detail.get("total", 0),
-                            "used": storage_detail.get("used", 0),
-                            "available": storage_detail.get("avail", 0),
-                            "enabled": storage.get("shared", False)
-                        })
-                except Exception as e:
-                    continue
+            self.inventory.refresh()
+            storages_info = merge_storages(self.inventory.storages())
             
             # Log consolidé
             log_success(f"{len(storages_info)} stockage(s) analysé(s)", "Tools")
@@ -572,6 +792,88 @@ class ProxmoxHandler:
             log_error(f"Erreur stockage: {e}", "Tools")
             return []
 
+    def get_guest_disk_usage(self, timeout=5, refresh=False, callback=None):
+        """Occupation des disques invités (get-fsinfo) de toutes les VMs actives avec agent
+
+        Voir GuestFsCollector.collect pour le format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "QemuAgent")
+            return None
+        return self.guest_fs.collect(timeout=timeout, refresh=refresh, callback=callback)
+
+    def index_storage_content(self):
+        """Met à jour l'index du contenu des stockages (ISOs, templates, sauvegardes)"""
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return self.content_index.refresh()
+
+    def search_storage_content(self, vmid=None, pattern=None, content=None, since=None, until=None, limit=500):
+        """Recherche dans l'index local du contenu des stockages (aucune requête au cluster)"""
+        return self.content_index.search(vmid=vmid, pattern=pattern, content=content,
+                                         since=since, until=until, limit=limit)
+
+    def upload_to_storages(self, path, targets=None, content=None, sha256=None, callback=None):
+        """Envoie un ISO ou un template vers plusieurs stockages en une seule lecture du fichier
+
+        targets : dicts node, storage (et handler pour un autre cluster) ; par
+        défaut tous les stockages acceptant ce type de contenu. sha256 : condensat
+        attendu, vérifié par Proxmox. Voir StreamingUploader.upload pour le
+        format du résumé retourné.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        content = content or self.uploads.content_type(path)
+        if targets is None:
+            targets = self.uploads.default_targets(content)
+        if not targets:
+            log_error(f"Aucun stockage n'accepte le contenu {content}", "Proxmox")
+            return None
+        return self.uploads.upload(path, targets, content=content, sha256=sha256, callback=callback)
+
+    def create_async_client(self, **options):
+        """Client asynchrone (ProxmoxClient) partageant l'authentification de cette connexion
+
+        Il couvre les lectures en masse ; les opérations orchestrées
+        (migrations, snapshots, sauvegardes, clones, envois) restent ici.
+        """
+        if not self.proxmox:
+            log_error("Pas de connexion Proxmox", "Proxmox")
+            return None
+        return ProxmoxClient(self.auth, host=self.proxmox.current_host(), **options)
+
+    def get_storage_detail(self, node_name, storage_name):
+        """Détail d'un stockage vu depuis un nœud (nodes/{node}/storage/{storage}/status)
+
+        Réservé à l'exploration d'un stockage précis : une seule requête.
+        """
+        try:
+            if not self.proxmox:
+                return None
+            status = self._cached(
+                "storage/status", ("storage", node_name, storage_name, "status"),
+                lambda: self.proxmox.nodes(node_name).storage(storage_name).status.get()
+            )
+            total = status.get("total", 0)
+            used = status.get("used", 0)
+            return {
+                "node": node_name,
+                "storage": storage_name,
+                "type": status.get("type"),
+                "total": total,
+                "used": used,
+                "available": status.get("avail", max(total - used, 0)),
+                "shared": bool(status.get("shared")),
+                "enabled": bool(status.get("enabled", 1)),
+                "active": bool(status.get("active")),
+                "content": status.get("content", "")
+            }
+        except Exception as e:
+            log_error(f"Erreur détail stockage {storage_name} sur {node_name}: {e}", "Tools")
+            return None
+
     def get_node_status(self):
         """Récupère le statut (CPU, RAM, uptime) de tous les nœuds"""
         try:
@@ -579,27 +881,16 @@ class ProxmoxHandler:
                 return []
                 
             status_info = []
-            for node in self.proxmox.nodes.get():
-                node_name = node['node']
-                try:
-                    status = self.proxmox.nodes(node_name).status.get()
-                    cpu = status.get("cpu", 0)
-                    mem = status.get("memory", {})
-                    mem_total = mem.get("total", 0)
-                    mem_used = mem.get("used", 0)
-                    uptime = status.get("uptime", 0)
-                    
-                    status_info.append({
-                        "node": node_name,
-                        "cpu": cpu,
-                        "mem_total": mem_total,
-                        "mem_used": mem_used,
-                        "uptime": uptime,
-                        "status": node.get("status", "unknown")
-                    })
-                    
-                except Exception as e:
-                    continue
+            self.inventory.refresh()
+            for node in self.inventory.nodes():
+                status_info.append({
+                    "node": node['node'],
+                    "cpu": node.get("cpu", 0),
+                    "mem_total": node.get("maxmem", 0),
+                    "mem_used": node.get("mem", 0),
+                    "uptime": node.get("uptime", 0),
+                    "status": node.get("status", "unknown")
+                })
             
             # Log consolidé
             log_success(f"Statut de {len(status_info)} nœud(s) récupéré", "Tools")
@@ -616,7 +907,21 @@ class ProxmoxHandler:
     def disconnect(self):
         """Ferme la connexion à Proxmox"""
         log_info("Déconnexion Proxmox", "Proxmox")
+        self.auth.reset()
+        self.change_feed.stop()
+        self.task_tailer.stop()
         self.proxmox = None
+        self.endpoints.clear()
         self.nodes = []
+        self.inventory.clear()
+        self.cache.clear()
+        self.config_cache.flush()
+        self.config_cache.clear()
+        self.guest_facts.clear()
+        self.search_index.clear()
+        self.guest_fs.clear()
+        self.metrics.clear()
+        self.history.close()
+        self.content_index.close()
         self._last_vm_count = 0
         self._last_linux_count = 0
\ No newline at end of file
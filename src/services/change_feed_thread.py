@@ -0,0 +1,74 @@
+"""
+Thread de suivi des changements du cluster Proxmox
+"""
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from ..core.logger import log_debug, log_error
+
+
+class ChangeFeedThread(QThread):
+    """Interroge périodiquement le flux de changements et publie les deltas
+
+    Pour une VM modifiée, le statut détaillé (même format que
+    get_all_vms_with_agent_status) est recalculé pour cette seule VM.
+    """
+    vm_changed = pyqtSignal(dict)  # statut détaillé de la VM modifiée
+    vm_removed = pyqtSignal(str)  # vmid de la VM supprimée
+    node_changed = pyqtSignal(dict)  # entrée d'inventaire du nœud
+    inventory_resynced = pyqtSignal(int)  # nombre de ressources après rechargement complet
+
+    def __init__(self, proxmox_handler, interval=5):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.interval = interval
+        self._running = True
+
+    def run(self):
+        feed = self.proxmox_handler.change_feed
+        try:
+            feed.start()
+        except Exception as e:
+            log_error(f"Impossible de suivre les changements du cluster: {e}", "Inventory")
+            return
+
+        while self._running:
+            try:
+                published = set()
+                for event in feed.poll():
+                    # Plusieurs événements pour la même VM : un seul delta
+                    key = (event["kind"], event["vmid"], event["node"] if event["kind"] == "node" else None)
+                    if key not in published:
+                        published.add(key)
+                        self._publish(event)
+            except Exception as e:
+                log_debug(f"Lecture du flux de changements échouée: {e}", "Inventory")
+            # L'inventaire tenu à jour par le flux est échantillonné pour l'historique
+            self.proxmox_handler.record_history()
+            self._sleep(self.interval)
+
+        feed.stop()
+
+    def _publish(self, event):
+        if event["kind"] == "resync":
+            self.inventory_resynced.emit(len(self.proxmox_handler.inventory.resources))
+        elif event["kind"] == "node":
+            if event["resource"]:
+                self.node_changed.emit(dict(event["resource"]))
+        elif event["removed"]:
+            self.vm_removed.emit(str(event["vmid"]))
+        elif event["resource"] and event["vm_type"] == "qemu":
+            resource = event["resource"]
+            detail = self.proxmox_handler.get_vm_detailed_status(resource["node"], resource["vmid"], resource)
+            if detail:
+                self.vm_changed.emit(detail)
+
+    def _sleep(self, seconds):
+        # Sommeil découpé pour que stop() soit pris en compte rapidement
+        for _ in range(int(seconds * 10)):
+            if not self._running:
+                return
+            self.msleep(100)
+
+    def stop(self):
+        """Demande l'arrêt du thread"""
+        self._running = False
@@ -0,0 +1,124 @@
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt6.QtGui import QColor
+
+from ...core.logger import log_error
+
+
+class GuestDiskCollectThread(QThread):
+    """Thread de relevé de l'occupation des disques invités"""
+    collect_complete = pyqtSignal(dict)
+    collect_failed = pyqtSignal(str)
+
+    def __init__(self, proxmox_handler, refresh=False):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.refresh = refresh
+
+    def run(self):
+        try:
+            self.collect_complete.emit(self.proxmox_handler.get_guest_disk_usage(refresh=self.refresh) or {})
+        except Exception as e:
+            self.collect_failed.emit(str(e))
+
+
+class GuestDiskUsageDialog(QDialog):
+    """Tableau de remplissage des points de montage de toutes les VMs"""
+
+    COLUMNS = ["VM", "Node", "Point de montage", "Type", "Utilisé (GiB)", "Total (GiB)", "Remplissage (%)"]
+
+    def __init__(self, parent=None, proxmox_handler=None):
+        super().__init__(parent)
+        self.proxmox_handler = proxmox_handler
+        self.collect_thread = None
+
+        self.setWindowTitle("Occupation des disques invités")
+        self.resize(900, 600)
+        self.init_ui()
+        self.load_data()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        header_label = QLabel("💽 Remplissage des systèmes de fichiers des VMs")
+        header_label.setStyleSheet("font-size: 14px; font-weight: bold; margin-bottom: 10px;")
+        layout.addWidget(header_label)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d; font-style: italic;")
+        layout.addWidget(self.status_label)
+
+        self.fs_table = QTableWidget()
+        self.fs_table.setColumnCount(len(self.COLUMNS))
+        self.fs_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.fs_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.fs_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.fs_table)
+
+        button_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("🔄 Relever à nouveau")
+        self.refresh_btn.clicked.connect(lambda: self.load_data(refresh=True))
+        button_layout.addWidget(self.refresh_btn)
+        button_layout.addStretch()
+        close_btn = QPushButton("Fermer")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def load_data(self, refresh=False):
+        """Lance le relevé en arrière-plan (les résultats récents viennent du cache)"""
+        if self.collect_thread and self.collect_thread.isRunning():
+            return
+        self.refresh_btn.setEnabled(False)
+        self.status_label.setText("⏳ Interrogation des agents QEMU...")
+        self.collect_thread = GuestDiskCollectThread(self.proxmox_handler, refresh)
+        self.collect_thread.collect_complete.connect(self.on_collect_complete)
+        self.collect_thread.collect_failed.connect(self.on_collect_failed)
+        self.collect_thread.start()
+
+    def on_collect_complete(self, summary):
+        """Remplit le tableau, trié par remplissage décroissant"""
+        self.refresh_btn.setEnabled(True)
+        rows = summary.get('rows', [])
+
+        self.fs_table.setSortingEnabled(False)
+        self.fs_table.setRowCount(len(rows))
+        for row, fs in enumerate(rows):
+            values = [
+                f"{fs['name']} ({fs['vmid']})", fs['node'], fs['mountpoint'], fs['type'],
+                round(fs['used'] / 1024 ** 3, 1), round(fs['total'] / 1024 ** 3, 1), round(fs['percent'], 1)
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                # Valeurs numériques en DisplayRole : le tri par colonne est numérique
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                if fs['percent'] >= 90:
+                    item.setBackground(QColor("#f8d7da"))
+                elif fs['percent'] >= 80:
+                    item.setBackground(QColor("#fff3cd"))
+                self.fs_table.setItem(row, column, item)
+        self.fs_table.setSortingEnabled(True)
+        self.fs_table.sortItems(6, Qt.SortOrder.DescendingOrder)
+        self.fs_table.resizeColumnsToContents()
+
+        self.status_label.setText(
+            f"{len(summary.get('results', {}))} VM(s), {len(rows)} point(s) de montage "
+            f"en {summary.get('duration', 0):.1f}s - {len(summary.get('timed_out', []))} timeout(s), "
+            f"{len(summary.get('failed', []))} agent(s) indisponible(s)"
+        )
+
+    def on_collect_failed(self, message):
+        self.refresh_btn.setEnabled(True)
+        self.status_label.setText("❌ Relevé impossible")
+        log_error(f"Erreur relevé des disques invités: {message}", "QemuAgent")
+
+    def closeEvent(self, event):
+        """Attend la fin du relevé avant de fermer"""
+        if self.collect_thread and self.collect_thread.isRunning():
+            self.collect_thread.wait(1000)
+        event.accept()
@@ -1,4 +1,4 @@
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QTableWidget, QTableWidgetItem, QGroupBox, QComboBox,
@@ -6,12 +6,33 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QColor
 
+from ...core.logger import log_error
+
+class VmIpResolveThread(QThread):
+    """Thread pour résoudre les IPs des VMs sans bloquer l'interface"""
+    ip_resolved = pyqtSignal(dict)  # résultat d'une VM
+    resolve_complete = pyqtSignal(dict)  # résumé (timed_out, failed, duration)
+    
+    def __init__(self, proxmox_handler, vms):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.vms = vms
+    
+    def run(self):
+        try:
+            summary = self.proxmox_handler.resolve_vm_ips(self.vms, callback=self.ip_resolved.emit)
+            self.resolve_complete.emit(summary)
+        except Exception as e:
+            log_error(f"Erreur résolution des IPs: {e}", "Tools")
+
 class IPAssignmentDialog(QDialog):
     def __init__(self, parent=None, discovered_hosts=None, proxmox_handler=None):
         super().__init__(parent)
         self.discovered_hosts = discovered_hosts or {}
         self.proxmox_handler = proxmox_handler
         self.vm_ip_assignments = {}  # {vmid: ip}
+        self.resolve_thread = None
+        self.vm_rows = {}  # {vmid: ligne du tableau}
         
         self.setWindowTitle("Assignation IPs aux VMs")
         self.resize(1000, 600)
@@ -132,13 +153,9 @@ class IPAssignmentDialog(QDialog):
             vm_name = vm.get('name', f"VM-{vm['vmid']}")
             vm_status = vm.get('status', 'unknown')
             
-            # Essayer de récupérer l'IP actuelle
-            current_ip = "Non disponible"
-            if vm_status == 'running':
-                try:
-                    current_ip = self.proxmox_handler.get_vm_ip(vm['node'], vm['vmid'])
-                except:
-                    pass
+            # L'IP actuelle est résolue en arrière-plan
+            current_ip = "⏳ Résolution..." if vm_status == 'running' else "Non disponible"
+            self.vm_rows[str(vm['vmid'])] = row
             
             # Nom VM
             self.vms_table.setItem(row, 0, QTableWidgetItem(vm_name))
@@ -183,6 +200,47 @@ class IPAssignmentDialog(QDialog):
         # Redimensionner les colonnes
         self.vms_table.resizeColumnsToContents()
         self.hosts_table.resizeColumnsToContents()
+        
+        # Résolution groupée et parallèle des IPs des VMs actives
+        self.resolve_thread = VmIpResolveThread(self.proxmox_handler, vms)
+        self.resolve_thread.ip_resolved.connect(self.on_ip_resolved)
+        self.resolve_thread.resolve_complete.connect(self.on_resolve_complete)
+        self.resolve_thread.start()
+
+    def on_ip_resolved(self, result):
+        """Affiche les adresses d'une VM dès qu'elles sont résolues"""
+        row = self.vm_rows.get(str(result['vmid']))
+        if row is None or result['state'] == 'stopped':
+            return
+        
+        if result['state'] == 'timeout':
+            text = "⌛ Agent muet"
+        elif result['state'] == 'error' or not (result['ipv4'] or result['ipv6']):
+            text = "Non disponible"
+        else:
+            text = ", ".join(result['ipv4'])
+            if result['ipv6']:
+                text += f" (+{len(result['ipv6'])} IPv6)" if text else ", ".join(result['ipv6'])
+        
+        item = QTableWidgetItem(text)
+        # Détail par interface dans l'infobulle
+        details = [
+            f"{iface['name']} [{iface['mac']}]: " + ", ".join(iface['ipv4'] + iface['ipv6'])
+            for iface in result['interfaces']
+        ]
+        item.setToolTip("\n".join(details) or result['error'])
+        self.vms_table.setItem(row, 2, item)
+
+    def on_resolve_complete(self, summary):
+        """Fin de la résolution des IPs"""
+        self.vms_table.resizeColumnsToContents()
+
+    def closeEvent(self, event):
+        """Arrête la résolution en cours lors de la fermeture"""
+        if self.resolve_thread and self.resolve_thread.isRunning():
+            self.resolve_thread.terminate()
+            self.resolve_thread.wait()
+        event.accept()
 
     def on_ip_assigned(self, vmid, combo):
         """Appelé quand une IP est assignée à une VM"""
@@ -26,8 +26,8 @@ class ConnectionTestThread(QThread):
             # Créer une instance temporaire pour le test
             temp_handler = ProxmoxHandler()
             
-            # Test de connexion
-            success = temp_handler.connect(self.config)
+            # Test de connexion : vrai login, un ticket en cache validerait un mauvais mot de passe
+            success = temp_handler.connect(self.config, use_cache=False)
             
             if success:
                 self.progress_update.emit("Récupération des informations...")
@@ -36,6 +36,9 @@ class ConnectionTestThread(QThread):
                 version = temp_handler.get_version()
                 nodes = len(temp_handler.nodes)
                 
+                # Le ticket obtenu reste dans le trousseau : la connexion définitive le réutilisera
+                temp_handler.auth.stop_renewal()
+                
                 message = f"Connexion réussie!\nVersion: {version}\nNœuds détectés: {nodes}"
                 self.connection_result.emit(True, message)
             else:
@@ -92,6 +95,16 @@ class ProxmoxConfigDialog(QDialog):
         self.password_input.setPlaceholderText("Mot de passe")
         self.password_input.textChanged.connect(self.on_config_changed)
         
+        # Token API (alternative au mot de passe, aucun login nécessaire)
+        self.token_name_input = QLineEdit()
+        self.token_name_input.setPlaceholderText("Optionnel - Ex: toolbox")
+        self.token_name_input.textChanged.connect(self.on_config_changed)
+        
+        self.token_value_input = QLineEdit()
+        self.token_value_input.setEchoMode(QLineEdit.EchoMode.Password)
+        self.token_value_input.setPlaceholderText("Secret du token (remplace le mot de passe)")
+        self.token_value_input.textChanged.connect(self.on_config_changed)
+        
         # Checkbox pour montrer/masquer le mot de passe
         self.show_password_checkbox = QCheckBox("Afficher le mot de passe")
         self.show_password_checkbox.toggled.connect(self.toggle_password_visibility)
@@ -104,6 +117,8 @@ class ProxmoxConfigDialog(QDialog):
         connection_layout.addRow("Port:", self.port_input)
         connection_layout.addRow("Utilisateur:", self.user_input)
         connection_layout.addRow("Mot de passe:", self.password_input)
+        connection_layout.addRow("Token API (nom):", self.token_name_input)
+        connection_layout.addRow("Token API (secret):", self.token_value_input)
         connection_layout.addRow("", self.show_password_checkbox)
         connection_layout.addRow("", self.verify_ssl_checkbox)
         
@@ -188,10 +203,14 @@ class ProxmoxConfigDialog(QDialog):
 
     def update_button_states(self):
         """Met à jour l'état des boutons selon la validité de la config"""
+        has_credentials = bool(
+            self.password_input.text().strip() or
+            (self.token_name_input.text().strip() and self.token_value_input.text().strip())
+        )
         has_required_fields = bool(
             self.ip_input.text().strip() and 
             self.user_input.text().strip() and 
-            self.password_input.text().strip()
+            has_credentials
         )
         
         self.test_button.setEnabled(has_required_fields)
@@ -201,8 +220,10 @@ class ProxmoxConfigDialog(QDialog):
         """Bascule la visibilité du mot de passe"""
         if checked:
             self.password_input.setEchoMode(QLineEdit.EchoMode.Normal)
+            self.token_value_input.setEchoMode(QLineEdit.EchoMode.Normal)
         else:
             self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
+            self.token_value_input.setEchoMode(QLineEdit.EchoMode.Password)
 
     def test_connection(self):
         """Lance le test de connexion en arrière-plan"""
@@ -246,6 +267,8 @@ class ProxmoxConfigDialog(QDialog):
             "port": self.port_input.value(),
             "user": self.user_input.text().strip(),
             "password": self.password_input.text().strip(),
+            "token_name": self.token_name_input.text().strip(),
+            "token_value": self.token_value_input.text().strip(),
             "verify_ssl": self.verify_ssl_checkbox.isChecked()
         }
 
@@ -259,6 +282,7 @@ class ProxmoxConfigDialog(QDialog):
                 "ip": config["ip"],
                 "port": config["port"],
                 "user": config["user"],
+                "token_name": config["token_name"],
                 "verify_ssl": config["verify_ssl"],
                 "auto_connect": self.auto_connect_checkbox.isChecked()
             }
@@ -274,6 +298,13 @@ class ProxmoxConfigDialog(QDialog):
                 except Exception as e:
                     print(f"Impossible de sauvegarder le mot de passe: {e}")
             
+            # Même traitement pour le secret du token API
+            if self.save_password_checkbox.isChecked() and config["token_name"] and config["token_value"]:
+                try:
+                    keyring.set_password("proxmox_toolbox_token", f"{config['user']}!{config['token_name']}", config["token_value"])
+                except Exception as e:
+                    print(f"Impossible de sauvegarder le token API: {e}")
+            
             QMessageBox.information(self, "Sauvegarde", "Configuration sauvegardée avec succès!")
             
         except Exception as e:
@@ -290,6 +321,7 @@ class ProxmoxConfigDialog(QDialog):
                 self.ip_input.setText(config.get("ip", ""))
                 self.port_input.setValue(config.get("port", 8006))
                 self.user_input.setText(config.get("user", ""))
+                self.token_name_input.setText(config.get("token_name", ""))
                 self.verify_ssl_checkbox.setChecked(config.get("verify_ssl", False))
                 self.auto_connect_checkbox.setChecked(config.get("auto_connect", False))
                 
@@ -304,6 +336,16 @@ class ProxmoxConfigDialog(QDialog):
                     except Exception as e:
                         print(f"Impossible de récupérer le mot de passe: {e}")
                 
+                token_name = config.get("token_name", "")
+                if username and token_name:
+                    try:
+                        token_value = keyring.get_password("proxmox_toolbox_token", f"{username}!{token_name}")
+                        if token_value:
+                            self.token_value_input.setText(token_value)
+                            self.save_password_checkbox.setChecked(True)
+                    except Exception as e:
+                        print(f"Impossible de récupérer le token API: {e}")
+                
         except Exception as e:
             print(f"Impossible de charger la configuration: {e}")
 
@@ -322,8 +364,9 @@ class ProxmoxConfigDialog(QDialog):
             self.user_input.setFocus()
             return
         
-        if not config["password"]:
-            QMessageBox.warning(self, "Champ requis", "Le mot de passe est requis")
+        uses_token = bool(config["token_name"] and config["token_value"])
+        if not config["password"] and not uses_token:
+            QMessageBox.warning(self, "Champ requis", "Le mot de passe ou un token API est requis")
             self.password_input.setFocus()
             return
         
@@ -333,6 +333,24 @@ class QemuAgentInstallThread(QThread):
             log_error(f"Erreur redémarrage robuste: {str(e)}", "Installation")
             return False, f"Erreur redémarrage: {str(e)}"
 
+class VmStatusLoadThread(QThread):
+    """Thread pour analyser le statut QEMU Agent des VMs sans bloquer l'interface"""
+    vm_loaded = pyqtSignal(dict)  # statut détaillé d'une VM
+    load_complete = pyqtSignal(int)  # nombre de VMs analysées
+    load_failed = pyqtSignal(str)  # message d'erreur
+    
+    def __init__(self, proxmox_handler):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+    
+    def run(self):
+        try:
+            vms_detailed = self.proxmox_handler.get_all_vms_with_agent_status(callback=self.vm_loaded.emit)
+            log_debug(f"Récupération de {len(vms_detailed)} VMs depuis Proxmox", "QemuAgent")
+            self.load_complete.emit(len(vms_detailed))
+        except Exception as e:
+            self.load_failed.emit(str(e))
+
 class QemuAgentManagerDialog(QDialog):
     def __init__(self, parent=None, proxmox_handler=None):
         super().__init__(parent)
@@ -341,6 +359,8 @@ class QemuAgentManagerDialog(QDialog):
         self.resize(800, 500)  # Réduit car plus de zone de logs
         self.ssh_credentials = {}
         self.install_threads = []
+        self.load_thread = None
+        self._search_matches = None
         self.init_ui()
         self.load_vms_status()
 
@@ -371,6 +391,13 @@ class QemuAgentManagerDialog(QDialog):
         """)
         layout.addWidget(logs_info)
         
+        # === RECHERCHE ===
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 Rechercher une VM (nom, ID, node, tag, IP, notes)...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.filter_vms)
+        layout.addWidget(self.search_edit)
+        
         # === TABLEAU DES VMs ===
         self.vm_table = QTableWidget()
         self.vm_table.setColumnCount(6)
@@ -428,86 +455,156 @@ class QemuAgentManagerDialog(QDialog):
         self.setLayout(layout)
 
     def load_vms_status(self):
-        """Charge le statut de toutes les VMs"""
+        """Charge le statut de toutes les VMs (analyse en arrière-plan)"""
         if not self.proxmox_handler:
             log_error("Aucun handler Proxmox disponible", "QemuAgent")
             return
         
+        if self.load_thread and self.load_thread.isRunning():
+            log_debug("Analyse des VMs déjà en cours", "QemuAgent")
+            return
+        
         self.status_label.setText("Analyse des VMs en cours...")
         log_step(1, 2, "Analyse des VMs et statut QEMU Agent", "QemuAgent")
         
-        try:
-            vms_detailed = self.proxmox_handler.get_all_vms_with_agent_status()
-            log_debug(f"Récupération de {len(vms_detailed)} VMs depuis Proxmox", "QemuAgent")
-            
-            self.vm_table.setRowCount(len(vms_detailed))
-            
-            for row, vm in enumerate(vms_detailed):
-                vm_name = vm['name']
-                log_debug(f"Traitement VM {vm_name} - OS: {vm['os_type']}, Statut: {vm['status']}", "QemuAgent")
-                
-                # Nom de la VM
-                name_item = QTableWidgetItem(vm_name)
-                self.vm_table.setItem(row, 0, name_item)
-                
-                # OS
-                os_text = vm['os_type'].title() if vm['os_type'] != 'unknown' else "❓ Inconnu"
-                os_item = QTableWidgetItem(os_text)
-                self.vm_table.setItem(row, 1, os_item)
-                
-                # État
-                status_text = "🟢 Démarrée" if vm['status'] == 'running' else "🔴 Arrêtée"
-                status_item = QTableWidgetItem(status_text)
-                self.vm_table.setItem(row, 2, status_item)
-                
-                # Agent activé
-                enabled_text = "✅ Oui" if vm['agent_enabled'] else "❌ Non"
-                enabled_item = QTableWidgetItem(enabled_text)
-                self.vm_table.setItem(row, 3, enabled_item)
-                
-                # Agent fonctionne
-                if vm['status'] != 'running':
-                    running_text = "⏸️ VM arrêtée"
-                elif vm['agent_running']:
-                    running_text = f"✅ Oui (IP: {vm['ip']})"
-                    log_debug(f"VM {vm_name} - Agent fonctionnel sur IP {vm['ip']}", "QemuAgent")
-                else:
-                    running_text = "❌ Non"
-                    log_debug(f"VM {vm_name} - Agent non fonctionnel", "QemuAgent")
-                    
-                running_item = QTableWidgetItem(running_text)
-                self.vm_table.setItem(row, 4, running_item)
-                
-                # Bouton d'action
-                if vm['can_install_agent'] and vm['status'] == 'running' and not vm['agent_running']:
-                    action_btn = QPushButton("🔧 Installer + Redémarrer")
-                    action_btn.setStyleSheet("""
-                        QPushButton {
-                            background-color: #007bff;
-                            color: white;
-                            border: none;
-                            padding: 5px 10px;
-                            border-radius: 3px;
-                            font-weight: bold;
-                        }
-                        QPushButton:hover {
-                            background-color: #0056b3;
-                        }
-                    """)
-                    action_btn.clicked.connect(lambda checked, v=vm: self.install_single_vm(v))
-                    self.vm_table.setCellWidget(row, 5, action_btn)
-                    log_debug(f"VM {vm_name} - Bouton d'installation disponible", "QemuAgent")
-                else:
-                    action_item = QTableWidgetItem("✅ OK" if vm['agent_running'] else "⚠️ Manuel")
-                    self.vm_table.setItem(row, 5, action_item)
-            
-            self.vm_table.resizeColumnsToContents()
-            self.status_label.setText(f"Analyse terminée - {len(vms_detailed)} VMs trouvées")
-            log_step(2, 2, f"Analyse terminée - {len(vms_detailed)} VMs trouvées", "QemuAgent")
-            
-        except Exception as e:
-            self.status_label.setText(f"Erreur: {str(e)}")
-            log_error(f"Erreur lors du chargement des VMs: {str(e)}", "QemuAgent")
+        self.vm_table.setRowCount(0)
+        self.refresh_btn.setEnabled(False)
+        
+        # Les lignes sont ajoutées au fur et à mesure que les VMs sont analysées
+        self.load_thread = VmStatusLoadThread(self.proxmox_handler)
+        self.load_thread.vm_loaded.connect(self.on_vm_loaded)
+        self.load_thread.load_complete.connect(self.on_load_complete)
+        self.load_thread.load_failed.connect(self.on_load_failed)
+        self.load_thread.start()
+
+    def on_vm_loaded(self, vm):
+        """Ajoute une ligne au tableau dès qu'une VM est analysée"""
+        row = self.vm_table.rowCount()
+        self.vm_table.insertRow(row)
+        self.populate_vm_row(row, vm)
+        self.apply_filter_to_row(row)
+        self.status_label.setText(f"Analyse des VMs en cours... ({row + 1} VMs)")
+
+    def populate_vm_row(self, row, vm):
+        """Remplit une ligne du tableau avec le statut d'une VM"""
+        vm_name = vm['name']
+        log_debug(f"Traitement VM {vm_name} - OS: {vm['os_type']}, Statut: {vm['status']}", "QemuAgent")
+        
+        # Nom de la VM (le vmid est conservé pour retrouver la ligne)
+        name_item = QTableWidgetItem(vm_name)
+        name_item.setData(Qt.ItemDataRole.UserRole, str(vm['vmid']))
+        self.vm_table.setItem(row, 0, name_item)
+        
+        # OS
+        os_text = vm['os_type'].title() if vm['os_type'] != 'unknown' else "❓ Inconnu"
+        os_item = QTableWidgetItem(os_text)
+        self.vm_table.setItem(row, 1, os_item)
+        
+        # État
+        status_text = "🟢 Démarrée" if vm['status'] == 'running' else "🔴 Arrêtée"
+        status_item = QTableWidgetItem(status_text)
+        self.vm_table.setItem(row, 2, status_item)
+        
+        # Agent activé
+        enabled_text = "✅ Oui" if vm['agent_enabled'] else "❌ Non"
+        enabled_item = QTableWidgetItem(enabled_text)
+        self.vm_table.setItem(row, 3, enabled_item)
+        
+        # Agent fonctionne
+        if vm['status'] != 'running':
+            running_text = "⏸️ VM arrêtée"
+        elif vm['agent_running']:
+            running_text = f"✅ Oui (IP: {vm['ip']})"
+            log_debug(f"VM {vm_name} - Agent fonctionnel sur IP {vm['ip']}", "QemuAgent")
+        else:
+            running_text = "❌ Non"
+            log_debug(f"VM {vm_name} - Agent non fonctionnel", "QemuAgent")
+            
+        running_item = QTableWidgetItem(running_text)
+        self.vm_table.setItem(row, 4, running_item)
+        
+        # Bouton d'action
+        if vm['can_install_agent'] and vm['status'] == 'running' and not vm['agent_running']:
+            action_btn = QPushButton("🔧 Installer + Redémarrer")
+            action_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #007bff;
+                    color: white;
+                    border: none;
+                    padding: 5px 10px;
+                    border-radius: 3px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #0056b3;
+                }
+            """)
+            action_btn.clicked.connect(lambda checked, v=vm: self.install_single_vm(v))
+            self.vm_table.setCellWidget(row, 5, action_btn)
+            log_debug(f"VM {vm_name} - Bouton d'installation disponible", "QemuAgent")
+        else:
+            action_item = QTableWidgetItem("✅ OK" if vm['agent_running'] else "⚠️ Manuel")
+            self.vm_table.setItem(row, 5, action_item)
+
+    def find_vm_row(self, vmid):
+        """Retourne la ligne d'une VM dans le tableau, ou -1"""
+        for row in range(self.vm_table.rowCount()):
+            item = self.vm_table.item(row, 0)
+            if item and item.data(Qt.ItemDataRole.UserRole) == str(vmid):
+                return row
+        return -1
+
+    def apply_vm_change(self, vm):
+        """Met à jour (ou ajoute) la ligne d'une VM modifiée sur le cluster"""
+        if self.load_thread and self.load_thread.isRunning():
+            return  # L'analyse complète en cours inclura la modification
+        row = self.find_vm_row(vm['vmid'])
+        if row < 0:
+            row = self.vm_table.rowCount()
+            self.vm_table.insertRow(row)
+        self.vm_table.removeCellWidget(row, 5)
+        self.populate_vm_row(row, vm)
+        self.filter_vms()
+
+    def remove_vm_row(self, vmid):
+        """Retire la ligne d'une VM supprimée du cluster"""
+        row = self.find_vm_row(vmid)
+        if row >= 0:
+            self.vm_table.removeRow(row)
+
+    def filter_vms(self, text=None):
+        """Masque les lignes ne correspondant pas à la recherche (index en mémoire)"""
+        text = self.search_edit.text() if text is None else text
+        if text.strip():
+            self._search_matches = set(self.proxmox_handler.search_index.search(text))
+        else:
+            self._search_matches = None
+        for row in range(self.vm_table.rowCount()):
+            self.apply_filter_to_row(row)
+
+    def apply_filter_to_row(self, row):
+        """Affiche ou masque une ligne selon la dernière recherche"""
+        item = self.vm_table.item(row, 0)
+        visible = self._search_matches is None or (
+            item is not None and item.data(Qt.ItemDataRole.UserRole) in self._search_matches
+        )
+        self.vm_table.setRowHidden(row, not visible)
+
+    def on_load_complete(self, count):
+        """Appelé quand toutes les VMs ont été analysées"""
+        self.refresh_btn.setEnabled(True)
+        # Les IPs remontées pendant l'analyse deviennent recherchables
+        self.proxmox_handler.search_index.sync()
+        self.filter_vms()
+        self.vm_table.resizeColumnsToContents()
+        self.status_label.setText(f"Analyse terminée - {count} VMs trouvées")
+        log_step(2, 2, f"Analyse terminée - {count} VMs trouvées", "QemuAgent")
+
+    def on_load_failed(self, message):
+        """Appelé si l'analyse des VMs échoue"""
+        self.refresh_btn.setEnabled(True)
+        self.status_label.setText(f"Erreur: {message}")
+        log_error(f"Erreur lors du chargement des VMs: {message}", "QemuAgent")
 
     def install_single_vm(self, vm_info):
         """Installe QEMU Agent sur une VM spécifique avec redémarrage automatique"""
@@ -640,6 +737,11 @@ Continuer l'installation ?""",
         log_info("Fermeture du gestionnaire QEMU Agent", "QemuAgent")
         
         active_threads = 0
+        if self.load_thread and self.load_thread.isRunning():
+            self.load_thread.terminate()
+            self.load_thread.wait()
+            active_threads += 1
+        
         for thread in self.install_threads:
             if thread.isRunning():
                 thread.terminate()
@@ -0,0 +1,248 @@
+import datetime
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QComboBox, QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
+    QFileDialog, QMessageBox, QProgressBar, QInputDialog
+)
+
+from ...core.logger import log_error, log_info
+
+
+class ContentIndexThread(QThread):
+    """Thread de mise à jour de l'index du contenu des stockages"""
+    index_complete = pyqtSignal(dict)
+    index_failed = pyqtSignal(str)
+
+    def __init__(self, proxmox_handler):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+
+    def run(self):
+        try:
+            self.index_complete.emit(self.proxmox_handler.index_storage_content() or {})
+        except Exception as e:
+            self.index_failed.emit(str(e))
+
+
+class UploadThread(QThread):
+    """Thread d'envoi d'un ISO ou d'un template vers plusieurs stockages"""
+    upload_progress = pyqtSignal(dict)
+    upload_complete = pyqtSignal(dict)
+
+    def __init__(self, proxmox_handler, path, targets, content, sha256=None):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.path = path
+        self.targets = targets
+        self.content = content
+        self.sha256 = sha256
+
+    def run(self):
+        try:
+            summary = self.proxmox_handler.upload_to_storages(
+                self.path, self.targets, content=self.content, sha256=self.sha256,
+                callback=self.upload_progress.emit)
+        except Exception as e:
+            log_error(f"Erreur envoi de {self.path}: {e}", "Tools")
+            summary = None
+        self.upload_complete.emit(summary or {})
+
+
+class StorageContentDialog(QDialog):
+    """Recherche instantanée d'ISOs, de templates et de sauvegardes dans l'index local"""
+
+    CONTENT_FILTERS = [("Tout", None), ("Sauvegardes", "backup"), ("ISOs", "iso"), ("Templates CT", "vztmpl")]
+    COLUMNS = ["Nom", "Type", "VM", "Stockage", "Date", "Taille (GiB)", "Notes"]
+
+    def __init__(self, parent=None, proxmox_handler=None):
+        super().__init__(parent)
+        self.proxmox_handler = proxmox_handler
+        self.index_thread = None
+        self.upload_thread = None
+
+        self.setWindowTitle("Contenu des stockages")
+        self.resize(1000, 600)
+        self.init_ui()
+        self.run_search()
+        self.refresh_index()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        header_label = QLabel("🗂️ ISOs, templates et sauvegardes du cluster")
+        header_label.setStyleSheet("font-size: 14px; font-weight: bold; margin-bottom: 10px;")
+        layout.addWidget(header_label)
+
+        # === CRITÈRES ===
+        criteria_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("ID de VM ou nom (jokers * et ? acceptés)")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.run_search)
+        criteria_layout.addWidget(self.search_edit)
+
+        self.content_combo = QComboBox()
+        for label, _ in self.CONTENT_FILTERS:
+            self.content_combo.addItem(label)
+        self.content_combo.currentIndexChanged.connect(self.run_search)
+        criteria_layout.addWidget(self.content_combo)
+
+        criteria_layout.addWidget(QLabel("Depuis (jours, 0 = tout) :"))
+        self.days_spin = QSpinBox()
+        self.days_spin.setRange(0, 3650)
+        self.days_spin.valueChanged.connect(self.run_search)
+        criteria_layout.addWidget(self.days_spin)
+        layout.addLayout(criteria_layout)
+
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(len(self.COLUMNS))
+        self.results_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.results_table)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d; font-style: italic;")
+        layout.addWidget(self.status_label)
+
+        self.upload_progress = QProgressBar()
+        self.upload_progress.setVisible(False)
+        layout.addWidget(self.upload_progress)
+
+        button_layout = QHBoxLayout()
+        self.reindex_btn = QPushButton("🔄 Mettre à jour l'index")
+        self.reindex_btn.clicked.connect(self.refresh_index)
+        button_layout.addWidget(self.reindex_btn)
+        self.upload_btn = QPushButton("📤 Envoyer un ISO / template")
+        self.upload_btn.clicked.connect(self.upload_file)
+        button_layout.addWidget(self.upload_btn)
+        button_layout.addStretch()
+        close_btn = QPushButton("Fermer")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def run_search(self):
+        """Interroge l'index local à chaque modification des critères"""
+        text = self.search_edit.text().strip()
+        days = self.days_spin.value()
+        criteria = {
+            "content": self.CONTENT_FILTERS[self.content_combo.currentIndex()][1],
+            "since": datetime.datetime.now().timestamp() - days * 86400 if days else None
+        }
+        if text.isdigit():
+            criteria["vmid"] = int(text)
+        elif text:
+            criteria["pattern"] = text
+        results = self.proxmox_handler.search_storage_content(**criteria)
+
+        self.results_table.setRowCount(len(results))
+        for row, volume in enumerate(results):
+            ctime = datetime.datetime.fromtimestamp(volume['ctime']).strftime("%Y-%m-%d %H:%M") if volume['ctime'] else ""
+            location = volume['storage'] if volume['location'] == volume['storage'] else volume['location']
+            values = [volume['name'], volume['content'], str(volume['vmid'] or ""), location, ctime,
+                      f"{(volume['size'] or 0) / 1024 ** 3:.1f}", volume['notes'] or ""]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setToolTip(volume['volid'])
+                self.results_table.setItem(row, column, item)
+        self.results_table.resizeColumnsToContents()
+        self.status_label.setText(f"{len(results)} volume(s) trouvé(s)")
+
+    def refresh_index(self):
+        """Liste les stockages en arrière-plan ; la recherche reste utilisable pendant ce temps"""
+        if self.index_thread and self.index_thread.isRunning():
+            return
+        self.reindex_btn.setEnabled(False)
+        self.index_thread = ContentIndexThread(self.proxmox_handler)
+        self.index_thread.index_complete.connect(self.on_index_complete)
+        self.index_thread.index_failed.connect(self.on_index_failed)
+        self.index_thread.start()
+
+    def on_index_complete(self, stats):
+        self.reindex_btn.setEnabled(True)
+        self.run_search()
+        if stats:
+            self.status_label.setText(
+                f"{self.status_label.text()} - index à jour: {stats['volumes']} volume(s), "
+                f"+{stats['added']} / -{stats['removed']} en {stats['duration']:.1f}s"
+            )
+
+    def on_index_failed(self, message):
+        self.reindex_btn.setEnabled(True)
+        log_error(f"Erreur indexation du contenu des stockages: {message}", "Tools")
+
+    def upload_file(self):
+        """Envoie un fichier local vers tous les stockages acceptant son type de contenu"""
+        if self.upload_thread and self.upload_thread.isRunning():
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Sélectionner un ISO ou un template", "",
+            "Images et templates (*.iso *.img *.tar.gz *.tar.xz *.tar.zst);;Tous les fichiers (*)")
+        if not path:
+            return
+        content = self.proxmox_handler.uploads.content_type(path)
+        targets = self.proxmox_handler.uploads.default_targets(content)
+        if not targets:
+            QMessageBox.warning(self, "Envoi", f"Aucun stockage n'accepte le contenu « {content} ».")
+            return
+        labels = "\n".join(f"  • {target['label']}" for target in targets)
+        answer = QMessageBox.question(self, "Envoi", f"Envoyer {path} vers :\n{labels}")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        sha256, ok = QInputDialog.getText(
+            self, "Envoi", "sha256 attendu (SHA256SUMS de l'éditeur), vide = calculé localement :")
+        if not ok:
+            return
+        sha256 = sha256.strip().lower()
+        if sha256 and (len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256)):
+            QMessageBox.warning(self, "Envoi", "sha256 invalide (64 caractères hexadécimaux attendus).")
+            return
+
+        log_info(f"Envoi de {path} vers {len(targets)} stockage(s)", "Tools")
+        self.upload_btn.setEnabled(False)
+        self.upload_progress.setRange(0, 1000)
+        self.upload_progress.setValue(0)
+        self.upload_progress.setVisible(True)
+        self.upload_thread = UploadThread(self.proxmox_handler, path, targets, content, sha256 or None)
+        self.upload_thread.upload_progress.connect(self.on_upload_progress)
+        self.upload_thread.upload_complete.connect(self.on_upload_complete)
+        self.upload_thread.start()
+
+    def on_upload_progress(self, event):
+        total = event['total'] or 1
+        self.upload_progress.setValue(int(event['read'] / total * 1000))
+        eta = f", reste {event['eta']:.0f}s" if event['eta'] is not None else ""
+        self.upload_progress.setFormat(
+            f"{event['read'] / 1024 ** 3:.2f} / {total / 1024 ** 3:.2f} GiB - "
+            f"{event['rate'] / 1024 ** 2:.0f} MiB/s{eta}")
+
+    def on_upload_complete(self, summary):
+        self.upload_btn.setEnabled(True)
+        self.upload_progress.setVisible(False)
+        results = summary.get('results', [])
+        failed = [result for result in results if not result['success']]
+        if not results:
+            self.status_label.setText("❌ Envoi impossible")
+            return
+        self.status_label.setText(
+            f"📤 Envoi terminé: {len(results) - len(failed)}/{len(results)} stockage(s) en "
+            f"{summary['duration']:.0f}s - sha256 {summary['sha256'][:16]}...")
+        if failed:
+            QMessageBox.warning(self, "Envoi", "\n".join(f"{result['label']}: {result['message']}" for result in failed))
+        self.refresh_index()
+
+    def closeEvent(self, event):
+        """Attend la fin de l'indexation avant de fermer ; refusé pendant un envoi"""
+        if self.upload_thread and self.upload_thread.isRunning():
+            QMessageBox.information(self, "Envoi", "Un envoi est en cours, attendez sa fin avant de fermer.")
+            event.ignore()
+            return
+        if self.index_thread and self.index_thread.isRunning():
+            self.index_thread.wait(2000)
+        event.accept()
@@ -1,5 +1,5 @@
 import os
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
     QMainWindow, QPushButton, QListWidget, QVBoxLayout,
     QWidget, QInputDialog, QLineEdit, QMessageBox, QTabWidget,
@@ -10,7 +10,10 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QColor, QFont, QTextCharFormat
 from .dialogs.proxmox_config_dialog import ProxmoxConfigDialog
 from .dialogs.qemu_agent_dialog import QemuAgentManagerDialog
+from .dialogs.guest_disk_dialog import GuestDiskUsageDialog
+from .dialogs.storage_content_dialog import StorageContentDialog
 from ..utils.ip_plan_importer import IPPlanImporter
+from ..services.change_feed_thread import ChangeFeedThread
 import pandas as pd
 import datetime
 
@@ -18,6 +21,95 @@ import datetime
 from ..core.logger import toolbox_logger, log_info, log_debug, log_error, log_success, log_warning
 
 
+class MetricsCollectThread(QThread):
+    """Thread de collecte des métriques RRD (nœuds et VMs)"""
+    collect_complete = pyqtSignal(int)  # nombre de séries mises à jour
+    collect_failed = pyqtSignal(str)
+    
+    def __init__(self, proxmox_handler):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+    
+    def run(self):
+        try:
+            self.collect_complete.emit(self.proxmox_handler.metrics.collect())
+        except Exception as e:
+            self.collect_failed.emit(str(e))
+
+
+class StorageDetailThread(QThread):
+    """Thread de lecture du détail d'un stockage (nodes/{node}/storage/{storage}/status)"""
+    detail_ready = pyqtSignal(dict)
+    detail_failed = pyqtSignal(str)
+    
+    def __init__(self, proxmox_handler, node_name, storage_name):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.node_name = node_name
+        self.storage_name = storage_name
+    
+    def run(self):
+        detail = self.proxmox_handler.get_storage_detail(self.node_name, self.storage_name)
+        if detail:
+            self.detail_ready.emit(detail)
+        else:
+            self.detail_failed.emit(f"{self.storage_name} sur {self.node_name}")
+
+
+class MigrationThread(QThread):
+    """Thread d'exécution d'un lot de migrations à chaud"""
+    migration_event = pyqtSignal(dict)
+    migration_complete = pyqtSignal(dict)
+    
+    def __init__(self, proxmox_handler, moves):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.moves = moves
+    
+    def run(self):
+        summary = self.proxmox_handler.migrate_vms(self.moves, callback=self.migration_event.emit)
+        self.migration_complete.emit(summary or {})
+
+
+class ProvisioningThread(QThread):
+    """Thread de provisionnement de VMs par clonage d'un template"""
+    provisioning_event = pyqtSignal(dict)
+    provisioning_complete = pyqtSignal(dict)
+    
+    def __init__(self, proxmox_handler, template_vmid, specs, linked, gateway):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.template_vmid = template_vmid
+        self.specs = specs
+        self.linked = linked
+        self.gateway = gateway
+    
+    def run(self):
+        summary = self.proxmox_handler.provision_vms(
+            self.template_vmid, self.specs, linked=self.linked, gateway=self.gateway or None,
+            callback=self.provisioning_event.emit
+        )
+        self.provisioning_complete.emit(summary or {})
+
+
+class BackupThread(QThread):
+    """Thread d'exécution d'un lot de sauvegardes vzdump"""
+    backup_event = pyqtSignal(dict)
+    backup_complete = pyqtSignal(dict)
+    
+    def __init__(self, proxmox_handler, vms, storage, deadline):
+        super().__init__()
+        self.proxmox_handler = proxmox_handler
+        self.vms = vms
+        self.storage = storage
+        self.deadline = deadline
+    
+    def run(self):
+        summary = self.proxmox_handler.backup_vms(self.vms, self.storage, deadline=self.deadline,
+                                                  callback=self.backup_event.emit)
+        self.backup_complete.emit(summary or {})
+
+
 class MainWindow(QMainWindow):
     # Constantes de version
     VERSION = "Alpha 0.0.6"
@@ -29,6 +121,14 @@ class MainWindow(QMainWindow):
         self.script_runner = script_runner
         self.proxmox_handler = proxmox_handler
         self.importer = IPPlanImporter()
+        self.change_feed_thread = None
+        self.metrics_thread = None
+        self.storage_detail_thread = None
+        self.migration_thread = None
+        self.provisioning_thread = None
+        self.backup_thread = None
+        self._last_migration_report = 0
+        self._last_backup_report = {}
         
         # Initialisation du logging pour la fenêtre principale
         log_info("Initialisation de la fenêtre principale", "MainWindow")
@@ -504,6 +604,29 @@ class MainWindow(QMainWindow):
         self.qemu_agent_btn.setEnabled(False)
         vm_layout.addWidget(self.qemu_agent_btn)
         
+        self.guest_disks_btn = QPushButton("💽 Remplissage des disques invités")
+        self.guest_disks_btn.clicked.connect(self.open_guest_disk_usage)
+        self.guest_disks_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #20c997;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #1aa179;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.guest_disks_btn.setEnabled(False)
+        vm_layout.addWidget(self.guest_disks_btn)
+        
         self.list_vms_btn = QPushButton("📋 Lister toutes les VMs")
         self.list_vms_btn.clicked.connect(self.list_all_vms)
         self.list_vms_btn.setStyleSheet("""
@@ -603,6 +726,121 @@ class MainWindow(QMainWindow):
         self.storage_info_btn.setEnabled(False)
         infra_layout.addWidget(self.storage_info_btn)
         
+        self.storage_content_btn = QPushButton("🗂️ ISOs, templates et sauvegardes")
+        self.storage_content_btn.clicked.connect(self.open_storage_content)
+        self.storage_content_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #0dcaf0;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #0aa2c0;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.storage_content_btn.setEnabled(False)
+        infra_layout.addWidget(self.storage_content_btn)
+        
+        self.trends_btn = QPushButton("📈 Tendances CPU / RAM")
+        self.trends_btn.clicked.connect(self.show_trends)
+        self.trends_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #20c997;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #199d76;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.trends_btn.setEnabled(False)
+        infra_layout.addWidget(self.trends_btn)
+        
+        self.rebalance_btn = QPushButton("⚖️ Plan de rééquilibrage")
+        self.rebalance_btn.clicked.connect(self.show_rebalance_plan)
+        self.rebalance_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #fd7e14;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #dc6a0a;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.rebalance_btn.setEnabled(False)
+        infra_layout.addWidget(self.rebalance_btn)
+        
+        self.evacuate_btn = QPushButton("🚚 Évacuer un nœud")
+        self.evacuate_btn.clicked.connect(self.evacuate_node)
+        self.evacuate_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6610f2;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #520dc2;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.evacuate_btn.setEnabled(False)
+        infra_layout.addWidget(self.evacuate_btn)
+        
+        self.backup_btn = QPushButton("💾 Sauvegarder des VMs")
+        self.backup_btn.clicked.connect(self.backup_vms)
+        self.backup_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #198754;
+                color: white;
+                border: none;
+                padding: 12px;
+                border-radius: 5px;
+                font-weight: bold;
+                text-align: left;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #146c43;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+            }
+        """)
+        self.backup_btn.setEnabled(False)
+        infra_layout.addWidget(self.backup_btn)
+        
         infra_group.setLayout(infra_layout)
         actions_layout.addWidget(infra_group)
         
@@ -943,24 +1181,21 @@ Type d'export   : {logs_info}
             
             self.proxmox_info_label.setText(f"Proxmox VE {version} • {nodes_count} nœud(s)")
             
-            try:
-                statuses = self.proxmox_handler.get_node_status()
-                if statuses:
-                    total_vms = len(self.proxmox_handler.list_vms())
-                    running_vms = len([vm for vm in self.proxmox_handler.list_vms() if vm['status'] == 'running'])
-                    
-                    self.system_info_label.setText(f"VMs: {running_vms}/{total_vms} actives")
-                else:
-                    self.system_info_label.setText("Stats en cours...")
-            except:
-                self.system_info_label.setText("Stats indisponibles")
+            self.update_vm_counts()
             
             self.qemu_agent_btn.setEnabled(True)
+            self.guest_disks_btn.setEnabled(True)
             self.list_vms_btn.setEnabled(True)
             self.scan_linux_btn.setEnabled(True)
             self.nodes_status_btn.setEnabled(True)
             self.storage_info_btn.setEnabled(True)
+            self.storage_content_btn.setEnabled(True)
+            self.trends_btn.setEnabled(True)
+            self.rebalance_btn.setEnabled(True)
+            self.evacuate_btn.setEnabled(True)
+            self.backup_btn.setEnabled(True)
             
+            self.start_change_feed()
             log_success(f"Interface Tools activée - Proxmox {version} avec {nodes_count} nœud(s)", "Tools")
         else:
             self.connection_status_label.setText("❌ Non connecté")
@@ -979,13 +1214,73 @@ Type d'export   : {logs_info}
             self.system_info_label.setText("")
             
             self.qemu_agent_btn.setEnabled(False)
+            self.guest_disks_btn.setEnabled(False)
             self.list_vms_btn.setEnabled(False)
             self.scan_linux_btn.setEnabled(False)
             self.nodes_status_btn.setEnabled(False)
             self.storage_info_btn.setEnabled(False)
+            self.storage_content_btn.setEnabled(False)
+            self.trends_btn.setEnabled(False)
+            self.rebalance_btn.setEnabled(False)
+            self.evacuate_btn.setEnabled(False)
+            self.backup_btn.setEnabled(False)
             
+            self.stop_change_feed()
             log_info("Interface Tools désactivée - Aucune connexion Proxmox", "Tools")
 
+    def update_vm_counts(self):
+        """Affiche le nombre de VMs actives (lu dans l'inventaire, tenu à jour par le flux de changements)"""
+        try:
+            statuses = self.proxmox_handler.get_node_status()
+            if statuses:
+                vms = self.proxmox_handler.list_vms()
+                running_vms = len([vm for vm in vms if vm['status'] == 'running'])
+                
+                self.system_info_label.setText(f"VMs: {running_vms}/{len(vms)} actives")
+            else:
+                self.system_info_label.setText("Stats en cours...")
+        except:
+            self.system_info_label.setText("Stats indisponibles")
+
+    def start_change_feed(self):
+        """Démarre le suivi des changements du cluster"""
+        self.stop_change_feed()
+        self.change_feed_thread = ChangeFeedThread(self.proxmox_handler)
+        self.change_feed_thread.vm_changed.connect(self.on_vm_changed)
+        self.change_feed_thread.vm_removed.connect(self.on_vm_removed)
+        self.change_feed_thread.node_changed.connect(self.on_node_changed)
+        self.change_feed_thread.inventory_resynced.connect(lambda count: self.update_vm_counts())
+        self.change_feed_thread.start()
+
+    def stop_change_feed(self):
+        """Arrête le suivi des changements du cluster"""
+        if self.change_feed_thread and self.change_feed_thread.isRunning():
+            self.change_feed_thread.stop()
+            self.change_feed_thread.wait()
+        self.change_feed_thread = None
+
+    def on_vm_changed(self, vm):
+        """Une VM a changé sur le cluster"""
+        log_info(f"VM modifiée: {vm['name']} (ID: {vm['vmid']}) on {vm['node']} - Status: {vm['status']}", "Tools")
+        self.update_vm_counts()
+
+    def on_vm_removed(self, vmid):
+        """Une VM a été supprimée du cluster"""
+        log_info(f"VM supprimée: ID {vmid}", "Tools")
+        self.update_vm_counts()
+
+    def on_node_changed(self, node):
+        """Le statut d'un nœud a changé"""
+        if node.get('status') != 'online':
+            log_warning(f"Node {node['node']} injoignable", "Tools")
+        else:
+            log_debug(f"Node {node['node']} mis à jour", "Tools")
+
+    def closeEvent(self, event):
+        """Arrête le suivi des changements avant la fermeture"""
+        self.stop_change_feed()
+        event.accept()
+
     def open_qemu_agent_manager(self):
         """Ouvre le gestionnaire QEMU Agent"""
         log_info("Ouverture du gestionnaire QEMU Agent", "Tools")
@@ -996,11 +1291,30 @@ Type d'export   : {logs_info}
         
         try:
             dialog = QemuAgentManagerDialog(self, self.proxmox_handler)
+            # Les changements du cluster sont appliqués au tableau ligne par ligne
+            if self.change_feed_thread:
+                self.change_feed_thread.vm_changed.connect(dialog.apply_vm_change)
+                self.change_feed_thread.vm_removed.connect(dialog.remove_vm_row)
             dialog.exec()
+            if self.change_feed_thread:
+                self.change_feed_thread.vm_changed.disconnect(dialog.apply_vm_change)
+                self.change_feed_thread.vm_removed.disconnect(dialog.remove_vm_row)
             log_info("Fermeture du gestionnaire QEMU Agent", "Tools")
         except Exception as e:
             log_error(f"Erreur ouverture gestionnaire QEMU Agent: {str(e)}", "Tools")
 
+    def open_guest_disk_usage(self):
+        """Ouvre le tableau de remplissage des disques invités"""
+        if not self.proxmox_handler.is_connected():
+            log_error("Pas de connexion Proxmox pour le relevé des disques", "Tools")
+            return
+        
+        try:
+            dialog = GuestDiskUsageDialog(self, self.proxmox_handler)
+            dialog.exec()
+        except Exception as e:
+            log_error(f"Erreur relevé des disques invités: {str(e)}", "Tools")
+
     def list_all_vms(self):
         """Liste toutes les VMs du cluster"""
         log_info("Listing de toutes les VMs", "Tools")
@@ -1054,17 +1368,21 @@ Type d'export   : {logs_info}
             log_error(f"Erreur statut nœuds: {str(e)}", "Tools")
 
     def show_storage_info(self):
-        """Affiche les informations de stockage"""
+        """Affiche les informations de stockage de l'inventaire"""
         log_info("Récupération des informations de stockage", "Tools")
         
         try:
             storages = self.proxmox_handler.get_storage_info()
             log_success(f"{len(storages)} stockage(s) analysé(s)", "Tools")
             
+            missing = []
             for storage in storages:
                 storage_name = storage['storage']
                 storage_type = storage['type']
-                node_name = storage['node']
+                if storage.get('shared') and len(storage.get('nodes', [])) > 1:
+                    node_name = f"{len(storage['nodes'])} nodes (partagé: {', '.join(storage['nodes'])})"
+                else:
+                    node_name = storage['node']
                 total = storage.get('total', 0)
                 used = storage.get('used', 0)
                 available = storage.get('available', 0)
@@ -1079,11 +1397,273 @@ Type d'export   : {logs_info}
                     log_info(f"  Used: {used_gb:.1f}G / {total_gb:.1f}G ({percent_used:.1f}%)", "Tools")
                     log_info(f"  Available: {available_gb:.1f}G", "Tools")
                 else:
-                    log_info(f"Storage: {storage_name} ({storage_type}) on {node_name}: Info unavailable", "Tools")
+                    log_info(f"Storage: {storage_name} ({storage_type}) on {node_name}: "
+                             f"Info unavailable (status: {storage.get('status')})", "Tools")
+                    missing.append(storage)
+            
+            if missing:
+                self.explore_storage(missing)
                     
         except Exception as e:
             log_error(f"Erreur informations stockage: {str(e)}", "Tools")
 
+    def explore_storage(self, storages):
+        """Propose de lire en arrière-plan le détail d'un stockage sans chiffres dans l'inventaire"""
+        if self.storage_detail_thread and self.storage_detail_thread.isRunning():
+            log_debug("Lecture du détail d'un stockage déjà en cours", "Tools")
+            return
+        
+        labels = [f"{storage['storage']} ({storage['node']})" for storage in storages]
+        label, ok = QInputDialog.getItem(self, "Détail d'un stockage",
+                                         "Stockage à interroger directement :", labels, 0, False)
+        if not ok:
+            return
+        storage = storages[labels.index(label)]
+        
+        self.storage_detail_thread = StorageDetailThread(self.proxmox_handler, storage['node'], storage['storage'])
+        self.storage_detail_thread.detail_ready.connect(self.on_storage_detail)
+        self.storage_detail_thread.detail_failed.connect(
+            lambda target: log_warning(f"Détail du stockage {target} indisponible", "Tools")
+        )
+        self.storage_detail_thread.start()
+
+    def on_storage_detail(self, detail):
+        """Affiche le détail d'un stockage lu directement sur son nœud"""
+        state = "actif" if detail['active'] else "inactif"
+        if not detail['enabled']:
+            state = "désactivé"
+        log_info(f"Storage: {detail['storage']} ({detail['type']}) on {detail['node']}: {state}", "Tools")
+        if detail['total'] > 0:
+            log_info(f"  Used: {detail['used'] / (1024**3):.1f}G / {detail['total'] / (1024**3):.1f}G "
+                     f"({detail['used'] / detail['total'] * 100:.1f}%)", "Tools")
+            log_info(f"  Available: {detail['available'] / (1024**3):.1f}G", "Tools")
+
+    def open_storage_content(self):
+        """Ouvre la recherche dans le contenu des stockages"""
+        try:
+            dialog = StorageContentDialog(self, self.proxmox_handler)
+            dialog.exec()
+        except Exception as e:
+            log_error(f"Erreur contenu des stockages: {str(e)}", "Tools")
+
+    def show_trends(self):
+        """Collecte les métriques RRD en arrière-plan puis affiche les tendances"""
+        if self.metrics_thread and self.metrics_thread.isRunning():
+            log_debug("Collecte des métriques déjà en cours", "Tools")
+            return
+        
+        log_info("Collecte des métriques des nœuds et des VMs", "Tools")
+        self.trends_btn.setEnabled(False)
+        self.metrics_thread = MetricsCollectThread(self.proxmox_handler)
+        self.metrics_thread.collect_complete.connect(self.on_metrics_collected)
+        self.metrics_thread.collect_failed.connect(self.on_metrics_failed)
+        self.metrics_thread.start()
+
+    def on_metrics_collected(self, series_count):
+        """Affiche les tendances calculées sur les tampons de métriques"""
+        self.trends_btn.setEnabled(True)
+        metrics = self.proxmox_handler.metrics
+        
+        for trend in metrics.node_trends(window=3600):
+            log_info(f"Node: {trend['node']} (dernière heure, {trend['points']} points)", "Tools")
+            cpu, mem = trend['cpu'], trend['mem']
+            if cpu:
+                log_info(f"  CPU: moy {cpu['mean']:.1f}% | p95 {cpu['p95']:.1f}% | max {cpu['max']:.1f}%", "Tools")
+            if mem:
+                log_info(f"  RAM: moy {mem['mean']:.1f}% | p95 {mem['p95']:.1f}% | max {mem['max']:.1f}%", "Tools")
+        
+        top = metrics.top_vms(field="cpu", window=3600, count=5)
+        if top:
+            log_info("VMs les plus chargées (CPU p95, dernière heure):", "Tools")
+            for entry in top:
+                log_info(f"  VM {entry['vmid']}: p95 {entry['p95'] * 100:.1f}% | max {entry['max'] * 100:.1f}%", "Tools")
+
+    def on_metrics_failed(self, message):
+        """Échec de la collecte des métriques"""
+        self.trends_btn.setEnabled(True)
+        log_error(f"Erreur collecte des métriques: {message}", "Tools")
+
+    def show_rebalance_plan(self):
+        """Calcule et affiche les migrations proposées pour équilibrer le cluster"""
+        log_info("Simulation du rééquilibrage du cluster", "Tools")
+        
+        try:
+            plan = self.proxmox_handler.planner.rebalance()
+            if not plan['moves']:
+                log_success("Cluster déjà équilibré - aucune migration proposée", "Tools")
+                return
+            
+            for move in plan['moves']:
+                log_info(f"Migration: {move['name']} (ID: {move['vmid']}) {move['source']} → {move['target']}", "Tools")
+            
+            before = {node['node']: node for node in plan['before']}
+            for node in plan['after']:
+                old = before[node['node']]
+                log_info(f"Node: {node['node']} - CPU {old['cpu_percent']:.1f}% → {node['cpu_percent']:.1f}% | "
+                         f"RAM {old['mem_percent']:.1f}% → {node['mem_percent']:.1f}%", "Tools")
+        except Exception as e:
+            log_error(f"Erreur simulation rééquilibrage: {str(e)}", "Tools")
+
+    def evacuate_node(self):
+        """Vide un nœud selon le plan d'évacuation (VMs actives à chaud, arrêtées hors ligne)"""
+        if self.migration_thread and self.migration_thread.isRunning():
+            log_debug("Migrations déjà en cours", "Tools")
+            return
+        
+        nodes = list(self.proxmox_handler.nodes)
+        if not nodes:
+            log_error("Aucun node disponible", "Tools")
+            return
+        node_name, ok = QInputDialog.getItem(self, "Évacuer un nœud", "Nœud à vider :", nodes, 0, False)
+        if not ok:
+            return
+        
+        try:
+            plan = self.proxmox_handler.planner.evacuate(node_name)
+        except Exception as e:
+            log_error(f"Erreur plan d'évacuation: {str(e)}", "Tools")
+            return
+        
+        if plan['unplaced']:
+            log_warning(f"VMs sans nœud cible: {', '.join(str(vmid) for vmid in plan['unplaced'])}", "Tools")
+        if not plan['moves']:
+            if plan['unplaced']:
+                log_warning(f"Aucune VM de {node_name} ne peut être migrée", "Tools")
+            else:
+                log_info(f"Aucune VM à migrer depuis {node_name}", "Tools")
+            return
+        
+        online = sum(1 for move in plan['moves'] if move['online'])
+        offline = len(plan['moves']) - online
+        reply = QMessageBox.question(
+            self, "Confirmation",
+            f"Migrer depuis {node_name} : {online} VM(s) à chaud, {offline} VM(s) arrêtée(s) hors ligne ?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        self.evacuate_btn.setEnabled(False)
+        self._last_migration_report = 0
+        self.migration_thread = MigrationThread(self.proxmox_handler, plan['moves'])
+        self.migration_thread.migration_event.connect(self.on_migration_event)
+        self.migration_thread.migration_complete.connect(self.on_migrations_complete)
+        self.migration_thread.start()
+
+    def on_migration_event(self, event):
+        """Journalise l'avancement des migrations (progression globale toutes les 5 s)"""
+        label = f"{event['name']} (ID: {event['vmid']}) {event['source']} → {event['target']}"
+        if event['state'] == 'started':
+            log_info(f"Migration démarrée: {label}", "Tools")
+        elif event['state'] == 'done':
+            log_success(f"Migration terminée: {label} ({event['duration']:.0f}s)", "Tools")
+        elif event['state'] == 'failed':
+            log_error(f"Migration échouée: {label} - {event['message']}", "Tools")
+        
+        now = datetime.datetime.now().timestamp()
+        if event['state'] == 'progress' and now - self._last_migration_report >= 5:
+            self._last_migration_report = now
+            aggregate = event['aggregate']
+            percent = aggregate['transferred'] / aggregate['total'] * 100 if aggregate['total'] else 0
+            eta = f"{aggregate['eta']:.0f}s" if aggregate['eta'] is not None else "?"
+            log_info(f"Migrations: {percent:.0f}% | {aggregate['rate'] / 1024 ** 2:.0f} MiB/s | ETA {eta}", "Tools")
+
+    def on_migrations_complete(self, summary):
+        """Bilan du lot de migrations"""
+        self.evacuate_btn.setEnabled(self.proxmox_handler.is_connected())
+        if summary:
+            log_info(f"Migrations: {summary['succeeded']}/{summary['total']} réussie(s) "
+                     f"en {summary['duration']:.0f}s", "Tools")
+
+    def backup_vms(self):
+        """Sauvegarde (vzdump) une sélection de VMs vers un stockage, dans une fenêtre horaire"""
+        if self.backup_thread and self.backup_thread.isRunning():
+            log_debug("Sauvegardes déjà en cours", "Tools")
+            return
+        
+        try:
+            self.proxmox_handler.inventory.refresh()
+        except Exception as e:
+            log_error(f"Erreur inventaire: {str(e)}", "Tools")
+            return
+        storages = sorted({storage['storage'] for storage in self.proxmox_handler.inventory.storages()
+                           if storage.get('status') == 'available'
+                           and 'backup' in (storage.get('content') or '').split(',')})
+        if not storages:
+            log_error("Aucun stockage n'accepte les sauvegardes", "Tools")
+            return
+        storage, ok = QInputDialog.getItem(self, "Sauvegarder des VMs", "Stockage de destination :",
+                                           storages, 0, False)
+        if not ok:
+            return
+        
+        selection, ok = QInputDialog.getText(
+            self, "Sauvegarder des VMs", "IDs des VMs (ex: 100,101,200-210), vide = toutes les VMs :")
+        if not ok:
+            return
+        wanted = set()
+        try:
+            for part in filter(None, (part.strip() for part in selection.split(','))):
+                if '-' in part:
+                    first, last = part.split('-', 1)
+                    wanted.update(range(int(first), int(last) + 1))
+                else:
+                    wanted.add(int(part))
+        except ValueError:
+            log_error(f"Sélection de VMs invalide: {selection}", "Tools")
+            return
+        vms = [vm for vm in self.proxmox_handler.inventory.vms()
+               if not vm.get('template') and (not wanted or int(vm['vmid']) in wanted)]
+        if not vms:
+            log_info("Aucune VM à sauvegarder", "Tools")
+            return
+        
+        minutes, ok = QInputDialog.getInt(
+            self, "Sauvegarder des VMs", "Fenêtre de lancement en minutes (0 = sans limite) :", 0, 0, 24 * 60)
+        if not ok:
+            return
+        deadline = datetime.datetime.now().timestamp() + minutes * 60 if minutes else None
+        
+        reply = QMessageBox.question(
+            self, "Confirmation",
+            f"Sauvegarder {len(vms)} VM(s) vers {storage} ?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        self.backup_btn.setEnabled(False)
+        self._last_backup_report = {}
+        self.backup_thread = BackupThread(self.proxmox_handler, vms, storage, deadline)
+        self.backup_thread.backup_event.connect(self.on_backup_event)
+        self.backup_thread.backup_complete.connect(self.on_backups_complete)
+        self.backup_thread.start()
+
+    def on_backup_event(self, event):
+        """Journalise l'avancement des sauvegardes (progression de chaque VM toutes les 10 s)"""
+        label = f"{event['name']} (ID: {event['vmid']}) → {event['storage']}"
+        if event['state'] == 'started':
+            log_info(f"Sauvegarde démarrée: {label}", "Tools")
+        elif event['state'] == 'done':
+            log_success(f"Sauvegarde terminée: {label} - {event['transferred'] / 1024 ** 3:.1f} GiB "
+                        f"en {event['duration']:.0f}s ({event['rate'] / 1024 ** 2:.0f} MiB/s)", "Tools")
+        elif event['state'] == 'failed':
+            log_error(f"Sauvegarde échouée: {label} - {event['message']}", "Tools")
+        elif event['state'] == 'deferred':
+            log_warning(f"Sauvegarde reportée: {label}", "Tools")
+        
+        now = datetime.datetime.now().timestamp()
+        if event['state'] == 'progress' and now - self._last_backup_report.get(event['vmid'], 0) >= 10:
+            self._last_backup_report[event['vmid']] = now
+            log_info(f"Sauvegarde {label}: {event['percent']}% | {event['rate'] / 1024 ** 2:.0f} MiB/s", "Tools")
+
+    def on_backups_complete(self, summary):
+        """Bilan du lot de sauvegardes"""
+        self.backup_btn.setEnabled(self.proxmox_handler.is_connected())
+        if summary:
+            log_info(f"Sauvegardes: {summary['succeeded']}/{summary['total']} réussie(s), "
+                     f"{summary['deferred']} reportée(s) en {summary['duration']:.0f}s", "Tools")
+
     def setup_import_tab(self):
         layout = QVBoxLayout()
         
@@ -1099,6 +1679,10 @@ Type d'export   : {logs_info}
         self.import_button.clicked.connect(self.import_ip_plan)
         layout.addWidget(self.import_button)
 
+        self.provision_button = QPushButton("Provisionner les VMs du plan (clone de template)")
+        self.provision_button.clicked.connect(self.provision_from_ip_plan)
+        layout.addWidget(self.provision_button)
+
         self.ip_table = QTableWidget()
         layout.addWidget(self.ip_table)
 
@@ -1233,6 +1817,73 @@ Type d'export   : {logs_info}
         else:
             log_info("Import plan IP annulé", "MainWindow")
 
+    def provision_from_ip_plan(self):
+        """Clone un template pour chaque ligne du plan importé (hostname + Prod IP)"""
+        if self.provisioning_thread and self.provisioning_thread.isRunning():
+            log_debug("Provisionnement déjà en cours", "MainWindow")
+            return
+        if not self.proxmox_handler.is_connected():
+            QMessageBox.warning(self, "Erreur", "Pas de connexion Proxmox.")
+            return
+        
+        specs = []
+        for row in range(self.ip_table.rowCount()):
+            hostname = self.ip_table.item(row, 0).text() if self.ip_table.item(row, 0) else ""
+            prod_ip = self.ip_table.item(row, 1).text() if self.ip_table.item(row, 1) else ""
+            if hostname:
+                specs.append({"name": hostname, "ip": prod_ip})
+        if not specs:
+            QMessageBox.warning(self, "Erreur", "Importez d'abord un plan d'adressage.")
+            return
+        
+        templates = [vm for vm in self.proxmox_handler.inventory.vms() if vm.get("template")]
+        if not templates:
+            QMessageBox.warning(self, "Erreur", "Aucun template disponible sur le cluster.")
+            return
+        labels = [f"{vm.get('name', 'template')} (ID: {vm['vmid']}) - {vm['node']}" for vm in templates]
+        label, ok = QInputDialog.getItem(self, "Provisionnement", "Template à cloner :", labels, 0, False)
+        if not ok:
+            return
+        template = templates[labels.index(label)]
+        
+        gateway, ok = QInputDialog.getText(self, "Provisionnement", "Passerelle (optionnelle) :")
+        if not ok:
+            return
+        reply = QMessageBox.question(
+            self, "Provisionnement",
+            f"Créer {len(specs)} VM(s) depuis {template.get('name')}.\n\n"
+            "Oui : clones liés (rapides)\nNon : clones complets",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel
+        )
+        if reply == QMessageBox.StandardButton.Cancel:
+            return
+        
+        self.provision_button.setEnabled(False)
+        self.provisioning_thread = ProvisioningThread(
+            self.proxmox_handler, template['vmid'], specs,
+            reply == QMessageBox.StandardButton.Yes, gateway.strip()
+        )
+        self.provisioning_thread.provisioning_event.connect(self.on_provisioning_event)
+        self.provisioning_thread.provisioning_complete.connect(self.on_provisioning_complete)
+        self.provisioning_thread.start()
+
+    def on_provisioning_event(self, event):
+        """Journalise la fin de chaque VM provisionnée"""
+        if event['state'] == 'done':
+            log_success(f"VM prête: {event['name']} (ID: {event['vmid']}) sur {event['node']} "
+                        f"({event['duration']:.0f}s)", "MainWindow")
+        elif event['state'] == 'failed':
+            log_error(f"Échec provisionnement {event['name']}: {event['message']}", "MainWindow")
+
+    def on_provisioning_complete(self, summary):
+        """Bilan du provisionnement"""
+        self.provision_button.setEnabled(True)
+        if summary:
+            QMessageBox.information(
+                self, "Provisionnement",
+                f"{summary['succeeded']}/{summary['total']} VM(s) créée(s) en {summary['duration']:.0f}s."
+            )
+
     # === MÉTHODES DE COMPATIBILITÉ ===
     def update_proxmox_info(self):
         """Méthode de compatibilité - redirige vers update_connection_status"""